@@ -0,0 +1,38 @@
+import asyncio
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException
+
+from ..core.profiling import get_formula_stats_store, get_profile_store
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/formula-stats")
+async def formula_stats(
+    sort: Literal["total_ms", "calls", "mean_us", "rows", "mean_rows"] = "total_ms",
+):
+    """
+    Call counts, cumulative time and batch sizes per formula since the last
+    reset, summed over every worker and job process
+    """
+    return await asyncio.to_thread(get_formula_stats_store().report, sort)
+
+
+@router.post("/formula-stats/reset", status_code=204)
+async def reset_formula_stats():
+    await asyncio.to_thread(get_formula_stats_store().reset)
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """Most recent request profiles first, captured by any worker"""
+    return await asyncio.to_thread(get_profile_store().list)
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    profile = await asyncio.to_thread(get_profile_store().get, profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found or expired")
+    return profile
@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from ..core.config import settings
+from ..dependencies import AsyncSessionDep
+from ..services.alert_dispatcher import DividendAlertDispatcher
+from ..services.dividend_calendar import (
+    group_alerts_by_recipient,
+    load_dividend_calendar,
+    load_holdings_index,
+)
+
+router = APIRouter(prefix="/alerts", tags=["alerts"])
+
+
+@router.get("/ex-dividends")
+async def upcoming_ex_dividends(
+    session: AsyncSessionDep,
+    days: int = Query(settings.ALERT_LOOKAHEAD_DAYS, ge=0, le=365),
+    start: Optional[date] = None,
+):
+    """Every ticker going ex-dividend in the next ``days`` days"""
+    start = start or date.today()
+    calendar = await load_dividend_calendar(session, start)
+    return [
+        {
+            "ticker": e.ticker,
+            "ex_date": e.ex_date,
+            "pay_date": e.pay_date,
+            "amount": e.amount,
+            "is_special": e.is_special,
+        }
+        for e in calendar.ex_dividends_between(start, start + timedelta(days=days))
+    ]
+
+
+@router.post("/dividends/dispatch")
+async def dispatch_dividend_alerts(
+    session: AsyncSessionDep,
+    days: int = Query(settings.ALERT_LOOKAHEAD_DAYS, ge=0, le=365),
+):
+    """Email every holder of a ticker going ex-dividend in the next ``days`` days"""
+    try:
+        dispatcher = DividendAlertDispatcher.from_settings()
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    calendar = await load_dividend_calendar(session)
+    entries = calendar.upcoming_ex_dividends(days)
+    holdings = await load_holdings_index(session, {e.ticker for e in entries})
+    alerts = group_alerts_by_recipient(entries, holdings)
+
+    report = await dispatcher.dispatch(alerts)
+    return {
+        "events": len(entries),
+        "recipients": len(alerts),
+        "sent": report.sent,
+        "failed": report.failed,
+    }
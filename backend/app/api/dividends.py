@@ -0,0 +1,39 @@
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from ..dependencies import AsyncSessionDep
+from ..services.dividend_streaks import get_streak_tracker
+
+router = APIRouter(prefix="/dividends", tags=["dividends"])
+
+
+@router.get("/streaks")
+async def dividend_streaks(
+    session: AsyncSessionDep,
+    tickers: Optional[list[str]] = Query(None),
+    classification: Optional[str] = None,
+    basis: Literal["increases", "payments"] = "increases",
+    as_of: Optional[date] = None,
+):
+    """
+    Consecutive payment/increase years and King/Champion/Contender/Challenger
+    labels, for the given tickers or the whole universe
+    """
+    tracker = get_streak_tracker()
+    await tracker.sync_from_db(session)
+    if tickers is not None:
+        tickers = [t.upper() for t in tickers]
+        unknown = [t for t in tickers if t not in tracker.states]
+        if unknown:
+            raise HTTPException(
+                status_code=404, detail=f"No dividend history: {', '.join(unknown)}"
+            )
+
+    snapshot = tracker.snapshot(as_of, tickers, basis)
+    return [
+        snapshot.row(i)
+        for i in range(len(snapshot.tickers))
+        if classification is None or snapshot.classifications[i] == classification
+    ]
@@ -0,0 +1,52 @@
+import asyncio
+
+import orjson
+from fastapi import APIRouter, HTTPException, Request
+
+from ..dependencies import AsyncSessionDep
+from ..services.fundamentals_ingest import load_fundamentals, validate_fundamentals
+
+router = APIRouter(prefix="/fundamentals", tags=["fundamentals"])
+
+MAX_REPORTED_ERRORS = 1000
+
+
+@router.post("/batch")
+async def ingest_fundamentals(
+    request: Request,
+    session: AsyncSessionDep,
+    dry_run: bool = False,
+):
+    """
+    Validate and load a batch of fundamentals: a JSON list of records, or an
+    object of equal-length columns (``{"ticker": [...], "period_end": [...],
+    "revenue": [...]}``). Invalid rows are reported and skipped; the rest
+    are loaded into the database, and reach the fundamentals store, metric
+    values and caches on the store writer's next sync.
+    """
+    body = await request.body()
+
+    # Parsed directly: a pydantic body model would validate row by row. A
+    # large batch takes long enough to stall every other request, so it is
+    # parsed and validated in a worker thread
+    def parse():
+        return validate_fundamentals(orjson.loads(body))
+
+    try:
+        batch = await asyncio.to_thread(parse)
+    except ValueError as e:  # includes orjson.JSONDecodeError
+        raise HTTPException(status_code=422, detail=str(e))
+
+    response = {
+        "received": batch.received,
+        "valid": len(batch),
+        "error_count": len(batch.errors),
+        "errors": [e.to_dict() for e in batch.errors[:MAX_REPORTED_ERRORS]],
+        "inserted": 0,
+        "updated": 0,
+    }
+    if dry_run or not len(batch):
+        return response
+
+    response["inserted"], response["updated"] = await load_fundamentals(session, batch)
+    return response
@@ -0,0 +1,58 @@
+from typing import Any
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from ..core.jobs import FAILED, SUCCEEDED
+from ..services.job_handlers import get_job_manager
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+class JobSubmission(BaseModel):
+    kind: str
+    params: dict[str, Any] = {}
+
+
+@router.post("", status_code=202)
+async def submit_job(submission: JobSubmission):
+    """Queue a job; an identical job already in flight is returned instead"""
+    try:
+        record, deduplicated = await get_job_manager().submit(
+            submission.kind, submission.params
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {**record.to_dict(), "deduplicated": deduplicated}
+
+
+@router.get("/{job_id}")
+async def job_status(job_id: str):
+    record = await get_job_manager().status(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return record.to_dict()
+
+
+@router.get("/{job_id}/result")
+async def job_result(job_id: str):
+    manager = get_job_manager()
+    record = await manager.status(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    if record.status == FAILED:
+        raise HTTPException(status_code=409, detail=record.error)
+    if record.status != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job is {record.status}")
+    try:
+        return await manager.result(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job result expired")
+
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str):
+    record = await get_job_manager().cancel(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return record.to_dict()
@@ -0,0 +1,112 @@
+import asyncio
+import json
+from contextlib import suppress
+from typing import Literal
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel, Field, ValidationError
+
+from ..core.cache import get_cache
+from ..core.columnar_store import get_fundamentals_store
+from ..core.config import settings
+from ..services.live_yields import Subscriber, get_live_yield_hub
+from ..services.yield_metrics import cached_yield_metrics
+
+router = APIRouter(tags=["live"])
+
+
+class PriceTick(BaseModel):
+    ticker: str
+    price: float
+
+
+class SubscriptionRequest(BaseModel):
+    action: Literal["subscribe", "unsubscribe"] = "subscribe"
+    tickers: list[str] = Field(max_length=500)
+
+
+@router.post("/live/prices", status_code=202)
+async def publish_prices(ticks: list[PriceTick]):
+    """
+    Ingest price ticks; every worker's feed picks them up, bursts coalesced
+    until its next flush
+    """
+    await get_live_yield_hub().publish_prices(
+        (tick.ticker.upper(), tick.price) for tick in ticks
+    )
+    return {"accepted": len(ticks)}
+
+
+async def _pump(websocket: WebSocket, subscriber: Subscriber) -> None:
+    while True:
+        for message in await subscriber.drain():
+            await asyncio.wait_for(
+                websocket.send_json(message), settings.LIVE_SEND_TIMEOUT_SECONDS
+            )
+
+
+@router.websocket("/ws/yields")
+async def yield_feed(websocket: WebSocket):
+    """
+    Push yield metrics for subscribed tickers. Clients send
+    ``{"action": "subscribe" | "unsubscribe", "tickers": [...]}``; malformed
+    messages get an error frame and the session carries on. Browsers pass
+    the API token as ``?token=``.
+    """
+    await websocket.accept()
+    hub = get_live_yield_hub()
+    subscriber = Subscriber()
+    sender = asyncio.create_task(_pump(websocket, subscriber))
+    receiver = asyncio.create_task(_receive(websocket, subscriber))
+    try:
+        # Whichever ends first (client gone, or send timed out) ends the session
+        await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        hub.unsubscribe(subscriber)
+        for task in (sender, receiver):
+            task.cancel()
+            with suppress(
+                asyncio.CancelledError, WebSocketDisconnect, asyncio.TimeoutError
+            ):
+                await task
+        with suppress(RuntimeError):
+            await websocket.close()
+
+
+async def _receive(websocket: WebSocket, subscriber: Subscriber) -> None:
+    hub = get_live_yield_hub()
+    store = get_fundamentals_store()
+    cache = get_cache()
+    while True:
+        try:
+            request = SubscriptionRequest.model_validate(
+                json.loads(await websocket.receive_text())
+            )
+        except (ValueError, ValidationError) as e:  # JSONDecodeError is a ValueError
+            # Keyed apart from every ticker, so it never replaces an update
+            subscriber.offer("", {"type": "error", "detail": _invalid_message(e)})
+            continue
+        tickers = [t.upper() for t in request.tickers]
+        if request.action == "unsubscribe":
+            hub.unsubscribe(subscriber, tickers)
+            continue
+        hub.subscribe(subscriber, tickers)
+        # Send the current values right away instead of waiting for a tick
+        for ticker in tickers:
+            try:
+                subscriber.offer(
+                    ticker,
+                    {"type": "yields", **cached_yield_metrics(store, ticker, cache)},
+                )
+            except (KeyError, ValueError):
+                subscriber.offer(
+                    ticker, {"type": "error", "ticker": ticker, "detail": "No data"}
+                )
+
+
+def _invalid_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        first = error.errors()[0]
+        location = ".".join(str(part) for part in first["loc"]) or "message"
+        return f"Invalid message: {location}: {first['msg']}"
+    return "Invalid message: expected JSON"
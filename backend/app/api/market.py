@@ -0,0 +1,80 @@
+import asyncio
+from typing import Optional
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+
+from ..core.market_assumptions import get_market_assumptions_store
+from ..services.recompute import get_recomputer
+from ..services.wacc import get_wacc_engine
+
+router = APIRouter(prefix="/market", tags=["market"])
+
+
+class AssumptionsUpdate(BaseModel):
+    tenors: list[float] = Field(..., min_length=1)  # years, ascending
+    yields: list[float] = Field(..., min_length=1)  # decimal, e.g. 0.043
+    equity_risk_premium: float
+    default_tax_rate: Optional[float] = Field(None, ge=0, le=1)
+
+
+@router.get("/assumptions")
+async def current_assumptions(version: Optional[int] = None):
+    store = get_market_assumptions_store()
+    try:
+        snapshot = store.current() if version is None else store.get(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown version: {version}")
+    return snapshot.to_dict()
+
+
+@router.post("/assumptions", status_code=201)
+async def publish_assumptions(update: AssumptionsUpdate):
+    """Publish a new snapshot and refresh every dependent cached metric"""
+    try:
+        snapshot = await asyncio.to_thread(
+            get_market_assumptions_store().publish,
+            update.tenors,
+            update.yields,
+            update.equity_risk_premium,
+            update.default_tax_rate,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    await get_recomputer().notify_market_change()
+    return snapshot.to_dict()
+
+
+@router.get("/wacc")
+async def universe_wacc(
+    tickers: Optional[list[str]] = Query(None),
+    version: Optional[int] = None,
+):
+    """Cost of equity, cost of debt and WACC under an assumptions snapshot"""
+    engine = get_wacc_engine()
+    try:
+        results = engine.universe(version)
+        rows = (
+            None
+            if tickers is None
+            else [engine.store.ticker_index(t.upper()) for t in tickers]
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown: {e.args[0]}")
+
+    names = engine.store.tickers if rows is None else [t.upper() for t in tickers]
+    selected = {
+        metric: values if rows is None else values[rows]
+        for metric, values in results.items()
+    }
+    return {
+        "version": engine.assumptions.current().version if version is None else version,
+        "tickers": {
+            ticker: {
+                metric: float(v[i]) if np.isfinite(v[i]) else None
+                for metric, v in selected.items()
+            }
+            for i, ticker in enumerate(names)
+        },
+    }
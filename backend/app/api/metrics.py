@@ -0,0 +1,155 @@
+from typing import Any
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from ..core.cache import get_cache
+from ..core.columnar_store import FundamentalsStore
+from ..core.columnar_format import MEDIA_TYPE as COLUMNAR, encode_columns
+from ..core.conditional import JSON, json_bytes, versioned_response
+from ..dependencies import DatasetVersionsDep, FundamentalsStoreDep
+from ..services.dividend_growth import (
+    annual_dividend_yield,
+    dividend_growth_from_store,
+    latest_dividend_yield,
+)
+from ..services.recompute import get_recomputer
+from ..services.universe_snapshot import universe_batch
+from ..services.yield_metrics import cached_yield_metrics
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return [_jsonable(v) for v in value.tolist()]
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+@router.get("/evaluate")
+async def evaluate_metrics(
+    request: Request,
+    store: FundamentalsStoreDep,
+    versions: DatasetVersionsDep,
+    targets: list[str] = Query(...),
+    tickers: list[str] = Query(...),
+    explain: bool = False,
+):
+    """
+    Evaluate target metrics for a batch of tickers through the metric graph.
+    Send ``Accept: application/vnd.dividend.columnar`` for typed column
+    buffers (a ``ticker`` column plus one per target) instead of JSON.
+    """
+    tickers = [t.upper() for t in tickers]
+    if explain:  # timings describe this evaluation, so never serve a cached one
+        return _jsonable(_evaluate(store, targets, tickers, explain))
+    return await versioned_response(
+        request,
+        versions,
+        lambda: _evaluate(store, targets, tickers, explain),
+        {
+            JSON: lambda result: json_bytes(_jsonable(result)),
+            COLUMNAR: lambda result: encode_columns(
+                {"ticker": result["tickers"], **result["metrics"]},
+                len(result["tickers"]),
+                types={"ticker": "utf8"},
+            ),
+        },
+    )
+
+
+def _evaluate(
+    store: FundamentalsStore, targets: list[str], tickers: list[str], explain: bool
+) -> dict[str, Any]:
+    try:
+        batch = universe_batch(store, tickers)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown ticker: {e.args[0]}")
+    try:
+        plan = batch.plan(targets)
+        values = batch.compute(targets)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    response: dict[str, Any] = {"tickers": tickers, "metrics": values}
+    if explain:
+        response["plan"] = plan.describe().splitlines()
+        response["timings"] = batch.report()
+    return response
+
+
+@router.get("/dividend-growth")
+async def dividend_growth(
+    request: Request,
+    store: FundamentalsStoreDep,
+    versions: DatasetVersionsDep,
+    tickers: list[str] = Query(...),
+    history: bool = False,
+):
+    """1/3/5/10/20-year CAGRs, YoY growth, velocity and Chowder number"""
+    tickers = [t.upper() for t in tickers]
+    return await versioned_response(
+        request, versions, lambda: _dividend_growth(store, tickers, history)
+    )
+
+
+def _dividend_growth(
+    store: FundamentalsStore, tickers: list[str], history: bool
+) -> dict[str, Any]:
+    try:
+        growth = dividend_growth_from_store(store, tickers)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown ticker: {e.args[0]}")
+
+    # Split-adjusted like the CAGRs, so a split never skews the yield term
+    dividend_yield = latest_dividend_yield(store, tickers)
+    # Today's yield goes with the CAGR ending at the latest year; the
+    # history pairs each year's CAGR with that year's own yield
+    chowder = growth.chowder(dividend_yield[:, None])
+    if history:
+        chowder_history = growth.chowder(annual_dividend_yield(store, tickers))
+
+    response: dict[str, Any] = {"years": growth.years, "tickers": {}}
+    for i, ticker in enumerate(tickers):
+        latest = growth.latest(ticker)
+        latest["chowder_number"] = (
+            _jsonable(float(chowder[i, -1])) if growth.years else None
+        )
+        if history:
+            latest["history"] = _jsonable(
+                {
+                    **{f"cagr_{w}y": m[i] for w, m in growth.cagr.items()},
+                    "yoy": growth.yoy[i],
+                    "velocity": growth.velocity[i],
+                    "chowder_number": chowder_history[i],
+                }
+            )
+        response["tickers"][ticker] = latest
+    return response
+
+
+@router.get("/{ticker}")
+async def ticker_metrics(ticker: str, targets: list[str] = Query(...)):
+    """Derived metrics for one ticker, kept current as its fundamentals change"""
+    try:
+        values = await get_recomputer().metrics(ticker.upper(), targets)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown ticker: {ticker}")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"ticker": ticker.upper(), "metrics": _jsonable(values)}
+
+
+@router.get("/{ticker}/yields")
+async def ticker_yield_metrics(ticker: str, store: FundamentalsStoreDep):
+    """Current, relative and spread yields plus P/D ratio for one ticker"""
+    try:
+        return cached_yield_metrics(store, ticker.upper(), get_cache())
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown ticker: {ticker}")
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
@@ -0,0 +1,40 @@
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+
+from ..core.config import settings
+from ..dependencies import FundamentalsStoreDep
+from ..services.corporate_actions import get_corporate_action_adjuster
+from ..services.covariance import get_covariance_cache
+from ..services.portfolio_risk import portfolio_risk
+
+router = APIRouter(prefix="/portfolio", tags=["portfolio"])
+
+
+class RiskRequest(BaseModel):
+    weights: dict[str, float]
+    window: int = Field(settings.COVARIANCE_WINDOW, ge=2)  # return periods
+    end: Optional[str] = None  # period_end, default latest
+
+
+@router.post("/risk")
+async def portfolio_risk_summary(request: RiskRequest, store: FundamentalsStoreDep):
+    """Volatility, Sharpe ratio and risk contributions for a weighted portfolio"""
+    weights = {t.upper(): w for t, w in request.weights.items()}
+    try:
+        # First use of a (universe, window, end) builds the covariance
+        return await asyncio.to_thread(
+            portfolio_risk,
+            store,
+            get_corporate_action_adjuster(),
+            get_covariance_cache(),
+            weights,
+            request.window,
+            request.end,
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown: {e.args[0]}")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
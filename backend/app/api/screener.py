@@ -0,0 +1,67 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from ..core.columnar_format import MEDIA_TYPE as COLUMNAR, encode_columns
+from ..core.conditional import versioned_response
+from ..dependencies import AsyncSessionDep, ScreenerVersionsDep
+from ..services.screener import MetricFilter, available_metrics, screen
+
+router = APIRouter(prefix="/screener", tags=["screener"])
+
+
+@router.get("/metrics")
+async def screener_metrics(
+    request: Request, session: AsyncSessionDep, versions: ScreenerVersionsDep
+):
+    """Metrics available to screen on, with how many tickers have a value"""
+    return await versioned_response(
+        request, versions, lambda: available_metrics(session)
+    )
+
+
+@router.get("")
+async def run_screen(
+    request: Request,
+    session: AsyncSessionDep,
+    versions: ScreenerVersionsDep,
+    sort: str = "current_dividend_yield",
+    order: Literal["asc", "desc"] = "desc",
+    filter: list[str] = Query([], description="metric:min:max, either bound optional"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+):
+    """
+    Tickers ranked by ``sort``, keyset-paginated: pass ``next_cursor`` back
+    as ``cursor`` for the next page. ``Accept:
+    application/vnd.dividend.columnar`` returns the page as typed columns
+    with ``sort``, ``order`` and ``next_cursor`` in the schema's meta.
+    """
+    try:
+        filters = [MetricFilter.parse(spec) for spec in filter]
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    names = list(dict.fromkeys(["ticker", sort, *(f.metric for f in filters)]))
+
+    async def build():
+        try:
+            page = await screen(session, sort, order == "desc", filters, limit, cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return {
+            "sort": sort,
+            "order": order,
+            "items": page.items,
+            "next_cursor": page.next_cursor,
+        }
+
+    def columnar(result: dict) -> bytes:
+        items = result["items"]
+        return encode_columns(
+            {name: [item[name] for item in items] for name in names},
+            len(items),
+            {k: result[k] for k in ("sort", "order", "next_cursor")},
+            types={"ticker": "utf8"},
+        )
+
+    return await versioned_response(request, versions, build, {COLUMNAR: columnar})
@@ -0,0 +1,115 @@
+import asyncio
+from typing import Literal, Optional
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query, Response
+
+from ..core.config import settings
+from ..dependencies import FundamentalsStoreDep
+from ..services.valuation_grid import GrowthAxis, round_grid_inputs, valuation_grid
+
+router = APIRouter(prefix="/valuation", tags=["valuation"])
+
+MAX_STEPS = settings.VALUATION_GRID_MAX_STEPS
+
+
+@router.get("/{ticker}/grid")
+async def sensitivity_grid(
+    ticker: str,
+    store: FundamentalsStoreDep,
+    model: Literal["gordon", "two_stage", "three_stage"] = "gordon",
+    r_min: float = 0.04,
+    r_max: float = 0.14,
+    r_steps: int = Query(100, ge=2, le=MAX_STEPS),
+    g_min: float = 0.0,
+    g_max: float = 0.08,
+    g_steps: int = Query(100, ge=2, le=MAX_STEPS),
+    growth_axis: GrowthAxis = "stable",
+    initial_growth_rate: float = 0.08,
+    stable_growth_rate: float = 0.03,
+    initial_periods: int = Query(5, ge=0, le=50),
+    transition_periods: int = Query(5, ge=0, le=50),
+    dividend: Optional[float] = Query(None, gt=0),
+    format: Literal["binary", "json"] = "binary",
+):
+    """
+    Value per share over a required-return x growth grid.
+
+    Rows are ``linspace(r_min, r_max, r_steps)``, columns are
+    ``linspace(g_min, g_max, g_steps)`` (the stable or initial growth rate
+    for the multi-stage models, per ``growth_axis``). Cells with r <= g are
+    NaN in the binary payload (little-endian float32, row-major, shape in
+    ``X-Grid-Shape``) and null in JSON.
+    """
+    ticker = ticker.upper()
+    if r_min >= r_max or g_min >= g_max:
+        raise HTTPException(
+            status_code=422, detail="Axis minimum must be below maximum"
+        )
+    if dividend is None:
+        try:
+            dividend = store.latest_row(ticker, ["dividend_per_share"])[
+                "dividend_per_share"
+            ]
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Unknown ticker: {ticker}")
+        if not np.isfinite(dividend) or dividend <= 0:
+            raise HTTPException(
+                status_code=422, detail=f"No dividend on record for {ticker}"
+            )
+
+    inputs = round_grid_inputs(
+        dividend=dividend,
+        r_min=r_min,
+        r_max=r_max,
+        g_min=g_min,
+        g_max=g_max,
+        initial_growth_rate=initial_growth_rate,
+        stable_growth_rate=stable_growth_rate,
+    )
+
+    def build():
+        grid = valuation_grid(
+            model,
+            inputs["dividend"],
+            inputs["r_min"],
+            inputs["r_max"],
+            r_steps,
+            inputs["g_min"],
+            inputs["g_max"],
+            g_steps,
+            growth_axis=growth_axis,
+            initial_growth_rate=inputs["initial_growth_rate"],
+            stable_growth_rate=inputs["stable_growth_rate"],
+            initial_periods=initial_periods,
+            transition_periods=transition_periods,
+        )
+        if format == "json":
+            return {
+                "ticker": ticker,
+                "model": model,
+                "dividend": inputs["dividend"],
+                "required_returns": np.linspace(
+                    inputs["r_min"], inputs["r_max"], r_steps
+                ).tolist(),
+                "growth_rates": np.linspace(
+                    inputs["g_min"], inputs["g_max"], g_steps
+                ).tolist(),
+                "values": [
+                    [None if np.isnan(v) else round(v, 4) for v in row]
+                    for row in grid.tolist()
+                ],
+            }
+        return Response(
+            content=grid.astype("<f4", copy=False).tobytes(),
+            media_type="application/octet-stream",
+            headers={
+                "X-Grid-Shape": f"{r_steps},{g_steps}",
+                "X-Grid-Dtype": "float32",
+                "X-Grid-Required-Returns": f"{inputs['r_min']},{inputs['r_max']}",
+                "X-Grid-Growth-Rates": f"{inputs['g_min']},{inputs['g_max']}",
+            },
+        )
+
+    # Large multi-stage grids take long enough to stall every other request
+    return await asyncio.to_thread(build)
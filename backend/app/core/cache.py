@@ -0,0 +1,64 @@
+import time
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import Any, Optional
+
+from .config import settings
+from .market_hours import market_aware_ttl
+
+
+class MemoryCache:
+    """In-process LRU cache with per-entry TTLs and request popularity counts"""
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._requests: Counter[str] = Counter()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def record_request(self, name: str) -> None:
+        """Count a request for ``name`` (e.g. a ticker) for cache warming"""
+        self._requests[name] += 1
+
+    def most_requested(self, n: int) -> list[str]:
+        return [name for name, _ in self._requests.most_common(n)]
+
+    def decay_requests(self) -> None:
+        """Halve popularity counts so warming follows recent demand"""
+        self._requests = Counter(
+            {name: count // 2 for name, count in self._requests.items() if count > 1}
+        )
+
+
+def price_metric_ttl() -> int:
+    """TTL for price-derived metrics: ``CACHE_TTL`` in session, longer outside"""
+    return market_aware_ttl(
+        settings.CACHE_TTL, close_grace_minutes=settings.CACHE_CLOSE_GRACE_MINUTES
+    )
+
+
+@lru_cache()
+def get_cache() -> MemoryCache:
+    return MemoryCache(max_entries=settings.CACHE_MAX_ENTRIES)
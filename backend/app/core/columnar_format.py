@@ -0,0 +1,194 @@
+"""
+Binary columnar response format (``application/vnd.dividend.columnar``).
+
+Large grids (thousands of tickers x dozens of metrics) are sent as the
+arrays the batch formulas already produce instead of one JSON number at a
+time. A payload is::
+
+    b"DCOL" | u8 format version | 3 bytes padding | u32 schema length
+    schema: UTF-8 JSON, space-padded so the body starts 8-byte aligned
+    body:   column buffers, each starting 8-byte aligned
+
+and the schema is ``{"rows": n, "meta": {...}, "columns": [...]}`` where
+every column has a ``name``, a ``type`` and byte ranges into the body:
+
+* ``float64``: ``n`` little-endian doubles at ``offset``;
+* ``int32``: ``n`` little-endian int32s at ``offset``;
+* ``utf8``: ``n + 1`` int32 ``offsets`` into UTF-8 ``data`` (Arrow layout).
+
+Nullable columns carry a ``validity`` bitmap (bit ``i`` of byte ``i // 8``,
+least significant first, set when row ``i`` has a value), so NaN, None and
+infinities all arrive as nulls. Browsers map each buffer straight into a
+typed array without parsing.
+
+Column types are inferred from the values unless the caller pins them;
+an empty or all-null column has nothing to infer from, so callers pin
+text columns such as ``ticker``.
+"""
+
+import json
+import struct
+from typing import Any, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+MEDIA_TYPE = "application/vnd.dividend.columnar"
+MAGIC = b"DCOL"
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<4sB3xI")
+TYPES = ("float64", "int32", "utf8")
+
+Column = Union[np.ndarray, Sequence[Any]]
+
+
+def _pad(size: int) -> int:
+    return -size % 8
+
+
+class _Body:
+    def __init__(self):
+        self.parts: list[Union[bytes, memoryview]] = []
+        self.size = 0
+
+    def add(self, data: Union[bytes, np.ndarray]) -> int:
+        """Append a buffer (arrays are not copied until the final join)"""
+        if isinstance(data, np.ndarray):
+            data = memoryview(np.ascontiguousarray(data)).cast("B")
+        offset = self.size
+        self.parts.append(data)
+        self.size += len(data)
+        if _pad(self.size):
+            self.parts.append(b"\0" * _pad(self.size))
+            self.size += _pad(self.size)
+        return offset
+
+
+def _as_numeric(values: Column, rows: int) -> Optional[np.ndarray]:
+    """``<i4``/``<f8`` broadcast to ``rows``, or ``None`` for text columns"""
+    array = np.asarray(values)
+    if array.dtype.kind in "biu":
+        info = np.iinfo(np.int32)
+        if array.dtype.kind == "b" or (
+            array.size and info.min <= array.min() and array.max() <= info.max
+        ):
+            return np.broadcast_to(array.astype("<i4"), rows)
+        return np.broadcast_to(array.astype("<f8"), rows)
+    if array.dtype.kind == "f":
+        return np.broadcast_to(array.astype("<f8", copy=False), rows)
+    # Row-wise formula results come back as object arrays of floats/None
+    if array.dtype.kind == "O" and all(
+        v is None
+        or (isinstance(v, (int, float, np.number)) and not isinstance(v, bool))
+        for v in array.flat
+    ):
+        return np.broadcast_to(array.astype("<f8"), rows)
+    return None
+
+
+def _text(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def encode_columns(
+    columns: Mapping[str, Column],
+    rows: int,
+    meta: Optional[Mapping[str, Any]] = None,
+    types: Optional[Mapping[str, str]] = None,
+) -> bytes:
+    """
+    Encode equal-length columns; scalars and 0-d arrays are broadcast.
+    ``types`` pins the type of the named columns, the rest are inferred.
+    """
+    types = dict(types or {})
+    unknown = {t for t in types.values() if t not in TYPES}
+    if unknown:
+        raise ValueError(f"Unknown column types: {', '.join(sorted(unknown))}")
+    body = _Body()
+    schema: list[dict[str, Any]] = []
+    for name, values in columns.items():
+        kind = types.get(name)
+        numeric = None if kind == "utf8" else _as_numeric(values, rows)
+        if kind in ("float64", "int32"):
+            if numeric is None:
+                raise ValueError(f"Column {name!r} is not numeric")
+            if kind == "float64" or not numeric.size:
+                numeric = numeric.astype("<f8" if kind == "float64" else "<i4")
+            elif numeric.dtype != np.dtype("<i4"):
+                raise ValueError(f"Column {name!r} does not fit int32")
+        if numeric is not None and numeric.dtype == np.dtype("<i4"):
+            schema.append(
+                {
+                    "name": name,
+                    "type": "int32",
+                    "offset": body.add(numeric),
+                    "validity": None,
+                }
+            )
+            continue
+        if numeric is not None:
+            valid = np.isfinite(numeric)
+            if not valid.all():  # infinities become NaN, flagged null below
+                numeric = np.where(valid, numeric, np.nan)
+            column = {"name": name, "type": "float64", "offset": body.add(numeric)}
+        else:
+            if np.ndim(values) == 0:  # a str is a scalar here, not a sequence
+                values = [values.item() if isinstance(values, np.ndarray) else values]
+                values *= rows
+            if len(values) != rows:
+                raise ValueError(f"Column {name!r} has {len(values)} rows, not {rows}")
+            strings = [None if v is None else _text(v) for v in values]
+            valid = np.array([v is not None for v in strings], dtype=bool)
+            encoded = [(v or "").encode() for v in strings]
+            offsets = np.zeros(rows + 1, dtype="<i4")
+            np.cumsum([len(e) for e in encoded], out=offsets[1:])
+            column = {
+                "name": name,
+                "type": "utf8",
+                "offsets": body.add(offsets),
+                "data": body.add(b"".join(encoded)),
+            }
+        column["validity"] = (
+            None if valid.all() else body.add(np.packbits(valid, bitorder="little"))
+        )
+        schema.append(column)
+
+    header = json.dumps(
+        {"rows": rows, "meta": dict(meta or {}), "columns": schema},
+        separators=(",", ":"),
+    ).encode()
+    header += b" " * _pad(_PREAMBLE.size + len(header))
+    return b"".join(
+        [_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)), header, *body.parts]
+    )
+
+
+def decode_columns(payload: bytes) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Columns (float64 nulls as NaN, utf8 as lists) and meta of a payload"""
+    magic, version, header_size = _PREAMBLE.unpack_from(payload)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError("Not a columnar payload")
+    start = _PREAMBLE.size + header_size
+    schema = json.loads(payload[_PREAMBLE.size : start])
+    body = memoryview(payload)[start:]
+    rows = schema["rows"]
+    columns: dict[str, Any] = {}
+    for column in schema["columns"]:
+        valid = None
+        if column.get("validity") is not None:
+            bits = np.frombuffer(body, np.uint8, -(-rows // 8), column["validity"])
+            valid = np.unpackbits(bits, count=rows, bitorder="little").astype(bool)
+        if column["type"] == "utf8":
+            offsets = np.frombuffer(body, "<i4", rows + 1, column["offsets"])
+            data = bytes(body[column["data"] : column["data"] + int(offsets[-1])])
+            columns[column["name"]] = [
+                (
+                    None
+                    if valid is not None and not valid[i]
+                    else data[offsets[i] : offsets[i + 1]].decode()
+                )
+                for i in range(rows)
+            ]
+        else:
+            dtype = "<f8" if column["type"] == "float64" else "<i4"
+            columns[column["name"]] = np.frombuffer(body, dtype, rows, column["offset"])
+    return columns, schema["meta"]
@@ -0,0 +1,403 @@
+"""
+On-disk columnar store for fundamentals.
+
+Every field in ``FUNDAMENTAL_FIELDS`` lives in its own ``<field>.npy`` file
+holding a float64 ``tickers x periods`` matrix (NaN where nothing was
+reported), next to a small ``index.json`` with the ticker and period axes.
+Files are opened with ``mmap_mode="r"`` so opening the store is instant,
+slices are zero-copy views and every worker process shares the same pages
+through the OS page cache.
+
+The store has a single writer (the DB sync), enforced with an exclusive
+lock on ``writer.lock``: writes take it or raise, so concurrent writers can
+never re-lay each other's files. ``version`` lives in the index, and other
+processes call ``refresh()`` to pick up a newer one.
+
+Growing an axis re-lays every column under a new layout number
+(``<field>.<layout>.npy``) that the index switches to atomically. The
+previous layout's files are kept until the next re-lay, so a process still
+on the old index maps files that line up with it; one that is further
+behind finds its files gone and reloads the index.
+
+``materialized_version`` is the store version whose screener values the
+writer last committed to the DB (see ``mark_materialized``). It trails
+``version`` while materialization runs, so anything serving those values
+can tag them with it rather than with ``version``.
+"""
+
+import fcntl
+import json
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, Mapping, Optional, Sequence, Union
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from ..models.fundamentals import FUNDAMENTAL_FIELDS, Fundamental
+from .config import settings
+
+INDEX_FILE = "index.json"
+WRITER_LOCK_FILE = "writer.lock"
+
+PeriodLike = Union[date, str]
+
+
+def _period_key(period: PeriodLike) -> str:
+    return period.isoformat() if isinstance(period, date) else str(period)
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    # A unique temp name, so concurrent writers never share a partial file
+    with tempfile.NamedTemporaryFile(
+        "w", dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False
+    ) as tmp:
+        tmp.write(text)
+    os.replace(tmp.name, path)
+
+
+class FundamentalsStore:
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.version = 0
+        self.layout = 0
+        self.materialized_version: Optional[int] = None
+        self.synced_at: Optional[datetime] = None
+        self.fields: tuple[str, ...] = FUNDAMENTAL_FIELDS
+        self.tickers: list[str] = []
+        self.periods: list[str] = []
+        self._ticker_pos: dict[str, int] = {}
+        self._period_pos: dict[str, int] = {}
+        self._columns: dict[str, np.ndarray] = {}
+        self._lock_fd: Optional[int] = None
+        self._index_stamp: Optional[tuple[int, int]] = None
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> "FundamentalsStore":
+        """Open (or create) a store; only the index is read eagerly"""
+        store = cls(path)
+        store.path.mkdir(parents=True, exist_ok=True)
+        store._load_index()
+        return store
+
+    # Index handling
+    def _index_file_stamp(self) -> Optional[tuple[int, int]]:
+        try:
+            stat = (self.path / INDEX_FILE).stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_ino  # the index is replaced, never edited
+
+    def _load_index(self) -> None:
+        stamp = self._index_file_stamp()
+        if stamp is None:
+            return
+        index = json.loads((self.path / INDEX_FILE).read_text())
+        self._index_stamp = stamp
+        self.version = index["version"]
+        self.layout = index.get("layout", 0)
+        self.materialized_version = index.get("materialized_version")
+        self.synced_at = (
+            datetime.fromisoformat(index["synced_at"]) if index["synced_at"] else None
+        )
+        self.fields = tuple(index["fields"])
+        self.tickers = index["tickers"]
+        self.periods = index["periods"]
+        self._ticker_pos = {t: i for i, t in enumerate(self.tickers)}
+        self._period_pos = {p: i for i, p in enumerate(self.periods)}
+        self._columns.clear()
+
+    def _write_index(self) -> None:
+        index = {
+            "version": self.version,
+            "layout": self.layout,
+            "materialized_version": self.materialized_version,
+            "synced_at": self.synced_at.isoformat() if self.synced_at else None,
+            "fields": list(self.fields),
+            "tickers": self.tickers,
+            "periods": self.periods,
+        }
+        atomic_write_text(self.path / INDEX_FILE, json.dumps(index))
+
+    def refresh(self) -> bool:
+        """
+        Reload the index if another process published a newer version or
+        materialization; a single ``stat`` when the file has not been replaced
+        """
+        stamp = self._index_file_stamp()
+        if stamp is None or stamp == self._index_stamp:
+            return False
+        index = json.loads((self.path / INDEX_FILE).read_text())
+        if index["version"] == self.version:
+            self._index_stamp = stamp
+            self.materialized_version = index.get("materialized_version")
+            return False
+        self._load_index()
+        return True
+
+    def mark_materialized(self) -> None:
+        """Record that values derived from the current version are committed"""
+        self._require_writer()
+        self.materialized_version = self.version
+        self._write_index()
+
+    # Writer lock
+    @property
+    def is_writer(self) -> bool:
+        return self._lock_fd is not None
+
+    def acquire_writer(self) -> bool:
+        """Become the single writer if nobody else is; cheap to retry"""
+        if self._lock_fd is not None:
+            return True
+        fd = os.open(self.path / WRITER_LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        # Carry on from whatever the previous writer left on disk
+        self._load_index()
+        return True
+
+    def _require_writer(self) -> None:
+        if not self.acquire_writer():
+            raise RuntimeError("Another process is writing the fundamentals store")
+
+    def close(self) -> None:
+        """Give up the writer lock, if held"""
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def _column_path(self, field: str, layout: Optional[int] = None) -> Path:
+        layout = self.layout if layout is None else layout
+        return self.path / (f"{field}.npy" if layout == 0 else f"{field}.{layout}.npy")
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.tickers), len(self.periods)
+
+    def ticker_index(self, ticker: str) -> int:
+        return self._ticker_pos[ticker]
+
+    def period_index(self, period: PeriodLike) -> int:
+        return self._period_pos[_period_key(period)]
+
+    # Reads
+    def column(self, field: str) -> np.ndarray:
+        """Read-only memory-mapped ``tickers x periods`` matrix for ``field``"""
+        if field not in self.fields:
+            raise KeyError(f"Unknown fundamentals field: {field}")
+        if field not in self._columns:
+            try:
+                column = np.load(self._column_path(field), mmap_mode="r")
+            except FileNotFoundError:
+                if self.refresh():  # our layout was retired; catch up first
+                    return self.column(field)
+                return np.full(self.shape, np.nan)
+            if column.shape != self.shape:
+                raise RuntimeError(f"{field} column does not match the store index")
+            self._columns[field] = column
+        return self._columns[field]
+
+    def get(
+        self,
+        field: str,
+        tickers: Optional[Sequence[str]] = None,
+        start: Optional[PeriodLike] = None,
+        end: Optional[PeriodLike] = None,
+    ) -> np.ndarray:
+        """
+        Slice a field by tickers and an inclusive period range.
+
+        Period ranges and ``tickers=None`` are views into the mapped file;
+        an explicit ticker list uses fancy indexing and therefore copies.
+        """
+        column = self.column(field)
+        lo = self.period_index(start) if start is not None else 0
+        hi = self.period_index(end) + 1 if end is not None else len(self.periods)
+        column = column[:, lo:hi]
+        if tickers is None:
+            return column
+        return column[[self._ticker_pos[t] for t in tickers]]
+
+    def series(self, field: str, ticker: str) -> np.ndarray:
+        """Zero-copy period series of ``field`` for one ticker"""
+        return self.column(field)[self._ticker_pos[ticker]]
+
+    def latest(self, field: str) -> np.ndarray:
+        """Most recent non-NaN value of ``field`` per ticker (NaN if none)"""
+        column = np.asarray(self.column(field))
+        if column.shape[1] == 0:
+            return np.full(len(self.tickers), np.nan)
+        valid = ~np.isnan(column)
+        last = column.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+        values = column[np.arange(column.shape[0]), last]
+        return np.where(valid.any(axis=1), values, np.nan)
+
+    def latest_row(
+        self, ticker: str, fields: Optional[Iterable[str]] = None
+    ) -> dict[str, float]:
+        """Most recent non-NaN value of each field for one ticker"""
+        row = self._ticker_pos[ticker]
+        values = {}
+        for field in self.fields if fields is None else fields:
+            series = self.column(field)[row]
+            valid = np.flatnonzero(~np.isnan(series))
+            values[field] = float(series[valid[-1]]) if valid.size else float("nan")
+        return values
+
+    # Writes
+    def _grow(self, new_tickers: list[str], new_periods: list[str]) -> None:
+        """
+        Re-lay every column for a larger ticker/period axis under the next
+        layout number; the caller's ``_write_index`` switches readers to it
+        """
+        tickers = self.tickers + new_tickers
+        periods = sorted(set(self.periods) | set(new_periods))
+        period_pos = {p: i for i, p in enumerate(periods)}
+        old_rows = np.arange(len(self.tickers))
+        old_cols = np.array([period_pos[p] for p in self.periods], dtype=np.intp)
+
+        layout = self.layout + 1
+        for field in self.fields:
+            column_path = self._column_path(field)
+            tmp_path = self.path / f"{field}.{layout}.npy.tmp"
+            grown = np.lib.format.open_memmap(
+                tmp_path,
+                mode="w+",
+                dtype=np.float64,
+                shape=(len(tickers), len(periods)),
+            )
+            grown[:] = np.nan
+            if column_path.exists() and self.tickers and self.periods:
+                grown[np.ix_(old_rows, old_cols)] = np.load(column_path, mmap_mode="r")
+            grown.flush()
+            del grown
+            os.replace(tmp_path, self._column_path(field, layout))
+            if layout >= 2:  # the layout before the one readers may still use
+                self._column_path(field, layout - 2).unlink(missing_ok=True)
+
+        self.layout = layout
+        self.tickers = tickers
+        self.periods = periods
+        self._ticker_pos = {t: i for i, t in enumerate(tickers)}
+        self._period_pos = period_pos
+        self._columns.clear()
+
+    def upsert(self, rows: Iterable[Mapping[str, Any]]) -> dict[str, set[str]]:
+        """
+        Write fundamentals rows (``ticker``, ``period_end`` and field values)
+        in place, growing the axes first if new tickers or periods appear.
+
+        Returns the fields whose stored value actually changed, per ticker.
+        """
+        rows = list(rows)
+        if not rows:
+            return {}
+        return self.upsert_columns(
+            [r["ticker"] for r in rows],
+            [r["period_end"] for r in rows],
+            {
+                field: np.array(
+                    [np.nan if r.get(field) is None else r[field] for r in rows],
+                    dtype=np.float64,
+                )
+                for field in self.fields
+            },
+        )
+
+    def upsert_columns(
+        self,
+        tickers: Sequence[str],
+        periods: Sequence[PeriodLike],
+        values: Mapping[str, np.ndarray],
+    ) -> dict[str, set[str]]:
+        """
+        Column-wise ``upsert``: row ``i`` is ``tickers[i]``, ``periods[i]``
+        and ``values[field][i]`` (NaN = not reported). Fields missing from
+        ``values`` are written as not reported, like missing row keys.
+        """
+        if not len(tickers):
+            return {}
+        self._require_writer()
+        period_keys = [_period_key(p) for p in periods]
+
+        new_tickers = list(
+            dict.fromkeys(t for t in tickers if t not in self._ticker_pos)
+        )
+        new_periods = {p for p in period_keys if p not in self._period_pos}
+        grown = bool(new_tickers or new_periods)
+        if grown:
+            self._grow(new_tickers, list(new_periods))
+
+        row_idx = np.array([self._ticker_pos[t] for t in tickers], dtype=np.intp)
+        col_idx = np.array([self._period_pos[p] for p in period_keys], dtype=np.intp)
+        tickers = np.array(tickers, dtype=object)
+        missing = np.full(len(tickers), np.nan)
+
+        changes: dict[str, set[str]] = {}
+        for field in self.fields:
+            new = np.asarray(values.get(field, missing), dtype=np.float64)
+            column = np.load(self._column_path(field), mmap_mode="r+")
+            old = column[row_idx, col_idx]
+            changed = ~((old == new) | (np.isnan(old) & np.isnan(new)))
+            if changed.any():
+                column[row_idx, col_idx] = new
+                column.flush()
+                for ticker in tickers[changed]:
+                    changes.setdefault(ticker, set()).add(field)
+            del column
+
+        self._columns.clear()
+        if changes or grown:
+            self.version += 1
+            self._write_index()
+        return changes
+
+    async def sync_from_db(
+        self,
+        session: AsyncSession,
+        batch_size: int = 5000,
+        changes: Optional[dict[str, set[str]]] = None,
+    ) -> dict[str, set[str]]:
+        """
+        Apply rows updated since the last sync; returns changed fields.
+        Pass ``changes`` to collect them as each batch lands, so they
+        survive a later batch failing after the watermark moved.
+
+        Writers stamp ``updated_at`` before they commit, so a row can land
+        with a stamp older than the watermark; the last
+        ``FUNDAMENTALS_SYNC_OVERLAP_SECONDS`` are re-read to catch it.
+        Re-applied rows change nothing and do not bump the version.
+        """
+        self._require_writer()
+        stmt = select(Fundamental).order_by(Fundamental.updated_at)
+        if self.synced_at is not None:
+            overlap = timedelta(seconds=settings.FUNDAMENTALS_SYNC_OVERLAP_SECONDS)
+            stmt = stmt.where(Fundamental.updated_at > self.synced_at - overlap)
+
+        changes = {} if changes is None else changes
+        result = await session.stream_scalars(
+            stmt.execution_options(yield_per=batch_size)
+        )
+        async for partition in result.partitions():
+            batch = [row.model_dump() for row in partition]
+            for ticker, fields in self.upsert(batch).items():
+                changes.setdefault(ticker, set()).update(fields)
+            latest = max(row["updated_at"] for row in batch)
+            self.synced_at = max(latest, self.synced_at or latest)
+            self._write_index()
+        return changes
+
+
+@lru_cache()
+def get_fundamentals_store() -> FundamentalsStore:
+    """Process-wide store instance opened from ``COLUMNAR_STORE_PATH``"""
+    return FundamentalsStore.open(settings.COLUMNAR_STORE_PATH)
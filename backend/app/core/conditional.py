@@ -0,0 +1,185 @@
+"""
+Conditional GETs and pre-compressed bodies for versioned responses.
+
+A response's ETag hashes the request path and query together with the
+versions of every dataset it reads (fundamentals store, market assumptions,
+corporate actions...). The ETag changes exactly when the response could,
+so:
+
+* a request whose ``If-None-Match`` already holds the ETag gets a 304
+  before the handler computes anything;
+* the serialized body (and its gzip form, compressed once on first demand)
+  is cached per ETag, so repeat requests from other clients cost a dict
+  lookup until one of the versions moves on.
+
+Handlers can offer other representations (``encoders`` by media type),
+picked from the ``Accept`` header; each gets its own ETag and cached body.
+ETags are weak because the gzip and identity bodies are equivalent but not
+byte-identical.
+"""
+
+import gzip
+import hashlib
+import inspect
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Mapping, Optional, Sequence
+
+import orjson
+from fastapi import Request, Response
+
+from .config import settings
+
+CACHE_CONTROL = "private, no-cache"  # always revalidate, never in shared caches
+JSON = "application/json"
+
+Encoder = Callable[[Any], bytes]
+
+
+def make_etag(*parts: Any) -> str:
+    payload = orjson.dumps(parts, option=orjson.OPT_SERIALIZE_NUMPY)
+    return f'W/"{hashlib.sha1(payload).hexdigest()[:20]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison against an ``If-None-Match`` header value"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(",")
+    )
+
+
+def _acceptable(header: Optional[str]) -> dict[str, bool]:
+    """Names in an ``Accept``/``Accept-Encoding`` header -> not ``q=0``"""
+    acceptable = {}
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        q = params.replace(" ", "")
+        acceptable[name.strip().lower()] = q not in ("q=0", "q=0.0", "q=0.00")
+    return acceptable
+
+
+def accepted_media_type(accept: Optional[str], offered: Sequence[str]) -> str:
+    """First of ``offered`` that ``Accept`` names explicitly, else JSON"""
+    acceptable = _acceptable(accept)
+    return next((m for m in offered if acceptable.get(m)), JSON)
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    acceptable = _acceptable(accept_encoding)
+    return acceptable.get("gzip", acceptable.get("*", False))
+
+
+def json_bytes(content: Any) -> bytes:
+    return orjson.dumps(
+        content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    )
+
+
+@dataclass
+class CachedBody:
+    body: bytes
+    gzipped: Optional[bytes] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + len(self.gzipped or b"")
+
+
+class ResponseCache:
+    """Serialized bodies by ETag, LRU-evicted beyond ``max_bytes``"""
+
+    def __init__(self, max_bytes: int = 64 * 2**20, gzip_min_bytes: int = 1024):
+        self.max_bytes = max_bytes
+        self.gzip_min_bytes = gzip_min_bytes
+        self._entries: OrderedDict[str, CachedBody] = OrderedDict()
+        self._bytes = 0
+
+    def get(self, etag: str) -> Optional[CachedBody]:
+        entry = self._entries.get(etag)
+        if entry is not None:
+            self._entries.move_to_end(etag)
+        return entry
+
+    def _store(self, etag: str, entry: CachedBody, previous: int = 0) -> None:
+        self._entries[etag] = entry
+        self._entries.move_to_end(etag)
+        self._bytes += entry.size - previous
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+
+    def put(self, etag: str, body: bytes) -> CachedBody:
+        entry = CachedBody(body)
+        self._store(etag, entry)
+        return entry
+
+    def compressed(self, etag: str, entry: CachedBody) -> Optional[bytes]:
+        """The gzip body, compressed the first time it is asked for"""
+        if len(entry.body) < self.gzip_min_bytes:
+            return None
+        if entry.gzipped is None:
+            previous = entry.size
+            entry.gzipped = gzip.compress(entry.body, compresslevel=6, mtime=0)
+            if etag in self._entries:
+                self._store(etag, entry, previous)
+        return entry.gzipped
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+
+@lru_cache()
+def get_response_cache() -> ResponseCache:
+    return ResponseCache(
+        settings.RESPONSE_CACHE_MAX_BYTES, settings.RESPONSE_GZIP_MIN_BYTES
+    )
+
+
+async def versioned_response(
+    request: Request,
+    versions: Any,
+    build: Callable[[], Any],
+    encoders: Optional[Mapping[str, Encoder]] = None,
+) -> Response:
+    """
+    Response for ``build()`` tagged with ``versions`` and the query, encoded
+    as JSON or one of ``encoders`` (media type -> encoder; a ``JSON`` entry
+    replaces the default). ``build`` (sync or async) only runs when neither
+    the client nor the cache holds the current version; exceptions it
+    raises are not cached.
+    """
+    encoders = encoders or {}
+    media_type = accepted_media_type(
+        request.headers.get("accept"), [m for m in encoders if m != JSON]
+    )
+    etag = make_etag(request.url.path, request.url.query, versions, media_type)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": CACHE_CONTROL,
+        "Vary": "Accept, Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    cache = get_response_cache()
+    entry = cache.get(etag)
+    if entry is None:
+        content = build()
+        if inspect.isawaitable(content):
+            content = await content
+        entry = cache.put(etag, encoders.get(media_type, json_bytes)(content))
+
+    body = entry.body
+    if accepts_gzip(request.headers.get("accept-encoding")):
+        gzipped = cache.compressed(etag, entry)
+        if gzipped is not None:
+            body = gzipped
+            headers["Content-Encoding"] = "gzip"
+    return Response(body, media_type=media_type, headers=headers)
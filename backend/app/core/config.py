@@ -1,7 +1,7 @@
 import secrets
 from typing import Any, Dict, List, Optional, Union
 from functools import lru_cache
-from pydantic import AnyHttpUrl, Field, PostgresDsn, field_validator
+from pydantic import AnyHttpUrl, Field, PostgresDsn, ValidationInfo, field_validator
 from pydantic_settings import BaseSettings
 
 
@@ -19,23 +19,28 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
 
     # Database
-    DATABASE_URL: Optional[str] = Field(None, env="DATABASE_URL")
-    POSTGRES_SERVER: str = Field(default="localhost", env="POSTGRES_SERVER")
-    POSTGRES_USER: str = Field(default="postgres", env="POSTGRES_USER")
-    POSTGRES_PASSWORD: str = Field(default="", env="POSTGRES_PASSWORD")
-    POSTGRES_DB: str = Field(default="dividend_db", env="POSTGRES_DB")
+    POSTGRES_SERVER: str = Field(default="localhost")
+    POSTGRES_USER: str = Field(default="postgres")
+    POSTGRES_PASSWORD: str = Field(default="")
+    POSTGRES_DB: str = Field(default="dividend_db")
+    # Declared after the POSTGRES_* fields so the validator can read them
+    DATABASE_URL: Optional[str] = Field(default=None, validate_default=True)
 
     # Build DATABASE_URL if not provided
-    @field_validator("DATABASE_URL", pre=True)
-    def assemble_db_connection(self, v: Optional[str], values: Dict[str, Any]) -> Any:
+    @field_validator("DATABASE_URL", mode="before")
+    @classmethod
+    def assemble_db_connection(cls, v: Optional[str], info: ValidationInfo) -> Any:
         if isinstance(v, str):
             return v
-        return PostgresDsn.build(
-            scheme="postgresql",
-            username=values.get("POSTGRES_USER"),
-            password=values.get("POSTGRES_PASSWORD"),
-            host=values.get("POSTGRES_SERVER"),
-            path=f"/{values.get('POSTGRES_DB') or ''}",
+        values: Dict[str, Any] = info.data
+        return str(
+            PostgresDsn.build(
+                scheme="postgresql",
+                username=values.get("POSTGRES_USER"),
+                password=values.get("POSTGRES_PASSWORD"),
+                host=values.get("POSTGRES_SERVER"),
+                path=values.get("POSTGRES_DB") or "",
+            )
         )
 
     # CORS
@@ -45,8 +50,9 @@ def assemble_db_connection(self, v: Optional[str], values: Dict[str, Any]) -> An
         "http://localhost:8000",
     ]
 
-    @field_validator("BACKEND_CORS_ORIGINS", pre=True)
-    def assemble_cors_origins(self, v: Union[str, List[str]]) -> Union[List[str], str]:
+    @field_validator("BACKEND_CORS_ORIGINS", mode="before")
+    @classmethod
+    def assemble_cors_origins(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
         if isinstance(v, str) and not v.startswith("["):
             return [i.strip() for i in v.split(",")]
         elif isinstance(v, (list, str)):
@@ -68,6 +74,15 @@ def assemble_cors_origins(self, v: Union[str, List[str]]) -> Union[List[str], st
     EMAILS_FROM_EMAIL: Optional[str] = None
     EMAILS_FROM_NAME: Optional[str] = None
 
+    # Dividend alerts
+    ALERT_LOOKAHEAD_DAYS: int = 7
+    ALERT_SMTP_POOL_SIZE: int = 8  # pooled SMTP sessions == concurrent senders
+    ALERT_QUEUE_SIZE: int = 1000  # pending emails before producers wait
+
+    # Dividend events and corporate actions, synced into memory
+    DIVIDEND_SYNC_OVERLAP_SECONDS: int = 120  # re-read window for late commits
+    CORPORATE_ACTIONS_SYNC_OVERLAP_SECONDS: int = 120  # same, for splits/spin-offs
+
     # Redis (for caching stock prices)
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
@@ -84,12 +99,61 @@ def assemble_cors_origins(self, v: Union[str, List[str]]) -> Union[List[str], st
 
     # Features
     ENABLE_CACHE: bool = True
-    CACHE_TTL: int = 300  # 5 minutes
+    CACHE_TTL: int = 300  # 5 minutes, while the market is open
+    CACHE_MAX_ENTRIES: int = 10_000
+    CACHE_CLOSE_GRACE_MINUTES: int = 15  # keep CACHE_TTL for closing prints
+    CACHE_WARMUP_LEAD_MINUTES: int = 5  # warm this long before the open
+    CACHE_WARMUP_TOP_N: int = 200  # most-requested tickers to warm
 
     # Cache configuration
     CACHE_PROVIDER: str = "dynamodb"  # or "redis" or "memory"
     CACHE_TTL_SECONDS: int = 300  # 5 minutes
 
+    # Live yield feed (WebSocket)
+    LIVE_YIELD_INTERVAL_SECONDS: float = 1.0  # tick coalescing window
+    LIVE_SEND_TIMEOUT_SECONDS: float = 5.0  # slower clients are disconnected
+    LIVE_TICKS_PATH: str = "data/live_ticks.sqlite3"  # ticks shared by workers
+    LIVE_TICK_RETENTION_SECONDS: float = 60.0  # older ticks are dropped
+
+    # Columnar fundamentals store (memory-mapped .npy files)
+    COLUMNAR_STORE_PATH: str = "data/fundamentals"
+    FUNDAMENTALS_SYNC_SECONDS: int = 60  # DB -> store sync interval
+    FUNDAMENTALS_SYNC_OVERLAP_SECONDS: int = 120  # re-read window for late commits
+
+    # Conditional GETs: bodies cached per ETag (dataset versions + query)
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 2**20
+    RESPONSE_GZIP_MIN_BYTES: int = 1024  # smaller bodies are sent as-is
+
+    # Opt-in request profiling (X-Profile: 1)
+    PROFILE_INTERVAL_MS: float = 1.0  # sampling interval
+    PROFILE_PATH: str = "data/profiles"  # shared by every worker
+    PROFILE_KEEP: int = 50  # most recent profiles kept on disk
+    FORMULA_STATS_PATH: str = "data/formula_stats"  # counters, a file per process
+    FORMULA_STATS_FLUSH_SECONDS: float = 5.0  # how stale other workers' counts get
+
+    # Universe snapshot shared between workers (multiprocessing.shared_memory)
+    SHARED_SNAPSHOT_PATH: str = "data/snapshot"  # manifest and publisher lock
+    SHARED_SNAPSHOT_PREFIX: str = "dia"  # segment name prefix
+
+    # Versioned market-assumption snapshots (rf curve, ERP, tax defaults)
+    MARKET_ASSUMPTIONS_PATH: str = "data/market_assumptions"
+
+    # Shrunk covariance matrices (memory-mapped, per universe/window/date)
+    COVARIANCE_CACHE_PATH: str = "data/covariance"
+    COVARIANCE_CHUNK_SIZE: int = 512  # tickers per block
+    COVARIANCE_MAX_OPEN: int = 4  # matrices kept mapped
+    COVARIANCE_MAX_FILES: int = 16  # matrices kept on disk, least recently used go
+    COVARIANCE_WINDOW: int = 20  # return periods
+
+    # Background jobs (SQLite-backed queue, process-pool workers)
+    JOBS_DB_PATH: str = "data/jobs.sqlite3"
+    JOBS_MAX_WORKERS: int = 2
+    JOBS_RESULT_TTL_SECONDS: int = 3600
+
+    # Valuation sensitivity grids
+    VALUATION_GRID_CACHE_MAX_BYTES: int = 32 * 2**20  # cached r x g grids
+    VALUATION_GRID_MAX_STEPS: int = 500  # per axis
+
     # DynamoDB
     DYNAMODB_TABLE: str = "dividend-cache"
     AWS_REGION: str = "us-east-1"
@@ -0,0 +1,455 @@
+"""
+Background jobs for CPU-heavy analyses.
+
+Jobs are persisted in a local SQLite file (no external broker) and run in a
+``ProcessPoolExecutor`` so they never block the event loop. Identical
+submissions (same kind and params) that are still queued or running share
+one job. Handlers are plain top-level functions ``handler(params, progress)``;
+calling ``progress(fraction)`` records progress and is also where a
+requested cancellation takes effect. Results are kept for
+``JOBS_RESULT_TTL_SECONDS``.
+
+Jobs still marked running by a process that no longer exists (a restart or
+crash) are put back on the queue when the next manager starts. The manager
+talks to SQLite from worker threads; a failed dispatch pass is logged and
+retried at the next poll, a job outcome that could not be recorded is
+retried until it is, and a pool broken by a dying worker is replaced.
+Pool processes flush their formula counters after each job when given a
+``formula_stats_path``, so the admin stats include them.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager, suppress
+from dataclasses import dataclass
+from functools import lru_cache
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable, Iterator, Mapping, Optional
+
+import orjson
+
+from .profiling import FormulaStatsStore
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[dict[str, Any], Callable[..., None]], Any]
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+IN_FLIGHT = (QUEUED, RUNNING)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params BLOB NOT NULL,
+    dedupe_key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result BLOB,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    owner_pid INTEGER,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_dedupe ON jobs (dedupe_key, status);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+"""
+
+
+class JobCancelled(Exception):
+    pass
+
+
+@dataclass
+class JobRecord:
+    id: str
+    kind: str
+    status: str
+    progress: float
+    message: Optional[str]
+    error: Optional[str]
+    created_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+    expires_at: Optional[float]
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(self.__dict__)
+
+
+def dedupe_key(kind: str, params: Mapping[str, Any]) -> str:
+    payload = orjson.dumps([kind, params], option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """SQLite-backed job table; safe to use from several processes"""
+
+    _RECORD_COLUMNS = (
+        "id, kind, status, progress, message, error, "
+        "created_at, started_at, finished_at, expires_at"
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT {self._RECORD_COLUMNS} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return JobRecord(*row) if row else None
+
+    def create(self, kind: str, params: Mapping[str, Any]) -> tuple[JobRecord, bool]:
+        """Insert a queued job unless an identical one is in flight"""
+        key = dedupe_key(kind, params)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            existing = conn.execute(
+                "SELECT id FROM jobs WHERE dedupe_key = ? AND status IN (?, ?)",
+                (key, *IN_FLIGHT),
+            ).fetchone()
+            if existing:
+                conn.execute("COMMIT")
+                return self.get(existing[0]), True
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, kind, params, dedupe_key, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, orjson.dumps(params), key, QUEUED, time.time()),
+            )
+            conn.execute("COMMIT")
+        return self.get(job_id), False
+
+    def claim_queued(self, limit: int) -> list[tuple[str, str, dict[str, Any]]]:
+        """Atomically move up to ``limit`` queued jobs to running for this process"""
+        if limit <= 0:
+            return []
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, kind, params FROM jobs WHERE status = ? "
+                "ORDER BY created_at LIMIT ?",
+                (QUEUED, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET status = ?, owner_pid = ?, started_at = ? WHERE id = ?",
+                [(RUNNING, os.getpid(), time.time(), row[0]) for row in rows],
+            )
+            conn.execute("COMMIT")
+        return [(job_id, kind, orjson.loads(params)) for job_id, kind, params in rows]
+
+    def requeue_orphans(self) -> int:
+        """Put running jobs whose owning process is gone back on the queue"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, owner_pid FROM jobs WHERE status = ?", (RUNNING,)
+            ).fetchall()
+            # Our own pid can only be a stale record (pids get reused in containers)
+            orphans = [
+                (QUEUED, job_id)
+                for job_id, pid in rows
+                if pid == os.getpid() or not _pid_alive(pid)
+            ]
+            conn.executemany(
+                "UPDATE jobs SET status = ?, owner_pid = NULL, progress = 0 "
+                "WHERE id = ?",
+                orphans,
+            )
+        return len(orphans)
+
+    def set_progress(
+        self, job_id: str, fraction: float, message: Optional[str]
+    ) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET progress = ?, message = COALESCE(?, message) "
+                "WHERE id = ?",
+                (min(max(fraction, 0.0), 1.0), message, job_id),
+            )
+
+    def cancel_requested(self, job_id: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return bool(row and row[0])
+
+    def request_cancel(self, job_id: str, ttl: int) -> Optional[JobRecord]:
+        """Queued jobs are cancelled at once; running ones at their next progress()"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, expires_at = ? "
+                "WHERE id = ? AND status = ?",
+                (CANCELLED, now, now + ttl, job_id, QUEUED),
+            )
+            conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?",
+                (job_id, RUNNING),
+            )
+        return self.get(job_id)
+
+    def finish(
+        self,
+        job_id: str,
+        status: str,
+        ttl: int,
+        result: Any = None,
+        error: Optional[str] = None,
+    ) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, "
+                "progress = COALESCE(?, progress), "
+                "finished_at = ?, expires_at = ? WHERE id = ?",
+                (
+                    status,
+                    (
+                        orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY)
+                        if status == SUCCEEDED
+                        else None
+                    ),
+                    error,
+                    1.0 if status == SUCCEEDED else None,
+                    now,
+                    now + ttl,
+                    job_id,
+                ),
+            )
+
+    def result(self, job_id: str) -> Any:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT result FROM jobs WHERE id = ? AND status = ? AND expires_at > ?",
+                (job_id, SUCCEEDED, time.time()),
+            ).fetchone()
+        if row is None:
+            raise KeyError(job_id)
+        return orjson.loads(row[0])
+
+    def purge_expired(self) -> int:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (time.time(),),
+            )
+        return cursor.rowcount
+
+
+class _Progress:
+    """Progress callback handed to handlers inside the worker process"""
+
+    def __init__(self, store: JobStore, job_id: str, min_interval: float = 0.25):
+        self.store = store
+        self.job_id = job_id
+        self.min_interval = min_interval
+        self._last = 0.0
+
+    def __call__(self, fraction: float, message: Optional[str] = None) -> None:
+        now = time.monotonic()
+        if now - self._last < self.min_interval and fraction < 1.0:
+            return
+        self._last = now
+        self.store.set_progress(self.job_id, fraction, message)
+        if self.store.cancel_requested(self.job_id):
+            raise JobCancelled(self.job_id)
+
+
+@lru_cache()
+def _formula_stats(path: str) -> FormulaStatsStore:
+    return FormulaStatsStore(path)  # one per pool process
+
+
+def _run_job(
+    db_path: str,
+    job_id: str,
+    handler: JobHandler,
+    params: dict,
+    formula_stats_path: Optional[str] = None,
+) -> Any:
+    try:
+        return handler(params, _Progress(JobStore(db_path), job_id))
+    finally:
+        if formula_stats_path is not None:
+            _formula_stats(formula_stats_path).flush()
+
+
+class JobManager:
+    def __init__(
+        self,
+        store: JobStore,
+        handlers: Mapping[str, JobHandler],
+        max_workers: int = 2,
+        result_ttl: int = 3600,
+        poll_interval: float = 1.0,
+        formula_stats_path: Optional[str] = None,
+    ):
+        self.store = store
+        self.handlers = dict(handlers)
+        self.max_workers = max_workers
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.formula_stats_path = formula_stats_path
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._running: set[asyncio.Task] = set()
+        # job id -> (status, result, error) still to be written to the store
+        self._unrecorded: dict[str, tuple[str, Any, Optional[str]]] = {}
+        self._wakeup = asyncio.Event()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers, mp_context=get_context("spawn")
+        )
+
+    async def start(self) -> None:
+        requeued = await asyncio.to_thread(self.store.requeue_orphans)
+        if requeued:
+            print(f"Requeued {requeued} interrupted jobs")
+        self._executor = self._new_executor()
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    async def stop(self) -> None:
+        tasks = [*self._running, *([self._dispatcher] if self._dispatcher else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._executor:
+            # Running jobs stay "running" under this pid and are requeued on restart
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def submit(
+        self, kind: str, params: Mapping[str, Any]
+    ) -> tuple[JobRecord, bool]:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        record, deduplicated = await asyncio.to_thread(self.store.create, kind, params)
+        self._wakeup.set()
+        return record, deduplicated
+
+    async def status(self, job_id: str) -> Optional[JobRecord]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def result(self, job_id: str) -> Any:
+        return await asyncio.to_thread(self.store.result, job_id)
+
+    async def cancel(self, job_id: str) -> Optional[JobRecord]:
+        return await asyncio.to_thread(
+            self.store.request_cancel, job_id, self.result_ttl
+        )
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            try:
+                for job_id, outcome in list(self._unrecorded.items()):
+                    await asyncio.to_thread(
+                        self.store.finish,
+                        job_id,
+                        outcome[0],
+                        self.result_ttl,
+                        *outcome[1:],
+                    )
+                    del self._unrecorded[job_id]
+                await asyncio.to_thread(self.store.purge_expired)
+                free = self.max_workers - len(self._running)
+                claimed = await asyncio.to_thread(self.store.claim_queued, free)
+                for job_id, kind, params in claimed:
+                    task = asyncio.create_task(self._execute(job_id, kind, params))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+            except Exception:
+                logger.exception("Job dispatch failed; retrying next poll")
+            # Poll as well, so jobs queued by other processes get picked up
+            with suppress(TimeoutError):
+                async with asyncio.timeout(self.poll_interval):
+                    await self._wakeup.wait()
+            self._wakeup.clear()
+
+    async def _finish(
+        self,
+        job_id: str,
+        status: str,
+        result: Any = None,
+        error: Optional[str] = None,
+    ) -> None:
+        try:
+            await asyncio.to_thread(
+                self.store.finish, job_id, status, self.result_ttl, result, error
+            )
+        except sqlite3.Error:
+            # Left as running under our live pid it would never be requeued
+            logger.exception("Recording job %s as %s failed; retrying", job_id, status)
+            self._unrecorded[job_id] = (status, result, error)
+        except Exception as e:  # e.g. a result that cannot be serialized
+            await self._finish(job_id, FAILED, error=f"{type(e).__name__}: {e}")
+
+    async def _execute(self, job_id: str, kind: str, params: dict) -> None:
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        try:
+            result = await loop.run_in_executor(
+                executor,
+                _run_job,
+                self.store.path,
+                job_id,
+                self.handlers[kind],
+                params,
+                self.formula_stats_path,
+            )
+            await self._finish(job_id, SUCCEEDED, result=result)
+        except JobCancelled:
+            await self._finish(job_id, CANCELLED)
+        except asyncio.CancelledError:
+            raise
+        except BrokenProcessPool as e:
+            # A worker died (OOM, segfault...); later jobs need a working pool
+            if self._executor is executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._new_executor()
+            await self._finish(job_id, FAILED, error=f"{type(e).__name__}: {e}")
+        except Exception as e:
+            await self._finish(job_id, FAILED, error=f"{type(e).__name__}: {e}")
+        finally:
+            self._wakeup.set()
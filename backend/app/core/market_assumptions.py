@@ -0,0 +1,201 @@
+"""
+Versioned market-assumption snapshots.
+
+A snapshot holds the risk-free yield curve, the equity risk premium and the
+default corporate tax rate. Snapshots are immutable: publishing writes a
+new ``v<version>.json`` and then atomically repoints ``current.json`` at it,
+so readers in any process see either the old or the new snapshot, never a
+mix. Every cache keyed on a snapshot's ``version`` stays valid until the
+next publish. Publishers in different processes take turns on an
+``flock``, so two of them never claim the same version.
+
+Before anything has been published, version 0 reproduces the constants in
+``formulas/risk_adjusted_return_metrics.py``.
+"""
+
+import fcntl
+import json
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+from formulas.risk_adjusted_return_metrics import (
+    expected_market_return,
+    risk_free_rate,
+)
+
+from .columnar_store import atomic_write_text
+from .config import settings
+
+CURRENT_FILE = "current.json"
+PUBLISH_LOCK_FILE = "publish.lock"
+BENCHMARK_TENOR = 10.0  # years; the curve point used as "the" risk-free rate
+
+
+@dataclass(frozen=True)
+class MarketAssumptions:
+    version: int
+    published_at: Optional[datetime]
+    tenors: tuple[float, ...]  # years, ascending
+    yields: tuple[float, ...]  # decimal yields at ``tenors``
+    equity_risk_premium: float
+    default_tax_rate: float = 0.21
+
+    def __post_init__(self):
+        if len(self.tenors) != len(self.yields) or not self.tenors:
+            raise ValueError("Yield curve needs one yield per tenor")
+        if list(self.tenors) != sorted(self.tenors):
+            raise ValueError("Yield curve tenors must be ascending")
+
+    def risk_free_rate(self, tenor: float = BENCHMARK_TENOR) -> float:
+        """Curve yield at ``tenor``, linearly interpolated and flat outside"""
+        return float(np.interp(tenor, self.tenors, self.yields))
+
+    @property
+    def expected_market_return(self) -> float:
+        return self.risk_free_rate() + self.equity_risk_premium
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["published_at"] = (
+            self.published_at.isoformat() if self.published_at else None
+        )
+        data["risk_free_rate"] = self.risk_free_rate()
+        data["expected_market_return"] = self.expected_market_return
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MarketAssumptions":
+        return cls(
+            version=data["version"],
+            published_at=(
+                datetime.fromisoformat(data["published_at"])
+                if data["published_at"]
+                else None
+            ),
+            tenors=tuple(data["tenors"]),
+            yields=tuple(data["yields"]),
+            equity_risk_premium=data["equity_risk_premium"],
+            default_tax_rate=data["default_tax_rate"],
+        )
+
+
+DEFAULT_ASSUMPTIONS = MarketAssumptions(
+    version=0,
+    published_at=None,
+    tenors=(BENCHMARK_TENOR,),
+    yields=(risk_free_rate,),
+    equity_risk_premium=expected_market_return - risk_free_rate,
+)
+
+
+class MarketAssumptionsStore:
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._stamp: Optional[tuple[int, int]] = None
+        self._snapshots: dict[int, MarketAssumptions] = {}  # immutable once written
+        self._current = self._read_current()
+
+    def _current_file_stamp(self) -> Optional[tuple[int, int]]:
+        try:
+            stat = (self.path / CURRENT_FILE).stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_ino  # repointed by replace, never edited
+
+    def _read_current(self) -> MarketAssumptions:
+        self._stamp = self._current_file_stamp()
+        if self._stamp is None:
+            return DEFAULT_ASSUMPTIONS
+        current = json.loads((self.path / CURRENT_FILE).read_text())
+        return self.get(current["version"])
+
+    def current(self) -> MarketAssumptions:
+        return self._current
+
+    def get(self, version: int) -> MarketAssumptions:
+        """A published snapshot; raises ``KeyError`` for unknown versions"""
+        if version == 0:
+            return DEFAULT_ASSUMPTIONS
+        snapshot = self._snapshots.get(version)
+        if snapshot is None:
+            path = self.path / f"v{version}.json"
+            if not path.exists():
+                raise KeyError(version)
+            snapshot = MarketAssumptions.from_dict(json.loads(path.read_text()))
+            self._snapshots[version] = snapshot
+        return snapshot
+
+    def refresh(self) -> bool:
+        """
+        Pick up a snapshot published by another process; a single ``stat``
+        when ``current.json`` has not been repointed
+        """
+        if self._current_file_stamp() == self._stamp:
+            return False
+        current = self._read_current()
+        if current.version == self._current.version:
+            return False
+        self._current = current
+        return True
+
+    def publish(
+        self,
+        tenors: Sequence[float],
+        yields: Sequence[float],
+        equity_risk_premium: float,
+        default_tax_rate: Optional[float] = None,
+    ) -> MarketAssumptions:
+        """Write the next version; blocks while another process publishes"""
+        fd = os.open(self.path / PUBLISH_LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            return self._publish(tenors, yields, equity_risk_premium, default_tax_rate)
+        finally:
+            os.close(fd)  # releases the lock
+
+    def _publish(
+        self,
+        tenors: Sequence[float],
+        yields: Sequence[float],
+        equity_risk_premium: float,
+        default_tax_rate: Optional[float],
+    ) -> MarketAssumptions:
+        self.refresh()
+        snapshot = MarketAssumptions(
+            version=self._current.version + 1,
+            published_at=datetime.now(timezone.utc),
+            tenors=tuple(float(t) for t in tenors),
+            yields=tuple(float(y) for y in yields),
+            equity_risk_premium=float(equity_risk_premium),
+            default_tax_rate=(
+                self._current.default_tax_rate
+                if default_tax_rate is None
+                else float(default_tax_rate)
+            ),
+        )
+        atomic_write_text(
+            self.path / f"v{snapshot.version}.json", json.dumps(snapshot.to_dict())
+        )
+        atomic_write_text(
+            self.path / CURRENT_FILE, json.dumps({"version": snapshot.version})
+        )
+        self._stamp = self._current_file_stamp()
+        self._snapshots[snapshot.version] = snapshot
+        self._current = snapshot
+        return snapshot
+
+
+@lru_cache()
+def get_market_assumptions_store() -> MarketAssumptionsStore:
+    return MarketAssumptionsStore(settings.MARKET_ASSUMPTIONS_PATH)
+
+
+def current_market_assumptions() -> MarketAssumptions:
+    return get_market_assumptions_store().current()
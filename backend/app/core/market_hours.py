@@ -0,0 +1,65 @@
+from datetime import datetime, time, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from .config import MarketConfig
+
+MARKET_TZ = ZoneInfo(MarketConfig.TIMEZONE)
+MARKET_OPEN = time(MarketConfig.MARKET_OPEN_HOUR, MarketConfig.MARKET_OPEN_MINUTE)
+MARKET_CLOSE = time(MarketConfig.MARKET_CLOSE_HOUR, MarketConfig.MARKET_CLOSE_MINUTE)
+
+
+def market_now() -> datetime:
+    return datetime.now(MARKET_TZ)
+
+
+def _localize(now: Optional[datetime]) -> datetime:
+    if now is None:
+        return market_now()
+    if now.tzinfo is None:
+        raise ValueError("now must be timezone-aware")
+    return now.astimezone(MARKET_TZ)
+
+
+def is_trading_day(now: Optional[datetime] = None) -> bool:
+    """Weekdays only; exchange holidays are not modelled"""
+    return _localize(now).weekday() < 5
+
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    now = _localize(now)
+    return is_trading_day(now) and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def next_market_open(now: Optional[datetime] = None) -> datetime:
+    """The next regular-session open strictly after ``now``"""
+    now = _localize(now)
+    candidate = now.replace(
+        hour=MARKET_OPEN.hour, minute=MARKET_OPEN.minute, second=0, microsecond=0
+    )
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def market_aware_ttl(
+    base_ttl: int, now: Optional[datetime] = None, close_grace_minutes: int = 0
+) -> int:
+    """
+    TTL in seconds for price-derived values.
+
+    While the market is open (plus a grace period after the close for
+    closing prints) the flat ``base_ttl`` applies. Otherwise prices cannot
+    move, so entries live until the next open - overnight, or across the
+    weekend from Friday's close.
+    """
+    now = _localize(now)
+    close = now.replace(
+        hour=MARKET_CLOSE.hour, minute=MARKET_CLOSE.minute, second=0, microsecond=0
+    )
+    grace_end = close + timedelta(minutes=close_grace_minutes)
+    if is_market_open(now) or (is_trading_day(now) and close <= now < grace_end):
+        return base_ttl
+    return max(base_ttl, int((next_market_open(now) - now).total_seconds()))
@@ -0,0 +1,270 @@
+"""
+Formula hot-path counters and an on-demand sampling profiler.
+
+The counters live in ``formulas.instrumentation``, which wraps every
+formula when the package is imported; the graph calls formulas once per
+batch, not once per row, on the vectorized path. They are per process, so
+each worker and job-pool process writes its own to ``FORMULA_STATS_PATH``
+(``FormulaStatsStore``) and the admin endpoint sums the files.
+
+``SamplingProfiler`` is only started for requests that ask for it. A
+background thread reads ``sys._current_frames()`` every ``interval``
+seconds and counts each busy thread's stack, so it sees work the request
+pushed to ``asyncio.to_thread`` as well as the event loop. Other requests
+running at the same moment show up in the samples too; threads parked in
+a selector, queue or lock are skipped as idle. Profiles are written to
+``PROFILE_PATH`` as JSON, so any worker can serve one.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import suppress
+from functools import lru_cache
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Any, Optional, Union
+
+from formulas.instrumentation import COUNTERS, FormulaCounters, FormulaStats
+
+from .columnar_store import atomic_write_text
+from .config import settings
+
+# (file name, function) of the Python frame a parked thread sits in
+IDLE_LEAVES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("thread.py", "_worker"),
+    ("queue.py", "get"),
+}
+EPOCH_FILE = "epoch"  # bumped by every reset
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_formula_counters() -> FormulaCounters:
+    """This process's counters for every function in ``formulas``"""
+    return COUNTERS
+
+
+class FormulaStatsStore:
+    """
+    Formula counters of every process, one JSON file per process.
+
+    ``flush`` rewrites this process's file. ``reset`` bumps the shared epoch
+    and drops every file; a process whose next flush sees the new epoch
+    keeps only the calls made since its previous flush. Files of an older
+    epoch are ignored.
+    """
+
+    def __init__(self, path: Union[str, Path], counters: FormulaCounters = COUNTERS):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.counters = counters
+        self._token = uuid.uuid4().hex[:8]  # a reused pid is a new file
+        self._epoch = self._read_epoch()
+        self._flushed: dict[str, tuple[int, float, int, int]] = {}
+        self._lock = threading.Lock()
+
+    def _read_epoch(self) -> int:
+        try:
+            return int((self.path / EPOCH_FILE).read_text())
+        except FileNotFoundError:
+            return 0
+
+    def flush(self) -> None:
+        with self._lock:
+            epoch = self._read_epoch()
+            if epoch != self._epoch:
+                self.counters.discount(self._flushed)
+                self._epoch = epoch
+            self._flushed = self.counters.snapshot()
+            atomic_write_text(
+                self.path / f"{os.getpid()}-{self._token}.json",
+                json.dumps({"epoch": epoch, "stats": self._flushed}),
+            )
+
+    def report(self, sort: str = "total_ms") -> list[dict[str, Any]]:
+        """Counters summed over every process, this one flushed first"""
+        self.flush()
+        epoch = self._read_epoch()
+        totals: dict[str, FormulaStats] = {}
+        for path in self.path.glob("*.json"):
+            try:
+                data = json.loads(path.read_text())
+            except FileNotFoundError:  # dropped by a reset
+                continue
+            if data["epoch"] != epoch:
+                continue
+            for name, (calls, seconds, rows, max_rows) in data["stats"].items():
+                total = totals.setdefault(name, FormulaStats(name))
+                total.calls += calls
+                total.seconds += seconds
+                total.rows += rows
+                total.max_rows = max(total.max_rows, max_rows)
+        rows = [s.to_dict() for s in totals.values()]
+        return sorted(rows, key=lambda r: r[sort], reverse=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._epoch = self._read_epoch() + 1
+            atomic_write_text(self.path / EPOCH_FILE, str(self._epoch))
+            self.counters.reset()
+            self._flushed = {}
+            for path in self.path.glob("*.json"):
+                path.unlink(missing_ok=True)
+
+
+async def run_formula_stats_flush() -> None:
+    """Background loop: publish this worker's counters for the admin endpoint"""
+    store = get_formula_stats_store()
+    while True:
+        await asyncio.sleep(settings.FORMULA_STATS_FLUSH_SECONDS)
+        try:
+            await asyncio.to_thread(store.flush)
+        except Exception:
+            logger.exception("Formula stats flush failed; retrying next interval")
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter[tuple[CodeType, ...]] = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = self._elapsed = 0.0
+
+    def _is_idle(self, frame: FrameType) -> bool:
+        code = frame.f_code
+        return (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == own or self._is_idle(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def start(self) -> "SamplingProfiler":
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="request-profiler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._elapsed = time.perf_counter() - self._started
+        return self
+
+    @staticmethod
+    def label(code: CodeType) -> str:
+        path = code.co_filename
+        if path.startswith(ROOT):
+            path = os.path.relpath(path, ROOT)
+        else:
+            path = os.path.basename(path)
+        return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+    def report(self, top: int = 40, max_stacks: int = 200) -> dict[str, Any]:
+        """Hottest functions (self/total samples) plus folded stacks"""
+        own: Counter[CodeType] = Counter()
+        total: Counter[CodeType] = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for code in set(stack):
+                total[code] += count
+        return {
+            "duration_ms": self._elapsed * 1000,
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "functions": [
+                {"function": self.label(code), "self": own[code], "total": count}
+                for code, count in total.most_common(top)
+            ],
+            # "frame;frame;frame count", the input format of flamegraph tools
+            "folded": [
+                f"{';'.join(self.label(c) for c in stack)} {count}"
+                for stack, count in self.stacks.most_common(max_stacks)
+            ],
+        }
+
+
+class ProfileStore:
+    """The last ``max_entries`` request profiles, one JSON file per id"""
+
+    def __init__(self, path: Union[str, Path], max_entries: int = 50):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+
+    def new_id(self) -> str:
+        return uuid.uuid4().hex[:16]
+
+    def _files(self) -> list[Path]:
+        """Profile files, newest first"""
+        stamped = []
+        for path in self.path.glob("*.json"):
+            with suppress(FileNotFoundError):  # pruned by another worker
+                stamped.append((path.stat().st_mtime_ns, path))
+        return [path for _, path in sorted(stamped, reverse=True)]
+
+    def add(self, profile_id: str, profile: dict[str, Any]) -> None:
+        atomic_write_text(self.path / f"{profile_id}.json", json.dumps(profile))
+        for stale in self._files()[self.max_entries :]:
+            stale.unlink(missing_ok=True)
+
+    def get(self, profile_id: str) -> Optional[dict[str, Any]]:
+        if not profile_id.isalnum():  # ids are hex; never a path
+            return None
+        try:
+            return json.loads((self.path / f"{profile_id}.json").read_text())
+        except FileNotFoundError:
+            return None
+
+    def list(self) -> list[dict[str, Any]]:
+        profiles = []
+        for path in self._files():
+            try:
+                p = json.loads(path.read_text())
+            except FileNotFoundError:
+                continue
+            profiles.append(
+                {
+                    "id": path.stem,
+                    "method": p["method"],
+                    "path": p["path"],
+                    "status": p["status"],
+                    "duration_ms": p["duration_ms"],
+                    "captured_at": p["captured_at"],
+                }
+            )
+        return profiles
+
+
+@lru_cache()
+def get_profile_store() -> ProfileStore:
+    return ProfileStore(settings.PROFILE_PATH, settings.PROFILE_KEEP)
+
+
+@lru_cache()
+def get_formula_stats_store() -> FormulaStatsStore:
+    return FormulaStatsStore(settings.FORMULA_STATS_PATH)
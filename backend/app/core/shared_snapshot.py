@@ -0,0 +1,239 @@
+"""
+Read-only array snapshots shared between worker processes.
+
+One process (whichever holds ``publisher.lock``) copies a set of named
+arrays into a single ``multiprocessing.shared_memory`` segment and then
+atomically replaces ``manifest.json`` with the segment name, version and
+each array's offset, dtype and shape. Other workers stat the manifest and,
+when it changes, attach to the new segment and wrap it in read-only NumPy
+views, so N workers hold one copy of the universe instead of N.
+
+After a new manifest is in place the publisher unlinks the previous
+segment. Unlinking only removes the name: workers still mapping the old
+segment keep valid views until their last reference to that snapshot goes
+away, at which point the mapping is closed. A publisher that takes over
+from a dead one unlinks the segment it finds in the manifest once its own
+first snapshot is published, so segments do not outlive restarts.
+
+Segments are kept out of ``multiprocessing``'s resource tracker, which
+would otherwise unlink them when the process that happened to attach or
+create them exits.
+"""
+
+import fcntl
+import json
+import os
+import secrets
+import sys
+import weakref
+from datetime import datetime, timezone
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Any, Mapping, Optional, Union
+
+import numpy as np
+
+from .columnar_store import atomic_write_text
+
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = "publisher.lock"
+ALIGNMENT = 64  # bytes; every array starts on a cache line
+
+
+def _open_segment(name: str, create: bool = False, size: int = 0) -> SharedMemory:
+    """Create or attach a segment that the resource tracker ignores"""
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name, create=create, size=size, track=False)
+    shm = SharedMemory(name, create=create, size=size)
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _destroy(shm: SharedMemory) -> None:
+    shm.close()
+    if sys.version_info < (3, 13):
+        # unlink() unregisters again; keep the tracker's bookkeeping balanced
+        resource_tracker.register(shm._name, "shared_memory")
+    shm.unlink()
+
+
+def _unlink(name: str) -> None:
+    try:
+        _destroy(_open_segment(name))
+    except FileNotFoundError:
+        pass
+
+
+def _release(shm: SharedMemory) -> None:
+    try:
+        shm.close()
+    except BufferError:  # a view outlived its snapshot; unmapped when it dies
+        pass
+
+
+class SharedSnapshot:
+    """One published version: read-only arrays plus JSON metadata"""
+
+    def __init__(
+        self,
+        version: int,
+        created_at: datetime,
+        meta: dict[str, Any],
+        arrays: dict[str, np.ndarray],
+    ):
+        self.version = version
+        self.created_at = created_at
+        self.meta = meta
+        self.arrays = arrays
+        self._indexes: dict[str, dict[str, int]] = {}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.arrays
+
+    def index(self, label: str) -> dict[str, int]:
+        """Position of each entry of the ``meta[label]`` list (e.g. tickers)"""
+        if label not in self._indexes:
+            self._indexes[label] = {v: i for i, v in enumerate(self.meta[label])}
+        return self._indexes[label]
+
+    @classmethod
+    def attach(cls, manifest: Mapping[str, Any]) -> "SharedSnapshot":
+        """Map a published segment; raises ``FileNotFoundError`` once unlinked"""
+        shm = _open_segment(manifest["segment"])
+        buf = shm.buf.toreadonly()
+        arrays = {
+            name: np.ndarray(
+                tuple(shape), dtype=np.dtype(dtype), buffer=buf, offset=offset
+            )
+            for name, (offset, dtype, shape) in manifest["arrays"].items()
+        }
+        snapshot = cls(
+            manifest["version"],
+            datetime.fromisoformat(manifest["created_at"]),
+            manifest["meta"],
+            arrays,
+        )
+        del buf
+        weakref.finalize(snapshot, _release, shm)
+        return snapshot
+
+
+def _read_manifest(path: Path) -> Optional[dict[str, Any]]:
+    try:
+        return json.loads((path / MANIFEST_FILE).read_text())
+    except FileNotFoundError:
+        return None
+
+
+class SnapshotPublisher:
+    def __init__(self, path: Union[str, Path], prefix: str = "snap"):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self._lock_fd: Optional[int] = None
+        self._segment: Optional[SharedMemory] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_fd is not None
+
+    def acquire(self) -> bool:
+        """Become the single publisher if nobody else is; cheap to retry"""
+        if self._lock_fd is not None:
+            return True
+        fd = os.open(self.path / LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def publish(
+        self, arrays: Mapping[str, np.ndarray], meta: Optional[dict[str, Any]] = None
+    ) -> int:
+        """Copy ``arrays`` into a new segment, swap the manifest, drop the old one"""
+        if not self.acquire():
+            raise RuntimeError("Another process is publishing snapshots")
+        layout: dict[str, tuple[int, str, list[int]]] = {}
+        size = 0
+        for name, array in arrays.items():
+            array = np.asarray(array)
+            size = -(-size // ALIGNMENT) * ALIGNMENT
+            layout[name] = (size, array.dtype.str, list(array.shape))
+            size += array.nbytes
+
+        previous = _read_manifest(self.path)
+        version = (previous["version"] if previous else 0) + 1
+        shm = _open_segment(
+            f"{self.prefix}_{version}_{secrets.token_hex(4)}",
+            create=True,
+            size=max(size, 1),
+        )
+        try:
+            for name, array in arrays.items():
+                offset, dtype, shape = layout[name]
+                np.ndarray(tuple(shape), dtype=dtype, buffer=shm.buf, offset=offset)[
+                    ...
+                ] = array
+            manifest = {
+                "version": version,
+                "segment": shm.name,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "meta": meta or {},
+                "arrays": layout,
+            }
+            atomic_write_text(self.path / MANIFEST_FILE, json.dumps(manifest))
+        except BaseException:
+            _destroy(shm)
+            raise
+
+        if self._segment is not None:
+            _destroy(self._segment)
+        elif previous is not None:
+            _unlink(previous["segment"])  # left behind by an earlier publisher
+        self._segment = shm
+        return version
+
+    def close(self) -> None:
+        """
+        Stop publishing. The current segment stays for the other workers;
+        the next publisher unlinks it.
+        """
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+class SnapshotReader:
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._stamp: Optional[tuple[int, int]] = None
+        self._snapshot: Optional[SharedSnapshot] = None
+
+    def current(self) -> Optional[SharedSnapshot]:
+        """Latest published snapshot (``None`` before the first publish)"""
+        try:
+            stat = (self.path / MANIFEST_FILE).stat()
+        except FileNotFoundError:
+            return self._snapshot
+        stamp = (stat.st_mtime_ns, stat.st_ino)
+        if stamp != self._stamp:
+            manifest = _read_manifest(self.path)
+            if manifest is not None and (
+                self._snapshot is None or manifest["version"] != self._snapshot.version
+            ):
+                try:
+                    self._snapshot = SharedSnapshot.attach(manifest)
+                except FileNotFoundError:  # already replaced; retry next call
+                    return self._snapshot
+            self._stamp = stamp
+        return self._snapshot
@@ -1,10 +1,18 @@
 import os
-from typing import Annotated, AsyncGenerator
+from typing import Annotated, AsyncGenerator, Optional
 from sqlmodel import SQLModel
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from fastapi import Depends, HTTPException, Header
+from fastapi import Depends, HTTPException, Header, WebSocketException, status
 from dotenv import load_dotenv
+from starlette.requests import HTTPConnection
+
+from .core.columnar_store import FundamentalsStore, get_fundamentals_store
+from .core.market_assumptions import (
+    current_market_assumptions,
+    get_market_assumptions_store,
+)
+from .services.corporate_actions import get_corporate_action_adjuster
 
 # Load environment variables
 load_dotenv()
@@ -64,6 +72,58 @@ def get_token_header(x_token: Annotated[str, Header()]) -> str:
     return x_token
 
 
+def verify_token(
+    connection: HTTPConnection,
+    x_token: Annotated[Optional[str], Header()] = None,
+) -> str:
+    """
+    App-wide token check: the ``X-Token`` header, or for WebSockets (which
+    browsers cannot open with custom headers) a ``token`` query parameter
+    """
+    if connection.scope["type"] == "websocket":
+        token = x_token or connection.query_params.get("token")
+        if not TOKEN or token != TOKEN:
+            raise WebSocketException(
+                code=status.WS_1008_POLICY_VIOLATION,
+                reason="Invalid authentication token",
+            )
+        return token
+    if x_token is None:
+        raise HTTPException(status_code=401, detail="Missing authentication token")
+    return get_token_header(x_token)
+
+
+def get_dataset_versions(
+    store: Annotated[FundamentalsStore, Depends(get_fundamentals_store)],
+) -> dict[str, object]:
+    """
+    Versions of every dataset derived responses read, for ETags. The store
+    and market assumptions are re-read from disk first (a ``stat`` each), so
+    every worker tags a response with the versions it is about to serve.
+    """
+    store.refresh()
+    get_market_assumptions_store().refresh()
+    return {
+        "fundamentals": store.version,
+        "market": current_market_assumptions().version,
+        "corporate_actions": get_corporate_action_adjuster().version,
+    }
+
+
+def get_screener_versions(
+    store: Annotated[FundamentalsStore, Depends(get_fundamentals_store)],
+) -> dict[str, object]:
+    """
+    The screener reads materialized metric values, which trail the store:
+    their version only moves once the writer has committed them
+    """
+    store.refresh()
+    return {"metric_values": store.materialized_version}
+
+
 # Type aliases for cleaner code
 TokenDep = Annotated[str, Depends(get_token_header)]
 AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_session)]
+FundamentalsStoreDep = Annotated[FundamentalsStore, Depends(get_fundamentals_store)]
+DatasetVersionsDep = Annotated[dict[str, object], Depends(get_dataset_versions)]
+ScreenerVersionsDep = Annotated[dict[str, object], Depends(get_screener_versions)]
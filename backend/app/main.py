@@ -1,3 +1,5 @@
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from typing import Union
@@ -8,33 +10,187 @@
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 
-from .dependencies import AsyncSessionDep, create_db_and_tables_async, get_token_header
+from .api import (
+    admin,
+    alerts,
+    dividends,
+    fundamentals,
+    jobs,
+    live,
+    market,
+    metrics,
+    portfolio,
+    screener,
+    valuation,
+)
+from .core.cache import get_cache
+from .core.columnar_store import get_fundamentals_store
+from .core.config import settings
+from .core.market_assumptions import get_market_assumptions_store
+from .core.profiling import run_formula_stats_flush
+from .dependencies import (
+    AsyncSessionDep,
+    AsyncSessionLocal,
+    create_db_and_tables_async,
+    verify_token,
+)
+from .middleware import RequestProfilingMiddleware
+from .services.cache_warmer import run_premarket_warmup
+from .services.corporate_actions import get_corporate_action_adjuster
+from .services.dividend_streaks import get_streak_tracker
+from .services.job_handlers import get_job_manager
+from .services.live_yields import get_live_yield_hub
+from .services.recompute import get_recomputer
+from .services.screener import materialize_metric_values
+from .services.universe_snapshot import get_snapshot_publisher, publish_universe
+from .services.yield_metrics import yield_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+async def sync_fundamentals_store():
+    """
+    Keep the columnar store up to date with changed rows and hand the
+    changed fields to the incremental recomputer straight away (they are
+    kept across a failed pass until delivered, since the sync watermark has
+    already moved past them). New splits/spin-offs drop
+    only the affected tickers' adjustment factors, cached yields and streaks.
+    Screener values are materialized for changed tickers, or for the whole
+    universe whenever the store's ``materialized_version`` lags (first run,
+    or a pass that failed between syncing and committing), and only then
+    marked materialized so screener ETags never run ahead of the rows.
+
+    Only the worker holding the store's writer lock syncs it, materializes
+    screener values and republishes the shared universe snapshot after any
+    of its inputs changed. The others reload the store index when its
+    on-disk version moves and re-feed their cached metric batches. A failed
+    pass is logged and retried next interval.
+    """
+    store = get_fundamentals_store()
+    recomputer = get_recomputer()
+    adjuster = get_corporate_action_adjuster()
+    streaks = get_streak_tracker()
+    publisher = get_snapshot_publisher()
+    pending: dict[str, set[str]] = {}  # synced, not yet handed to the recomputer
+    published_store_version = None
+    seen_store_version = store.version
+    seen_market_version = get_market_assumptions_store().current().version
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                if store.acquire_writer():
+                    caught_up = store.materialized_version == store.version
+                    changes = await store.sync_from_db(session, changes=pending)
+                    if changes:
+                        invalidated = await recomputer.notify_changes(changes)
+                        print(
+                            f"Fundamentals store synced ({len(changes)} tickers "
+                            f"changed, {invalidated} derived values invalidated)"
+                        )
+                    pending = {}
+                    if changes or not caught_up:
+                        await materialize_metric_values(
+                            session, store, list(changes) if caught_up else None
+                        )
+                        store.mark_materialized()
+                else:
+                    store.refresh()  # may already have happened in a request
+                    if store.version != seen_store_version:
+                        # Which fields changed is only known to the writer;
+                        # batches drop just the values whose inputs moved
+                        await recomputer.notify_changes(
+                            {ticker: store.fields for ticker in recomputer.batches}
+                        )
+                seen_store_version = store.version
+                adjusted = await adjuster.sync_from_db(session)
+                if adjusted:
+                    for ticker in adjusted:
+                        get_cache().delete(yield_cache_key(ticker, store))
+                    if streaks.synced_at is not None:
+                        await streaks.refresh_tickers(session, adjusted)
+                    print(
+                        f"Corporate actions synced ({len(adjusted)} tickers adjusted)"
+                    )
+            market = get_market_assumptions_store()
+            market.refresh()  # may already have happened in a request
+            market_changed = market.current().version != seen_market_version
+            seen_market_version = market.current().version
+            if market_changed:
+                await recomputer.notify_market_change()
+            if (
+                store.is_writer
+                and publisher.acquire()
+                and (
+                    adjusted
+                    or market_changed
+                    or store.version != published_store_version
+                )
+            ):
+                published_store_version = store.version
+                version = await asyncio.to_thread(
+                    publish_universe, publisher, store, adjuster
+                )
+                print(f"Universe snapshot v{version} published")
+        except Exception:
+            logger.exception("Fundamentals sync failed; retrying next interval")
+        await asyncio.sleep(settings.FUNDAMENTALS_SYNC_SECONDS)
 
 
 # Lifespan context manager
 @asynccontextmanager
-async def lifespan():
+async def lifespan(app: FastAPI):
     # Startup
     await create_db_and_tables_async()
     print("Database tables created")
+    # Opening only reads the index; syncing and recomputation run in the background
+    get_fundamentals_store()
+    await get_job_manager().start()
+    background_tasks = [
+        asyncio.create_task(sync_fundamentals_store()),
+        asyncio.create_task(get_recomputer().run()),
+        asyncio.create_task(get_live_yield_hub().run()),
+        asyncio.create_task(run_premarket_warmup()),
+        asyncio.create_task(run_formula_stats_flush()),
+    ]
     yield
     # Shutdown
+    for task in background_tasks:
+        task.cancel()
+    # A task that died with an error must not skip the rest of the shutdown
+    for result in await asyncio.gather(*background_tasks, return_exceptions=True):
+        if isinstance(result, Exception):  # CancelledError is a BaseException
+            logger.error("Background task failed", exc_info=result)
+    await get_job_manager().stop()
+    get_snapshot_publisher().close()
+    get_fundamentals_store().close()
     print("Shutting down")
 
 
 # Create FastAPI app
-app = FastAPI(
-    title="Hero API", lifespan=lifespan, dependencies=[Depends(get_token_header)]
-)
+app = FastAPI(title="Hero API", lifespan=lifespan, dependencies=[Depends(verify_token)])
 
+app.add_middleware(RequestProfilingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173"],  # dev server
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Profile-Id"],
 )
 
+app.include_router(admin.router)
+app.include_router(alerts.router)
+app.include_router(dividends.router)
+app.include_router(fundamentals.router)
+app.include_router(jobs.router)
+app.include_router(live.router)
+app.include_router(market.router)
+app.include_router(metrics.router)
+app.include_router(portfolio.router)
+app.include_router(screener.router)
+app.include_router(valuation.router)
+
 
 class Item(BaseModel):
     name: str
@@ -0,0 +1,75 @@
+import asyncio
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .core.config import settings
+from .core.profiling import SamplingProfiler, get_profile_store
+from .dependencies import get_token_header
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+
+class RequestProfilingMiddleware:
+    """
+    Sample-profile single requests sent with ``X-Profile: 1`` and a valid
+    ``X-Token``. The profile is kept in the profile store and its id
+    returned in ``X-Profile-Id``; read it from ``/admin/profiles/{id}``.
+    Every other request only pays for one header scan.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    @staticmethod
+    def _wants_profile(scope: Scope) -> bool:
+        headers = dict(scope["headers"])
+        if headers.get(PROFILE_HEADER, b"") not in (b"1", b"true"):
+            return False
+        try:
+            # Middleware runs before dependencies, so check the token here too
+            get_token_header(headers.get(b"x-token", b"").decode("latin-1"))
+        except HTTPException:
+            return False
+        return True
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        store = get_profile_store()
+        profile_id = store.new_id()
+        status = 500
+
+        async def send_with_id(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (PROFILE_ID_HEADER, profile_id.encode()),
+                ]
+            await send(message)
+
+        profiler = SamplingProfiler(settings.PROFILE_INTERVAL_MS / 1000).start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            # Joining the sampler thread must not block the event loop
+            await asyncio.to_thread(profiler.stop)
+            report = profiler.report()
+            await asyncio.to_thread(
+                store.add,
+                profile_id,
+                {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "query": scope["query_string"].decode("latin-1"),
+                    "status": status,
+                    "captured_at": datetime.now(timezone.utc).isoformat(),
+                    **report,
+                },
+            )
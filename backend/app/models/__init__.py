@@ -0,0 +1,13 @@
+from .corporate_actions import CorporateAction
+from .dividends import DividendEvent, Holding
+from .fundamentals import FUNDAMENTAL_FIELDS, Fundamental
+from .metrics import MetricValue
+
+__all__ = [
+    "CorporateAction",
+    "DividendEvent",
+    "FUNDAMENTAL_FIELDS",
+    "Fundamental",
+    "Holding",
+    "MetricValue",
+]
@@ -0,0 +1,33 @@
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+SPLIT = "split"
+SPIN_OFF = "spin_off"
+
+
+class CorporateAction(SQLModel, table=True):
+    """
+    A split or spin-off effective from ``effective_date`` (the ex-date).
+
+    ``ratio`` is new shares per old share for a split (2.0 for 2-for-1,
+    0.1 for a 1-for-10 reverse split) and the fraction of the parent's
+    pre-spin value it retains for a spin-off (e.g. 0.85).
+    """
+
+    __tablename__ = "corporate_actions"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    ticker: str = Field(index=True, max_length=16)
+    effective_date: date = Field(index=True)
+    action_type: str = Field(max_length=16)  # SPLIT or SPIN_OFF
+    ratio: float = Field(gt=0)
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc), index=True
+    )
+
+    @property
+    def price_factor(self) -> float:
+        """Multiplier for per-share values dated before ``effective_date``"""
+        return 1 / self.ratio if self.action_type == SPLIT else self.ratio
@@ -0,0 +1,31 @@
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class DividendEvent(SQLModel, table=True):
+    """A declared dividend with its ex-date and pay-date"""
+
+    __tablename__ = "dividend_events"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    ticker: str = Field(index=True, max_length=16)
+    ex_date: date = Field(index=True)
+    pay_date: Optional[date] = Field(default=None, index=True)
+    amount: float
+    is_special: bool = False
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc), index=True
+    )
+
+
+class Holding(SQLModel, table=True):
+    """A position in one ticker held by one user"""
+
+    __tablename__ = "holdings"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_email: str = Field(index=True, max_length=255)
+    ticker: str = Field(index=True, max_length=16)
+    shares: float
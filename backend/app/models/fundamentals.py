@@ -0,0 +1,62 @@
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class Fundamental(SQLModel, table=True):
+    """One reported fiscal period for one ticker.
+
+    Numeric columns are named after the parameters of the functions in
+    ``formulas/`` so rows can be fed to them without renaming.
+    """
+
+    __tablename__ = "fundamentals"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    ticker: str = Field(index=True, max_length=16)
+    period_end: date = Field(index=True)
+
+    # Per-share data
+    earnings_per_share: Optional[float] = None
+    dividend_per_share: Optional[float] = None
+    stock_price: Optional[float] = None
+    shares_outstanding: Optional[float] = None
+
+    # Cash flow statement
+    operating_cash_flow: Optional[float] = None
+    capital_expenditures: Optional[float] = None
+    free_cash_flow: Optional[float] = None
+    total_dividends_paid: Optional[float] = None
+    total_share_repurchases: Optional[float] = None
+    net_borrowing: Optional[float] = None
+    depreciation: Optional[float] = None
+    amortization: Optional[float] = None
+
+    # Income statement
+    revenue: Optional[float] = None
+    ebitda: Optional[float] = None
+    ebit: Optional[float] = None
+    net_income: Optional[float] = None
+    interest_expense: Optional[float] = None
+    income_tax_expense: Optional[float] = None
+    pre_tax_income: Optional[float] = None
+
+    # Balance sheet
+    total_debt: Optional[float] = None
+    cash: Optional[float] = None
+    shareholders_equity: Optional[float] = None
+    average_total_assets: Optional[float] = None
+
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc), index=True
+    )
+
+
+# Numeric columns in declaration order; this is also the column order of the
+# on-disk columnar store.
+FUNDAMENTAL_FIELDS: tuple[str, ...] = tuple(
+    name
+    for name in Fundamental.model_fields
+    if name not in ("id", "ticker", "period_end", "updated_at")
+)
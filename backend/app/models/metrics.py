@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Index, UniqueConstraint
+from sqlmodel import Field, SQLModel
+
+
+class MetricValue(SQLModel, table=True):
+    """
+    Latest value of one derived metric for one ticker.
+
+    Materialized from the metric graph so screens can sort and page on an
+    index: ``(metric, value, ticker)`` serves keyset pagination in either
+    direction with ``ticker`` as the tie-breaker.
+    """
+
+    __tablename__ = "metric_values"
+    __table_args__ = (
+        UniqueConstraint("metric", "ticker", name="uq_metric_values_metric_ticker"),
+        Index("ix_metric_values_metric_value_ticker", "metric", "value", "ticker"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    metric: str = Field(max_length=64)
+    ticker: str = Field(max_length=16)
+    value: float
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,212 @@
+"""
+Batched dividend-alert email dispatch.
+
+Alerts are grouped into one email per recipient and sent by a fixed number
+of workers that pull from a bounded queue (producers wait when it is full)
+and borrow connections from a pool of open SMTP sessions, so a run costs a
+handful of TCP/TLS handshakes instead of one per email.
+
+For local testing point the SMTP settings at a sink, e.g.
+``python -m aiosmtpd -n -l localhost:1025`` with ``SMTP_HOST=localhost``,
+``SMTP_PORT=1025`` and ``SMTP_TLS=false``.
+"""
+
+import asyncio
+import logging
+import smtplib
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import AsyncIterator, Mapping, Optional, Sequence
+
+from ..core.config import EmailTemplates, Settings, settings
+from .dividend_calendar import DividendAlert
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPConnectionPool:
+    """Bounded pool of reusable ``smtplib.SMTP`` sessions"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        use_tls: bool = True,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        size: int = 8,
+        max_messages_per_connection: int = 100,
+        timeout: float = 30.0,
+    ):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.user = user
+        self.password = password
+        self.max_messages_per_connection = max_messages_per_connection
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(size)
+        self._idle: list[tuple[smtplib.SMTP, int]] = []
+
+    @classmethod
+    def from_settings(cls, config: Settings = settings) -> "SMTPConnectionPool":
+        if not config.SMTP_HOST:
+            raise ValueError("SMTP_HOST is not configured")
+        return cls(
+            host=config.SMTP_HOST,
+            port=config.SMTP_PORT or 587,
+            use_tls=config.SMTP_TLS,
+            user=config.SMTP_USER,
+            password=config.SMTP_PASSWORD,
+            size=config.ALERT_SMTP_POOL_SIZE,
+        )
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            conn.starttls()
+        if self.user and self.password:
+            conn.login(self.user, self.password)
+        return conn
+
+    @staticmethod
+    def _quit(conn: smtplib.SMTP) -> None:
+        try:
+            conn.quit()
+        except smtplib.SMTPException:
+            conn.close()
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator["PooledConnection"]:
+        """Borrow a connection; it is discarded if the body raises"""
+        async with self._slots:
+            if self._idle:
+                conn, sent = self._idle.pop()
+            else:
+                conn, sent = await asyncio.to_thread(self._connect), 0
+            pooled = PooledConnection(conn, sent)
+            try:
+                yield pooled
+            except BaseException:
+                await asyncio.to_thread(conn.close)
+                raise
+            if pooled.sent >= self.max_messages_per_connection:
+                await asyncio.to_thread(self._quit, conn)
+            else:
+                self._idle.append((conn, pooled.sent))
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            await asyncio.to_thread(self._quit, conn)
+
+
+@dataclass
+class PooledConnection:
+    conn: smtplib.SMTP
+    sent: int = 0
+
+    async def send(self, message: EmailMessage) -> None:
+        await asyncio.to_thread(self.conn.send_message, message)
+        self.sent += 1
+
+
+@dataclass
+class DispatchReport:
+    sent: int = 0
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+def build_alert_message(
+    recipient: str, alerts: Sequence[DividendAlert], sender: str
+) -> EmailMessage:
+    """One email listing every upcoming ex-dividend for a recipient"""
+    lines = [
+        f"{a.entry.ticker}: ex-dividend {a.entry.ex_date:%Y-%m-%d}, "
+        f"${a.entry.amount:.4f}/share"
+        + (f", paid {a.entry.pay_date:%Y-%m-%d}" if a.entry.pay_date else "")
+        + f" (~${a.expected_payment:,.2f} on {a.shares:g} shares)"
+        for a in sorted(alerts, key=lambda a: (a.entry.ex_date, a.entry.ticker))
+    ]
+    message = EmailMessage()
+    message["Subject"] = EmailTemplates.DIVIDEND_ALERT_SUBJECT
+    message["From"] = sender
+    message["To"] = recipient
+    message.set_content(
+        "Upcoming ex-dividend dates for your holdings:\n\n" + "\n".join(lines) + "\n"
+    )
+    return message
+
+
+class DividendAlertDispatcher:
+    def __init__(
+        self,
+        pool: SMTPConnectionPool,
+        sender: str,
+        concurrency: int = 8,
+        queue_size: int = 1000,
+    ):
+        self.pool = pool
+        self.sender = sender
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+
+    @classmethod
+    def from_settings(cls, config: Settings = settings) -> "DividendAlertDispatcher":
+        if not config.EMAILS_FROM_EMAIL:
+            raise ValueError("EMAILS_FROM_EMAIL is not configured")
+        return cls(
+            pool=SMTPConnectionPool.from_settings(config),
+            sender=formataddr(
+                (config.EMAILS_FROM_NAME or "", config.EMAILS_FROM_EMAIL)
+            ),
+            concurrency=config.ALERT_SMTP_POOL_SIZE,
+            queue_size=config.ALERT_QUEUE_SIZE,
+        )
+
+    async def _send(self, message: EmailMessage) -> None:
+        try:
+            async with self.pool.connection() as conn:
+                await conn.send(message)
+        except smtplib.SMTPServerDisconnected:
+            # Idle pooled sessions may have been dropped server-side; retry once
+            async with self.pool.connection() as conn:
+                await conn.send(message)
+
+    async def _worker(self, queue: asyncio.Queue, report: DispatchReport) -> None:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            recipient, alerts = item
+            try:
+                await self._send(build_alert_message(recipient, alerts, self.sender))
+                report.sent += 1
+            except Exception as e:
+                # Whatever went wrong, keep draining: producers wait on this queue
+                if not isinstance(e, (smtplib.SMTPException, OSError)):
+                    logger.exception("Alert for %s failed", recipient)
+                report.failed[recipient] = f"{type(e).__name__}: {e}"
+
+    async def dispatch(
+        self, alerts_by_recipient: Mapping[str, Sequence[DividendAlert]]
+    ) -> DispatchReport:
+        report = DispatchReport()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        workers = [
+            asyncio.create_task(self._worker(queue, report))
+            for _ in range(self.concurrency)
+        ]
+        try:
+            for recipient, alerts in alerts_by_recipient.items():
+                await queue.put((recipient, alerts))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await self.pool.close()
+        return report
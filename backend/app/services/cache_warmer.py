@@ -0,0 +1,70 @@
+"""
+Pre-open cache warming.
+
+Shortly before each regular-session open the most-requested tickers' yield
+metrics are recomputed and cached through the first ``CACHE_TTL`` of the
+session, so the opening traffic spike is served from a warm cache.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Sequence
+
+from ..core.cache import MemoryCache, get_cache
+from ..core.columnar_store import FundamentalsStore, get_fundamentals_store
+from ..core.config import settings
+from ..core.market_hours import market_now, next_market_open
+from .yield_metrics import compute_yield_metrics, yield_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+def compute_many(
+    store: FundamentalsStore, tickers: Sequence[str]
+) -> dict[str, dict[str, Any]]:
+    results = {}
+    for ticker in tickers:
+        try:
+            results[ticker] = compute_yield_metrics(store, ticker)
+        except (KeyError, ValueError):
+            continue
+    return results
+
+
+async def warm_yield_metrics(
+    cache: MemoryCache,
+    store: FundamentalsStore,
+    tickers: Sequence[str],
+    open_at: datetime,
+) -> int:
+    """Compute off the event loop, then cache until ``CACHE_TTL`` past the open"""
+    results = await asyncio.to_thread(compute_many, store, tickers)
+    ttl = int((open_at - market_now()).total_seconds()) + settings.CACHE_TTL
+    for ticker, metrics in results.items():
+        cache.set(yield_cache_key(ticker, store), metrics, max(ttl, settings.CACHE_TTL))
+    return len(results)
+
+
+async def run_premarket_warmup() -> None:
+    """Background loop: warm the cache before every trading-day open"""
+    lead = timedelta(minutes=settings.CACHE_WARMUP_LEAD_MINUTES)
+    cache = get_cache()
+    store = get_fundamentals_store()
+    while True:
+        open_at = next_market_open()
+        delay = (open_at - lead - market_now()).total_seconds()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        try:
+            store.refresh()
+            tickers = cache.most_requested(settings.CACHE_WARMUP_TOP_N)
+            warmed = await warm_yield_metrics(cache, store, tickers, open_at)
+            cache.decay_requests()
+            print(f"Pre-open cache warm-up: {warmed}/{len(tickers)} tickers")
+        except Exception:
+            logger.exception("Pre-open cache warm-up failed; retrying before next open")
+
+        # Move past this open before scheduling the next one
+        await asyncio.sleep(max(0.0, (open_at - market_now()).total_seconds()) + 1)
@@ -0,0 +1,185 @@
+"""
+Split and spin-off adjustment of per-share history.
+
+Stored prices, dividends and EPS are never rewritten. Instead each ticker's
+actions are reduced once to sorted effective dates and suffix products of
+their price factors: ``factors[k]`` is the combined multiplier for a value
+dated before the k-th action and on/after the one before it. Adjusting a
+series is then a single ``searchsorted`` plus a gather and multiply.
+
+Spin-offs scale prices *and* dividends by the retained fraction, which
+keeps yields comparable across the spin-off date. ``sync_from_db`` drops
+the cached factors only for tickers whose actions changed or were deleted.
+``version`` digests the loaded actions, so every process holding the same
+actions tags caches and ETags alike.
+"""
+
+import hashlib
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Optional, Sequence
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from ..core.columnar_store import FundamentalsStore
+from ..core.config import settings
+from ..models.corporate_actions import CorporateAction
+
+PER_SHARE_FIELDS = ("stock_price", "dividend_per_share", "earnings_per_share")
+
+
+@dataclass(frozen=True)
+class AdjustmentFactors:
+    effective_dates: np.ndarray  # datetime64[D], sorted
+    factors: np.ndarray  # len(effective_dates) + 1, factors[-1] == 1
+
+    @classmethod
+    def from_actions(cls, actions: Sequence[tuple[date, float]]) -> "AdjustmentFactors":
+        actions = sorted(actions)
+        dates = np.array([d for d, _ in actions], dtype="datetime64[D]")
+        price_factors = np.array([f for _, f in actions], dtype=np.float64)
+        suffix = np.ones(len(actions) + 1)
+        suffix[:-1] = np.cumprod(price_factors[::-1])[::-1]
+        return cls(dates, suffix)
+
+    def at(self, dates: np.ndarray) -> np.ndarray:
+        """Cumulative factor for values observed on ``dates``"""
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        return self.factors[np.searchsorted(self.effective_dates, dates, side="right")]
+
+
+NO_ADJUSTMENT = AdjustmentFactors(np.array([], dtype="datetime64[D]"), np.ones(1))
+
+
+class CorporateActionAdjuster:
+    def __init__(self):
+        self._actions: dict[str, dict[int, tuple[date, float]]] = defaultdict(dict)
+        self._tickers: dict[int, str] = {}  # action id -> ticker
+        self._factors: dict[str, AdjustmentFactors] = {}
+        self._version: Optional[str] = None
+        self.synced_at: Optional[datetime] = None
+
+    @property
+    def version(self) -> str:
+        """Digest of the loaded actions; ``"0"`` when there are none"""
+        if self._version is None:
+            actions = sorted(
+                (id, str(d), f)
+                for ticker in self._actions.values()
+                for id, (d, f) in ticker.items()
+            )
+            self._version = (
+                hashlib.sha1(repr(actions).encode()).hexdigest()[:16]
+                if actions
+                else "0"
+            )
+        return self._version
+
+    def record(self, action: CorporateAction) -> bool:
+        """Add or replace an action; ``False`` if it was already loaded as is"""
+        value = (action.effective_date, action.price_factor)
+        if self._actions.get(action.ticker, {}).get(action.id) == value:
+            return False
+        if self._tickers.get(action.id, action.ticker) != action.ticker:
+            self.remove(action.id)
+        self._actions[action.ticker][action.id] = value
+        self._tickers[action.id] = action.ticker
+        self.invalidate(action.ticker)
+        return True
+
+    def remove(self, action_id: int) -> Optional[str]:
+        """Forget a deleted action; returns its ticker, if it was loaded"""
+        ticker = self._tickers.pop(action_id, None)
+        if ticker is not None:
+            actions = self._actions[ticker]
+            del actions[action_id]
+            if not actions:
+                del self._actions[ticker]
+            self.invalidate(ticker)
+        return ticker
+
+    def invalidate(self, ticker: str) -> None:
+        self._factors.pop(ticker, None)
+        self._version = None
+
+    def factors(self, ticker: str) -> AdjustmentFactors:
+        factors = self._factors.get(ticker)
+        if factors is None:
+            actions = self._actions.get(ticker)
+            factors = (
+                AdjustmentFactors.from_actions(list(actions.values()))
+                if actions
+                else NO_ADJUSTMENT
+            )
+            self._factors[ticker] = factors
+        return factors
+
+    def adjust(self, ticker: str, dates: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """``values`` observed on ``dates``, restated in today's share terms"""
+        factors = self.factors(ticker)
+        if factors is NO_ADJUSTMENT:
+            return np.asarray(values)
+        return np.asarray(values) * factors.at(dates)
+
+    def adjusted_series(
+        self, store: FundamentalsStore, field: str, ticker: str
+    ) -> np.ndarray:
+        """Adjusted period series of a per-share fundamentals field"""
+        series = store.series(field, ticker)
+        if field not in PER_SHARE_FIELDS:
+            return series
+        return self.adjust(ticker, np.array(store.periods, "datetime64[D]"), series)
+
+    def adjusted_matrix(
+        self,
+        store: FundamentalsStore,
+        field: str,
+        tickers: Optional[Sequence[str]] = None,
+    ) -> np.ndarray:
+        """Adjusted ``tickers x periods`` matrix; unaffected rows are not touched"""
+        matrix = store.get(field, tickers)
+        if field not in PER_SHARE_FIELDS:
+            return matrix
+        tickers = store.tickers if tickers is None else tickers
+        affected = [i for i, t in enumerate(tickers) if t in self._actions]
+        if not affected:
+            return matrix
+        periods = np.array(store.periods, "datetime64[D]")
+        matrix = np.array(matrix)
+        for i in affected:
+            matrix[i] *= self.factors(tickers[i]).at(periods)
+        return matrix
+
+    async def sync_from_db(self, session: AsyncSession) -> set[str]:
+        """
+        Load actions updated since the last sync and forget deleted ones;
+        returns affected tickers.
+
+        Writers stamp ``updated_at`` before they commit, so the last
+        ``CORPORATE_ACTIONS_SYNC_OVERLAP_SECONDS`` are re-read; unchanged
+        actions are not reported again. A delete leaves no stamp behind,
+        so the loaded ids are checked against the (small) table instead.
+        """
+        stmt = select(CorporateAction).order_by(CorporateAction.updated_at)
+        if self.synced_at is not None:
+            overlap = timedelta(seconds=settings.CORPORATE_ACTIONS_SYNC_OVERLAP_SECONDS)
+            stmt = stmt.where(CorporateAction.updated_at > self.synced_at - overlap)
+        actions = (await session.execute(stmt)).scalars().all()
+        affected = {a.ticker for a in actions if self.record(a)}
+        if actions:
+            latest = actions[-1].updated_at
+            self.synced_at = max(latest, self.synced_at or latest)
+
+        ids = set((await session.execute(select(CorporateAction.id))).scalars())
+        for action_id in self._tickers.keys() - ids:
+            affected.add(self.remove(action_id))
+        return affected
+
+
+@lru_cache()
+def get_corporate_action_adjuster() -> CorporateActionAdjuster:
+    return CorporateActionAdjuster()
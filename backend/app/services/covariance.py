@@ -0,0 +1,303 @@
+"""
+Shrunk covariance of total returns for the whole universe.
+
+The estimator is Ledoit-Wolf (2004): the sample covariance ``S`` shrunk
+towards ``mu * I`` with the optimal intensity ``delta``. Every quantity it
+needs reduces to ``S`` itself, ``||S||_F`` and the per-period norms
+``||x_t||``:
+
+    b2 = (sum_t ||x_t||^4 - T ||S||_F^2) / T^2
+    d2 = ||S||_F^2 - N mu^2
+    delta = min(b2, d2) / d2
+
+``S`` is built in ``chunk x chunk`` column blocks straight into a
+memory-mapped ``.npy``, then shrunk block by block in place. Peak memory is
+the returns matrix plus two column blocks, whatever the universe size.
+
+Matrices are cached on disk per (universe, window, end period, store
+version, corporate-action version), so restated history or a split never
+serves a stale matrix. Only the ``max_files`` most recently used are kept.
+They are opened memory-mapped, so a portfolio's sub-matrix is an
+``np.ix_`` gather of a few pages.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import suppress
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+from ..core.columnar_store import FundamentalsStore, atomic_write_text
+from ..core.config import settings
+from .corporate_actions import CorporateActionAdjuster
+
+
+def periods_per_year(periods: Sequence[str]) -> float:
+    """Annualization factor from the median spacing of period dates"""
+    if len(periods) < 2:
+        return 1.0
+    spacing = np.median(np.diff(np.array(periods, dtype="datetime64[D]")))
+    return 365.25 / max(spacing.astype(np.int64), 1)
+
+
+def total_returns(
+    store: FundamentalsStore,
+    adjuster: CorporateActionAdjuster,
+    window: int,
+    end: Optional[str] = None,
+    tickers: Optional[Sequence[str]] = None,
+) -> tuple[np.ndarray, list[str], float]:
+    """
+    ``window x tickers`` per-period total returns (price change plus the
+    annual dividend spread over the period) ending at ``end``, with the
+    period labels and the annualization factor
+    """
+    hi = store.period_index(end) + 1 if end is not None else len(store.periods)
+    lo = max(hi - window - 1, 0)
+    periods = store.periods[lo:hi]
+    prices = adjuster.adjusted_matrix(store, "stock_price", tickers)[:, lo:hi]
+    dividends = adjuster.adjusted_matrix(store, "dividend_per_share", tickers)[:, lo:hi]
+    scale = periods_per_year(periods)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = (prices[:, 1:] + np.nan_to_num(dividends[:, 1:]) / scale) / prices[
+            :, :-1
+        ] - 1
+    returns[~np.isfinite(returns)] = np.nan
+    return np.ascontiguousarray(returns.T), periods[1:], scale
+
+
+def ledoit_wolf_covariance(
+    returns: np.ndarray,
+    out: Optional[np.ndarray] = None,
+    chunk_size: int = 512,
+) -> tuple[np.ndarray, float]:
+    """
+    Shrunk covariance of ``T x N`` returns; missing returns count as the
+    ticker's mean (zero after demeaning). Writes into ``out`` (e.g. a
+    memmap) when given. Returns the matrix and the shrinkage intensity.
+    """
+    x = np.asarray(returns, dtype=np.float64)
+    periods, n = x.shape
+    x = x - np.nanmean(np.where(np.isnan(x).all(axis=0), 0.0, x), axis=0)
+    x = np.nan_to_num(x)
+    if out is None:
+        out = np.empty((n, n))
+
+    frobenius = 0.0
+    trace = 0.0
+    for i in range(0, n, chunk_size):
+        xi = x[:, i : i + chunk_size]
+        for j in range(i, n, chunk_size):
+            block = xi.T @ x[:, j : j + chunk_size] / periods
+            out[i : i + chunk_size, j : j + chunk_size] = block
+            if j != i:
+                out[j : j + chunk_size, i : i + chunk_size] = block.T
+                frobenius += 2 * np.sum(block * block)
+            else:
+                frobenius += np.sum(block * block)
+                trace += np.trace(block)
+
+    mu = trace / n
+    d2 = frobenius - n * mu * mu
+    row_norms = np.einsum("ij,ij->i", x, x)
+    b2 = (np.sum(row_norms**2) - periods * frobenius) / periods**2
+    delta = float(min(max(b2, 0.0), d2) / d2) if d2 > 0 else 1.0
+
+    diagonal = np.arange(n)
+    for i in range(0, n, chunk_size):
+        out[i : i + chunk_size] *= 1 - delta
+        rows = diagonal[i : i + chunk_size]
+        out[rows, rows] += delta * mu
+    return out, delta
+
+
+@dataclass
+class CovarianceMatrix:
+    tickers: list[str]
+    matrix: np.ndarray  # memory-mapped, read-only
+    periods_per_year: float
+    shrinkage: float
+    end: str
+
+    def __post_init__(self):
+        self._pos = {t: i for i, t in enumerate(self.tickers)}
+
+    def sub(self, tickers: Sequence[str], annualize: bool = True) -> np.ndarray:
+        """Covariance of ``tickers`` only; raises ``KeyError`` if one is missing"""
+        idx = [self._pos[t] for t in tickers]
+        sub = self.matrix[np.ix_(idx, idx)]
+        return sub * self.periods_per_year if annualize else sub
+
+
+class CovarianceCache:
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_open: int = 4,
+        chunk_size: int = 512,
+        max_files: int = 16,
+    ):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_open = max_open
+        self.max_files = max_files
+        self.chunk_size = chunk_size
+        self._open: OrderedDict[str, CovarianceMatrix] = OrderedDict()
+        self._lock = threading.Lock()  # requests call ``get`` from worker threads
+        self._building: dict[str, threading.Lock] = {}  # one builder per key
+
+    @staticmethod
+    def key(
+        tickers: Sequence[str],
+        window: int,
+        end: str,
+        store_version: int = 0,
+        actions_version: str = "0",
+    ) -> str:
+        universe = hashlib.sha1("\n".join(tickers).encode()).hexdigest()[:16]
+        return f"{universe}-w{window}-{end}-v{store_version}-a{actions_version}"
+
+    def _remember(self, key: str, cov: CovarianceMatrix) -> CovarianceMatrix:
+        with self._lock:
+            self._open[key] = cov
+            self._open.move_to_end(key)
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+        return cov
+
+    def _opened(self, key: str) -> Optional[CovarianceMatrix]:
+        with self._lock:
+            cov = self._open.get(key)
+            if cov is not None:
+                self._open.move_to_end(key)
+        if cov is not None:
+            self._touch(key)
+        return cov
+
+    def _touch(self, key: str) -> None:
+        # The metadata mtime is the last use, for ``_prune`` in any process
+        now = time.time_ns()  # finer than the filesystem's own clock
+        with suppress(FileNotFoundError):
+            os.utime(self.path / f"{key}.json", ns=(now, now))
+
+    def _load(self, key: str) -> Optional[CovarianceMatrix]:
+        try:
+            meta = json.loads((self.path / f"{key}.json").read_text())
+            matrix = np.load(self.path / f"{key}.npy", mmap_mode="r")
+        except FileNotFoundError:  # never built, or pruned by another process
+            return None
+        self._touch(key)
+        return CovarianceMatrix(
+            meta["tickers"],
+            matrix,
+            meta["periods_per_year"],
+            meta["shrinkage"],
+            meta["end"],
+        )
+
+    def get(
+        self,
+        store: FundamentalsStore,
+        adjuster: CorporateActionAdjuster,
+        window: int,
+        end: Optional[str] = None,
+    ) -> CovarianceMatrix:
+        """Covariance for the whole store universe, computing it on first use"""
+        end = end or (store.periods[-1] if store.periods else "")
+        key = self.key(store.tickers, window, end, store.version, adjuster.version)
+        cov = self._opened(key)
+        if cov is not None:
+            return cov
+        # Concurrent first requests wait for a single build of the key
+        with self._lock:
+            building = self._building.setdefault(key, threading.Lock())
+        with building:
+            try:
+                cov = self._opened(key)
+                if cov is None:
+                    cov = self._load(key)
+                    if cov is None:
+                        cov = self._compute(key, store, adjuster, window, end)
+                        self._prune()
+                    cov = self._remember(key, cov)
+            finally:
+                with self._lock:
+                    self._building.pop(key, None)
+        return cov
+
+    def _prune(self) -> None:
+        """Delete the least recently used matrices beyond ``max_files``"""
+        used = []
+        for meta_path in self.path.glob("*.json"):
+            with suppress(FileNotFoundError):
+                used.append((meta_path.stat().st_mtime_ns, meta_path.stem))
+        used.sort()
+        for _, key in used[: max(len(used) - self.max_files, 0)]:
+            # Metadata first: without it the matrix is never loaded. Open
+            # mappings, here or in other processes, stay valid until closed.
+            (self.path / f"{key}.json").unlink(missing_ok=True)
+            (self.path / f"{key}.npy").unlink(missing_ok=True)
+            with self._lock:
+                self._open.pop(key, None)
+
+    def _compute(
+        self,
+        key: str,
+        store: FundamentalsStore,
+        adjuster: CorporateActionAdjuster,
+        window: int,
+        end: str,
+    ) -> CovarianceMatrix:
+        returns, _, scale = total_returns(store, adjuster, window, end)
+        if returns.shape[0] < 2:
+            raise ValueError("Need at least two return periods for a covariance")
+        n = returns.shape[1]
+        # A unique temp name, so workers building the same key concurrently
+        # never write into each other's file
+        with tempfile.NamedTemporaryFile(
+            dir=self.path, prefix=f"{key}.", suffix=".npy.tmp", delete=False
+        ) as tmp:
+            tmp_path = Path(tmp.name)
+        try:
+            out = np.lib.format.open_memmap(
+                tmp_path, mode="w+", dtype=np.float64, shape=(n, n)
+            )
+            _, delta = ledoit_wolf_covariance(returns, out, self.chunk_size)
+            out.flush()
+            del out
+            os.replace(tmp_path, self.path / f"{key}.npy")
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        atomic_write_text(
+            self.path / f"{key}.json",
+            json.dumps(
+                {
+                    "tickers": list(store.tickers),
+                    "periods_per_year": scale,
+                    "shrinkage": delta,
+                    "end": end,
+                    "window": window,
+                }
+            ),
+        )
+        return self._load(key)
+
+
+@lru_cache()
+def get_covariance_cache() -> CovarianceCache:
+    return CovarianceCache(
+        settings.COVARIANCE_CACHE_PATH,
+        max_open=settings.COVARIANCE_MAX_OPEN,
+        chunk_size=settings.COVARIANCE_CHUNK_SIZE,
+        max_files=settings.COVARIANCE_MAX_FILES,
+    )
@@ -0,0 +1,136 @@
+"""
+Ex-date / pay-date calendar index.
+
+Events are held in NumPy ``datetime64[D]`` arrays sorted by ex-date and by
+pay-date, so "what goes ex in the next N days" is two ``searchsorted`` calls
+over the whole universe. Holdings are indexed by ticker, so matching the
+window against every user's portfolio touches only the tickers in the window
+instead of scanning each user.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import col, select
+
+from ..models.dividends import DividendEvent, Holding
+
+
+@dataclass(frozen=True)
+class CalendarEntry:
+    ticker: str
+    ex_date: date
+    pay_date: Optional[date]
+    amount: float
+    is_special: bool = False
+
+
+@dataclass(frozen=True)
+class DividendAlert:
+    recipient: str
+    entry: CalendarEntry
+    shares: float
+
+    @property
+    def expected_payment(self) -> float:
+        return self.entry.amount * self.shares
+
+
+class DividendCalendar:
+    def __init__(self, entries: Iterable[CalendarEntry]):
+        self.entries: list[CalendarEntry] = list(entries)
+        ex = np.array([e.ex_date for e in self.entries], dtype="datetime64[D]")
+        pay = np.array(
+            [e.pay_date or np.datetime64("NaT") for e in self.entries],
+            dtype="datetime64[D]",
+        )
+        # argsort places NaT last, so events without a pay-date never match
+        self._by_ex = np.argsort(ex, kind="stable")
+        self._ex_sorted = ex[self._by_ex]
+        self._by_pay = np.argsort(pay, kind="stable")
+        self._pay_sorted = pay[self._by_pay]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def _range(
+        sorted_dates: np.ndarray, order: np.ndarray, start: date, end: date
+    ) -> np.ndarray:
+        lo = np.searchsorted(sorted_dates, np.datetime64(start, "D"), side="left")
+        hi = np.searchsorted(sorted_dates, np.datetime64(end, "D"), side="right")
+        return order[lo:hi]
+
+    def ex_dividends_between(self, start: date, end: date) -> list[CalendarEntry]:
+        """Entries with ``start <= ex_date <= end``, ordered by ex-date"""
+        idx = self._range(self._ex_sorted, self._by_ex, start, end)
+        return [self.entries[i] for i in idx]
+
+    def payments_between(self, start: date, end: date) -> list[CalendarEntry]:
+        """Entries with ``start <= pay_date <= end``, ordered by pay-date"""
+        idx = self._range(self._pay_sorted, self._by_pay, start, end)
+        return [self.entries[i] for i in idx]
+
+    def upcoming_ex_dividends(
+        self, days: int, today: Optional[date] = None
+    ) -> list[CalendarEntry]:
+        today = today or date.today()
+        return self.ex_dividends_between(today, today + timedelta(days=days))
+
+
+class HoldingsIndex:
+    """Ticker -> [(recipient, shares)] inverted index over all users"""
+
+    def __init__(self, holdings: Iterable[tuple[str, str, float]]):
+        self._by_ticker: dict[str, list[tuple[str, float]]] = defaultdict(list)
+        for recipient, ticker, shares in holdings:
+            self._by_ticker[ticker].append((recipient, shares))
+
+    def holders(self, ticker: str) -> list[tuple[str, float]]:
+        return self._by_ticker.get(ticker, [])
+
+
+def group_alerts_by_recipient(
+    entries: Sequence[CalendarEntry], holdings: HoldingsIndex
+) -> dict[str, list[DividendAlert]]:
+    """Join calendar entries with holders, one alert list per recipient"""
+    alerts: dict[str, list[DividendAlert]] = defaultdict(list)
+    for entry in entries:
+        for recipient, shares in holdings.holders(entry.ticker):
+            alerts[recipient].append(DividendAlert(recipient, entry, shares))
+    return dict(alerts)
+
+
+async def load_dividend_calendar(
+    session: AsyncSession, start: Optional[date] = None
+) -> DividendCalendar:
+    """Load every event going ex or paying on/after ``start`` (default today)"""
+    start = start or date.today()
+    result = await session.execute(
+        select(DividendEvent).where(
+            (DividendEvent.ex_date >= start) | (col(DividendEvent.pay_date) >= start)
+        )
+    )
+    return DividendCalendar(
+        CalendarEntry(e.ticker, e.ex_date, e.pay_date, e.amount, e.is_special)
+        for e in result.scalars()
+    )
+
+
+async def load_holdings_index(
+    session: AsyncSession, tickers: Iterable[str]
+) -> HoldingsIndex:
+    """Load holdings for ``tickers`` only"""
+    tickers = set(tickers)
+    if not tickers:
+        return HoldingsIndex([])
+    result = await session.execute(
+        select(Holding.user_email, Holding.ticker, Holding.shares).where(
+            col(Holding.ticker).in_(tickers)
+        )
+    )
+    return HoldingsIndex(result.tuples())
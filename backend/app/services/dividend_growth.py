@@ -0,0 +1,212 @@
+"""
+Every-window dividend growth for a whole universe at once.
+
+Input is a ``tickers x years`` matrix of annual dividends per share. Logs of
+the dividends are taken once; a window's CAGR is then a difference of two
+log levels, and running (cumulative) counts of invalid years tell whether a
+window spans a cut or a gap. One pass over the matrix yields the CAGR of
+every window ending at every year, alongside YoY growth, growth velocity and
+a recency-weighted average of YoY growth.
+
+Units follow ``formulas``: CAGRs are fractions (as in
+``compound_annual_growth_rate``), YoY growth and velocity are percentages
+(as in ``simple_annual_growth_rate``/``dividend_growth_velocity``).
+
+A year is invalid when its dividend is missing or not positive (a
+suspension). Any window touching an invalid year is NaN, as is any window
+reaching back before the first year, so a cut to zero resets the history
+instead of producing a meaningless rate across it.
+"""
+
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+import numpy as np
+
+from formulas.growth_and_projection import chowder_number
+
+from ..core.columnar_store import FundamentalsStore
+from .corporate_actions import get_corporate_action_adjuster
+
+GROWTH_WINDOWS = (1, 3, 5, 10, 20)
+
+
+def _window_diff(cumulative: np.ndarray, window: int) -> np.ndarray:
+    """``cumulative[:, t] - cumulative[:, t - window]``, NaN where t < window"""
+    out = np.full(cumulative.shape, np.nan)
+    out[:, window:] = cumulative[:, window:] - cumulative[:, :-window]
+    return out
+
+
+@dataclass
+class DividendGrowth:
+    tickers: list[str]
+    years: list[int]
+    cagr: dict[int, np.ndarray] = field(default_factory=dict)
+    weighted_yoy: dict[int, np.ndarray] = field(default_factory=dict)
+    yoy: Optional[np.ndarray] = None
+    velocity: Optional[np.ndarray] = None
+
+    def chowder(self, dividend_yield: np.ndarray) -> np.ndarray:
+        """``chowder_number`` per ticker and year from a yield (%) matrix"""
+        return chowder_number(np.asarray(dividend_yield), self.cagr[5] * 100)
+
+    def latest(self, ticker: str) -> dict[str, Optional[float]]:
+        row = self.tickers.index(ticker)
+
+        def value(matrix: np.ndarray) -> Optional[float]:
+            if not matrix.shape[1]:
+                return None
+            v = float(matrix[row, -1])
+            return v if np.isfinite(v) else None
+
+        return {
+            **{f"cagr_{w}y": value(m) for w, m in self.cagr.items()},
+            **{f"weighted_yoy_{w}y": value(m) for w, m in self.weighted_yoy.items()},
+            "yoy": value(self.yoy),
+            "velocity": value(self.velocity),
+        }
+
+
+def compute_dividend_growth(
+    dividends: np.ndarray,
+    tickers: Sequence[str],
+    years: Sequence[int],
+    windows: Sequence[int] = GROWTH_WINDOWS,
+) -> DividendGrowth:
+    """Growth of every window ending at every year, for every ticker"""
+    dividends = np.asarray(dividends, dtype=np.float64)
+    n_years = dividends.shape[1]
+    valid = np.isfinite(dividends) & (dividends > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_dividends = np.where(valid, np.log(dividends), np.nan)
+
+    # invalid[:, t] counts invalid years in 0..t-1, so the window of years
+    # t-w..t is clean when invalid[:, t+1] - invalid[:, t-w] is zero
+    invalid = np.zeros((dividends.shape[0], n_years + 1))
+    invalid[:, 1:] = np.cumsum(~valid, axis=1)
+
+    result = DividendGrowth(list(tickers), list(years))
+    for window in windows:
+        if window >= n_years:
+            result.cagr[window] = np.full(dividends.shape, np.nan)
+            continue
+        clean = np.zeros(dividends.shape, dtype=bool)
+        clean[:, window:] = (
+            invalid[:, window + 1 :] - invalid[:, : n_years - window]
+        ) == 0
+        log_growth = _window_diff(log_dividends, window)
+        result.cagr[window] = np.where(clean, np.expm1(log_growth / window), np.nan)
+
+    yoy = result.cagr[1] * 100 if 1 in result.cagr else None
+    if yoy is None:
+        yoy = np.full(dividends.shape, np.nan)
+        yoy[:, 1:] = (dividends[:, 1:] / dividends[:, :-1] - 1) * 100
+        yoy[:, 1:][~(valid[:, 1:] & valid[:, :-1])] = np.nan
+    result.yoy = yoy
+
+    # dividend_growth_velocity: +/-inf when the previous growth was exactly 0
+    velocity = np.full(dividends.shape, np.nan)
+    current, previous = yoy[:, 1:], yoy[:, :-1]
+    velocity[:, 1:] = np.where(
+        previous == 0,
+        np.where(current > 0, np.inf, -np.inf),
+        current - previous,
+    )
+    velocity[:, 1:][np.isnan(current) | np.isnan(previous)] = np.nan
+    result.velocity = velocity
+
+    # Linearly recency-weighted mean of YoY growth (weights 1..w), the
+    # vectorized ``weighted_average_growth_rate``; from two running sums
+    t = np.arange(n_years, dtype=np.float64)
+    filled = np.nan_to_num(yoy)
+    s1 = np.zeros((dividends.shape[0], n_years + 1))
+    s2 = np.zeros_like(s1)
+    s1[:, 1:] = np.cumsum(filled, axis=1)
+    s2[:, 1:] = np.cumsum(filled * t, axis=1)
+    missing = np.zeros_like(s1)
+    missing[:, 1:] = np.cumsum(np.isnan(yoy), axis=1)
+    for window in windows:
+        out = np.full(dividends.shape, np.nan)
+        if window < n_years:
+            hi, lo = slice(window + 1, None), slice(1, n_years - window + 1)
+            start = t[window:] - window  # weight is (year - start)
+            weighted = (s2[:, hi] - s2[:, lo]) - start * (s1[:, hi] - s1[:, lo])
+            complete = (missing[:, hi] - missing[:, lo]) == 0
+            out[:, window:] = np.where(
+                complete, weighted / (window * (window + 1) / 2), np.nan
+            )
+        result.weighted_yoy[window] = out
+    return result
+
+
+def annual_matrix(
+    store: FundamentalsStore, field: str, tickers: Optional[Sequence[str]] = None
+) -> tuple[np.ndarray, list[int]]:
+    """
+    ``tickers x years`` from the store: each calendar year's last reported
+    value of ``field``, split/spin-off adjusted.
+    """
+    column = np.asarray(
+        get_corporate_action_adjuster().adjusted_matrix(store, field, tickers)
+    )
+    period_years = np.array([int(p[:4]) for p in store.periods], dtype=np.int64)
+    if not period_years.size:
+        return np.empty((column.shape[0], 0)), []
+    years = np.arange(period_years.min(), period_years.max() + 1)
+
+    annual = np.full((column.shape[0], years.size), np.nan)
+    # Periods are sorted, so walking them in order leaves each year's last value
+    for col, year in enumerate(period_years):
+        present = ~np.isnan(column[:, col])
+        annual[present, year - years[0]] = column[present, col]
+    return annual, years.tolist()
+
+
+def annual_dividend_matrix(
+    store: FundamentalsStore, tickers: Optional[Sequence[str]] = None
+) -> tuple[np.ndarray, list[int]]:
+    return annual_matrix(store, "dividend_per_share", tickers)
+
+
+def annual_dividend_yield(
+    store: FundamentalsStore, tickers: Optional[Sequence[str]] = None
+) -> np.ndarray:
+    """Each year's dividend yield (%): that year's dividend over its last price"""
+    dividends, _ = annual_dividend_matrix(store, tickers)
+    prices, _ = annual_matrix(store, "stock_price", tickers)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(prices > 0, dividends / prices * 100, np.nan)
+
+
+def _latest_per_row(matrix: np.ndarray) -> np.ndarray:
+    valid = ~np.isnan(matrix)
+    if not matrix.shape[1]:
+        return np.full(matrix.shape[0], np.nan)
+    last = matrix.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    values = matrix[np.arange(matrix.shape[0]), last]
+    return np.where(valid.any(axis=1), values, np.nan)
+
+
+def latest_dividend_yield(
+    store: FundamentalsStore, tickers: Optional[Sequence[str]] = None
+) -> np.ndarray:
+    """Today's yield (%): latest dividend over latest price, both adjusted"""
+    adjuster = get_corporate_action_adjuster()
+    dividends = _latest_per_row(
+        np.asarray(adjuster.adjusted_matrix(store, "dividend_per_share", tickers))
+    )
+    prices = _latest_per_row(
+        np.asarray(adjuster.adjusted_matrix(store, "stock_price", tickers))
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(prices > 0, dividends / prices * 100, np.nan)
+
+
+def dividend_growth_from_store(
+    store: FundamentalsStore, tickers: Optional[Sequence[str]] = None
+) -> DividendGrowth:
+    annual, years = annual_dividend_matrix(store, tickers)
+    return compute_dividend_growth(
+        annual, store.tickers if tickers is None else tickers, years
+    )
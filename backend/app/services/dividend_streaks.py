@@ -0,0 +1,316 @@
+"""
+Consecutive-payment and consecutive-increase streaks from raw dividend events.
+
+Special dividends are ignored. Year-over-year comparisons use each year's
+closing *run rate*, the last regular payment times the payment frequency.
+The frequency is inferred from the median of the last three gaps between
+ex-dates and snapped to annual, semi-annual, quarterly or monthly. A switch
+from quarterly $0.30 to monthly $0.10 is therefore flat, not a cut, and
+the mixed year in which the switch happens does not count as a cut either.
+
+Each ticker keeps a small ``StreakState``: its closing rate, the streaks
+through the previous year and its last few gaps. A payment newer than
+everything seen so far updates the state in O(1). An older or amended
+event rebuilds only that ticker from its full history. ``snapshot`` turns
+every state into streaks and ``classify_dividend_stocks`` labels for the
+whole universe at once.
+
+Amounts are split/spin-off adjusted, so a 2-for-1 split halving the
+per-share dividend is not read as a cut; a new corporate action rebuilds
+the affected tickers (``refresh_tickers``).
+
+Requests and the sync loop share one tracker per process, so syncs and
+refreshes run one at a time behind an ``asyncio.Lock``.
+"""
+
+import asyncio
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import col, select
+
+from formulas.historical_and_trend_analysis import classify_dividend_stocks
+
+from ..core.config import settings
+from ..models.dividends import DividendEvent
+from .corporate_actions import CorporateActionAdjuster, get_corporate_action_adjuster
+
+FREQUENCIES = np.array([1, 2, 4, 12])
+GAP_WINDOW = 3
+INCREASE_TOLERANCE = 1e-9  # relative; rounding noise is not an increase
+
+
+def payment_frequency(median_gap_days: float) -> int:
+    """Snap a typical ex-date gap to 1, 2, 4 or 12 payments a year"""
+    if not median_gap_days > 0:
+        return 1
+    per_year = 365.25 / median_gap_days
+    return int(FREQUENCIES[np.argmin(np.abs(np.log(per_year / FREQUENCIES)))])
+
+
+@dataclass
+class StreakState:
+    year: int  # year of the latest regular payment
+    rate: float  # run rate after the latest payment
+    prior_rate: Optional[float]  # closing rate of year - 1, if it paid
+    payment_streak_before: int  # consecutive paying years through year - 1
+    increase_streak_before: int  # consecutive increases through year - 1
+    last_ex_date: date
+    recent_gaps: deque = field(default_factory=lambda: deque(maxlen=GAP_WINDOW))
+
+    @classmethod
+    def from_history(
+        cls, ex_dates: np.ndarray, amounts: np.ndarray
+    ) -> Optional["StreakState"]:
+        """Build from regular (non-special) payments; ``None`` if there are none"""
+        order = np.argsort(ex_dates, kind="stable")
+        ex_dates = np.asarray(ex_dates, dtype="datetime64[D]")[order]
+        amounts = np.asarray(amounts, dtype=np.float64)[order]
+        if not ex_dates.size:
+            return None
+
+        gaps = np.diff(ex_dates).astype(np.int64)
+        median_gaps = np.full(ex_dates.size, np.nan)
+        for i in range(1, min(GAP_WINDOW, ex_dates.size)):
+            median_gaps[i] = np.median(gaps[:i])
+        if gaps.size >= GAP_WINDOW:
+            windows = np.lib.stride_tricks.sliding_window_view(gaps, GAP_WINDOW)
+            median_gaps[GAP_WINDOW:] = np.median(windows, axis=1)
+        frequency = np.array([payment_frequency(g) for g in median_gaps])
+        rates = amounts * frequency
+
+        years = ex_dates.astype("datetime64[Y]").astype(np.int64) + 1970
+        unique_years, first = np.unique(years, return_index=True)
+        closing = rates[np.r_[first[1:] - 1, years.size - 1]]
+
+        # Streak ending at each year via the running index of the last break
+        idx = np.arange(unique_years.size)
+        consecutive = np.r_[False, np.diff(unique_years) == 1]
+        increased = (
+            consecutive
+            & np.r_[False, closing[1:] > closing[:-1] * (1 + INCREASE_TOLERANCE)]
+        )
+        payments = idx - np.maximum.accumulate(np.where(consecutive, 0, idx)) + 1
+        increases = idx - np.maximum.accumulate(np.where(increased, 0, idx))
+
+        chained = unique_years.size > 1 and bool(consecutive[-1])
+        return cls(
+            year=int(unique_years[-1]),
+            rate=float(rates[-1]),
+            prior_rate=float(closing[-2]) if chained else None,
+            payment_streak_before=int(payments[-2]) if chained else 0,
+            increase_streak_before=int(increases[-2]) if chained else 0,
+            last_ex_date=ex_dates[-1].astype(date),
+            recent_gaps=deque(gaps[-GAP_WINDOW:].tolist(), maxlen=GAP_WINDOW),
+        )
+
+    @property
+    def increased(self) -> bool:
+        return self.prior_rate is not None and self.rate > self.prior_rate * (
+            1 + INCREASE_TOLERANCE
+        )
+
+    def add_payment(self, ex_date: date, amount: float) -> None:
+        """Advance by one regular payment later than ``last_ex_date``"""
+        self.recent_gaps.append((ex_date - self.last_ex_date).days)
+        rate = amount * payment_frequency(float(np.median(self.recent_gaps)))
+        if ex_date.year != self.year:
+            if ex_date.year == self.year + 1:
+                increases = self.increase_streak_before + 1 if self.increased else 0
+                self.payment_streak_before += 1
+                self.increase_streak_before = increases
+                self.prior_rate = self.rate
+            else:
+                self.payment_streak_before = 0
+                self.increase_streak_before = 0
+                self.prior_rate = None
+            self.year = ex_date.year
+        self.rate = rate
+        self.last_ex_date = ex_date
+
+
+@dataclass
+class StreakSnapshot:
+    tickers: list[str]
+    payment_streaks: np.ndarray
+    increase_streaks: np.ndarray
+    classifications: np.ndarray
+
+    def row(self, i: int) -> dict:
+        return {
+            "ticker": self.tickers[i],
+            "consecutive_payment_years": int(self.payment_streaks[i]),
+            "consecutive_increase_years": int(self.increase_streaks[i]),
+            "classification": str(self.classifications[i]),
+        }
+
+
+def classify_streaks(years: np.ndarray) -> np.ndarray:
+    """``classify_dividend_stocks`` over an array, once per distinct value"""
+    unique, inverse = np.unique(np.asarray(years, dtype=np.int64), return_inverse=True)
+    labels = np.array([classify_dividend_stocks(int(y)) for y in unique], dtype=object)
+    return labels[inverse].reshape(np.shape(years))
+
+
+class DividendStreakTracker:
+    def __init__(self, adjuster: Optional[CorporateActionAdjuster] = None):
+        self.adjuster = adjuster or CorporateActionAdjuster()
+        self.states: dict[str, StreakState] = {}
+        self.synced_at: Optional[datetime] = None
+        self._applied: dict[int, datetime] = {}  # event id -> updated_at
+        self._lock = asyncio.Lock()
+
+    def rebuild(self, ticker: str, events: Iterable[tuple[date, float, bool]]) -> None:
+        """Replace a ticker's state from ``(ex_date, amount, is_special)`` events"""
+        regular = [(ex, amount) for ex, amount, special in events if not special]
+        ex_dates = np.array([ex for ex, _ in regular], dtype="datetime64[D]")
+        amounts = np.array([amount for _, amount in regular], dtype=np.float64)
+        state = StreakState.from_history(
+            ex_dates, self.adjuster.adjust(ticker, ex_dates, amounts)
+        )
+        if state is None:
+            self.states.pop(ticker, None)
+        else:
+            self.states[ticker] = state
+
+    def add_payment(
+        self, ticker: str, ex_date: date, amount: float, is_special: bool = False
+    ) -> bool:
+        """
+        Apply one new event; returns ``False`` when it is not newer than the
+        ticker's latest payment, in which case the caller should ``rebuild``
+        """
+        if is_special:
+            return True
+        state = self.states.get(ticker)
+        if state is None:
+            self.rebuild(ticker, [(ex_date, amount, False)])
+            return True
+        if ex_date <= state.last_ex_date:
+            return False
+        factor = self.adjuster.factors(ticker).at(np.datetime64(ex_date, "D"))
+        state.add_payment(ex_date, amount * float(factor))
+        return True
+
+    def snapshot(
+        self,
+        as_of: Optional[date] = None,
+        tickers: Optional[Sequence[str]] = None,
+        basis: str = "increases",
+    ) -> StreakSnapshot:
+        """
+        Streaks as of ``as_of`` for every (or the given) ticker.
+
+        A streak survives a current year with no payment or no raise yet
+        and breaks once a whole calendar year passes without one.
+        ``basis`` picks which streak is classified.
+        """
+        as_of = as_of or date.today()
+        tickers = list(self.states if tickers is None else tickers)
+        states = [self.states.get(t) for t in tickers]
+        year = np.array([s.year if s else -1 for s in states])
+        increased = np.array([s.increased if s else False for s in states])
+        payments_before = np.array(
+            [s.payment_streak_before if s else 0 for s in states]
+        )
+        increases_before = np.array(
+            [s.increase_streak_before if s else 0 for s in states]
+        )
+
+        current = year == as_of.year
+        alive = current | (year == as_of.year - 1)
+        payment_streaks = np.where(alive, payments_before + 1, 0)
+        increase_streaks = np.where(
+            alive & increased,
+            increases_before + 1,
+            np.where(current, increases_before, 0),
+        )
+        streaks = payment_streaks if basis == "payments" else increase_streaks
+        return StreakSnapshot(
+            tickers, payment_streaks, increase_streaks, classify_streaks(streaks)
+        )
+
+    async def refresh_tickers(
+        self, session: AsyncSession, tickers: Iterable[str]
+    ) -> None:
+        """Rebuild tickers from their full history, e.g. after a split"""
+        async with self._lock:
+            await self._refresh_tickers(session, tickers)
+
+    async def _refresh_tickers(
+        self, session: AsyncSession, tickers: Iterable[str]
+    ) -> None:
+        result = await session.execute(
+            select(
+                DividendEvent.ticker,
+                DividendEvent.ex_date,
+                DividendEvent.amount,
+                DividendEvent.is_special,
+            ).where(col(DividendEvent.ticker).in_(set(tickers)))
+        )
+        history: dict[str, list[tuple[date, float, bool]]] = defaultdict(list)
+        for ticker, ex_date, amount, is_special in result.tuples():
+            history[ticker].append((ex_date, amount, is_special))
+        for ticker, events in history.items():
+            self.rebuild(ticker, events)
+
+    async def sync_from_db(self, session: AsyncSession) -> set[str]:
+        """
+        Apply events updated since the last sync; returns touched tickers.
+
+        Writers stamp ``updated_at`` before they commit, so the last
+        ``DIVIDEND_SYNC_OVERLAP_SECONDS`` are re-read to catch late rows.
+        Events already applied with the same stamp are skipped.
+        """
+        async with self._lock:
+            return await self._sync(session)
+
+    async def _sync(self, session: AsyncSession) -> set[str]:
+        overlap = timedelta(seconds=settings.DIVIDEND_SYNC_OVERLAP_SECONDS)
+        stmt = select(DividendEvent).order_by(DividendEvent.ex_date)
+        if self.synced_at is not None:
+            stmt = stmt.where(DividendEvent.updated_at > self.synced_at - overlap)
+        changed: dict[str, list[DividendEvent]] = defaultdict(list)
+        for event in (await session.execute(stmt)).scalars():
+            if self._applied.get(event.id) != event.updated_at:
+                changed[event.ticker].append(event)
+        if not changed:
+            return set()
+
+        if self.synced_at is None:
+            for ticker, events in changed.items():
+                self.rebuild(
+                    ticker, [(e.ex_date, e.amount, e.is_special) for e in events]
+                )
+        else:
+            stale = [
+                ticker
+                for ticker, events in changed.items()
+                if not all(
+                    self.add_payment(ticker, e.ex_date, e.amount, e.is_special)
+                    for e in events
+                )
+            ]
+            if stale:
+                await self._refresh_tickers(session, stale)
+
+        events = [e for es in changed.values() for e in es]
+        latest = max(e.updated_at for e in events)
+        self.synced_at = max(latest, self.synced_at or latest)
+        self._applied.update((e.id, e.updated_at) for e in events)
+        self._applied = {
+            id: stamp
+            for id, stamp in self._applied.items()
+            if stamp > self.synced_at - overlap
+        }
+        return set(changed)
+
+
+@lru_cache()
+def get_streak_tracker() -> DividendStreakTracker:
+    return DividendStreakTracker(get_corporate_action_adjuster())
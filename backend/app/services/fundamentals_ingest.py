@@ -0,0 +1,296 @@
+"""
+Bulk validation and loading of fundamentals batches.
+
+Validating one Pydantic model per record dominates ingestion CPU at
+millions of rows, so batches are checked column by column instead, with the
+same rules as ``Fundamental``: ``ticker`` a non-empty string of at most 16
+characters (upper-cased), ``period_end`` an ISO ``YYYY-MM-DD`` date and
+every numeric field a finite number or null. Fields the model does not
+have reject the whole batch, in records as in columns, so a misspelt key
+never silently blanks a column.
+
+Each column is converted and checked with whole-array NumPy operations
+(dates on their character codes); only the rows that fail are revisited
+one by one to word their error. Bad rows become ``RowError``s and are
+dropped, the rest of the batch goes on.
+When a batch repeats a (ticker, period_end) the last occurrence wins and
+the earlier ones are reported.
+
+``load_fundamentals`` writes the valid rows with one multi-row INSERT (and
+one UPDATE by primary key for rows that already exist) per chunk. Each
+chunk is stamped and committed on its own, so its ``updated_at`` is at
+most one chunk older than its commit; the store writer picks the rows up
+on its next sync, which looks back far enough to cover that gap.
+"""
+
+from dataclasses import dataclass, field
+from itertools import chain
+from datetime import date, datetime, timezone
+from operator import itemgetter
+from typing import Any, Iterable, Mapping, Optional, Sequence, Union
+
+import numpy as np
+from sqlalchemy import insert, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from ..models.fundamentals import FUNDAMENTAL_FIELDS, Fundamental
+
+FIELDS = ("ticker", "period_end", *FUNDAMENTAL_FIELDS)
+TICKER_MAX_LENGTH = 16
+LOAD_CHUNK = 5000  # rows per INSERT/UPDATE statement
+_DATE_DIGITS = [0, 1, 2, 3, 5, 6, 8, 9]  # YYYY-MM-DD
+_FIRST_DAY = np.datetime64("0001-01-01", "D")  # keeps day numbers non-negative
+
+Payload = Union[Sequence[Mapping[str, Any]], Mapping[str, Sequence[Any]]]
+
+
+@dataclass(frozen=True)
+class RowError:
+    row: int  # position in the submitted batch
+    field: str
+    message: str
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"row": self.row, "field": self.field, "message": self.message}
+
+
+@dataclass
+class ValidatedFundamentals:
+    received: int
+    rows: np.ndarray  # batch positions of the valid rows
+    tickers: list[str]
+    periods: np.ndarray  # datetime64[D]
+    values: dict[str, np.ndarray]  # float64, NaN = null
+    errors: list[RowError] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def records(
+        self, start: int = 0, stop: Optional[int] = None
+    ) -> list[dict[str, Any]]:
+        """Valid rows as DB parameter dicts (None for nulls)"""
+        window = slice(start, stop)
+        columns = {
+            "ticker": self.tickers[window],
+            "period_end": self.periods[window].astype(object).tolist(),
+        }
+        for name, values in self.values.items():
+            chunk = values[window]
+            columns[name] = np.where(np.isnan(chunk), None, chunk).tolist()
+        return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+
+def _check_fields(names: Iterable[str]) -> None:
+    unknown = set(names) - set(FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+
+def _columns(payload: Payload) -> tuple[int, dict[str, Sequence[Any]]]:
+    """Column lists from a list of records or a mapping of columns"""
+    if isinstance(payload, Mapping):
+        if not all(isinstance(v, list) for v in payload.values()) or (
+            len({len(v) for v in payload.values()}) > 1
+        ):
+            raise ValueError("Columns must be lists of the same length")
+        _check_fields(payload)
+        return len(next(iter(payload.values()), [])), dict(payload)
+    if not isinstance(payload, list) or set(map(type, payload)) - {dict}:
+        raise ValueError("Expected a list of records or a mapping of columns")
+    _check_fields(chain.from_iterable(payload))  # every key of every record
+    try:
+        # Transposed in C when every record carries every field (nulls included)
+        return len(payload), dict(zip(FIELDS, zip(*map(itemgetter(*FIELDS), payload))))
+    except KeyError:
+        return len(payload), {name: [r.get(name) for r in payload] for name in FIELDS}
+
+
+def _validate_tickers(
+    values: Sequence[Any], errors: list[RowError]
+) -> tuple[np.ndarray, np.ndarray]:
+    if values and set(map(type, values)) == {str}:
+        tickers = np.char.upper(np.char.strip(np.array(values, dtype=str)))
+        lengths = np.char.str_len(tickers)
+        ok = (lengths > 0) & (lengths <= TICKER_MAX_LENGTH)
+    else:
+        tickers = np.array([v if isinstance(v, str) else "" for v in values])
+        ok = np.zeros(len(values), dtype=bool)
+    for i in np.flatnonzero(~ok):
+        value = values[i]
+        if isinstance(value, str) and 0 < len(value.strip()) <= TICKER_MAX_LENGTH:
+            tickers[i] = value.strip().upper()
+            ok[i] = True
+            continue
+        if value is None:
+            message = "Field required"
+        elif not isinstance(value, str):
+            message = "Input should be a valid string"
+        else:
+            message = f"Ticker must be 1-{TICKER_MAX_LENGTH} characters"
+        errors.append(RowError(int(i), "ticker", message))
+    return tickers, ok
+
+
+def _parse_dates(values: Sequence[Any]) -> tuple[np.ndarray, np.ndarray]:
+    """Strict ``YYYY-MM-DD`` parse of a column, checked on the character codes"""
+    text = np.array(
+        (
+            values
+            if set(map(type, values)) == {str}
+            else [v if isinstance(v, str) else "" for v in values]
+        ),
+        dtype="U11",  # one character wider than a date, to catch longer strings
+    )
+    codes = text.view(np.uint32).reshape(len(values), 11)
+    digits = codes[:, _DATE_DIGITS].astype(np.int64) - ord("0")
+    ok = (
+        (codes[:, 4] == ord("-"))
+        & (codes[:, 7] == ord("-"))
+        & (codes[:, 10] == 0)
+        & np.all((digits >= 0) & (digits <= 9), axis=1)
+    )
+    year, month, day = (
+        digits[:, s] @ 10 ** np.arange(s.stop - s.start)[::-1]
+        for s in (slice(0, 4), slice(4, 6), slice(6, 8))
+    )
+    ok &= (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1)
+    months = np.where(ok, (year - 1970) * 12 + month - 1, 0).astype("datetime64[M]")
+    periods = months.astype("datetime64[D]") + np.where(ok, day - 1, 0)
+    ok &= periods.astype("datetime64[M]") == months  # day within its month
+    return periods, ok
+
+
+def _validate_periods(
+    values: Sequence[Any], errors: list[RowError]
+) -> tuple[np.ndarray, np.ndarray]:
+    periods, ok = _parse_dates(values)
+    for i in np.flatnonzero(~ok):
+        value = values[i]
+        if isinstance(value, date) and not isinstance(value, datetime):
+            periods[i], ok[i] = value, True
+            continue
+        message = (
+            "Field required"
+            if value is None
+            else "Input should be a valid date (YYYY-MM-DD)"
+        )
+        errors.append(RowError(int(i), "period_end", message))
+    return periods, ok
+
+
+def _validate_numbers(
+    name: str, values: Sequence[Any], errors: list[RowError]
+) -> tuple[np.ndarray, np.ndarray]:
+    wrong_type = np.zeros(len(values), dtype=bool)
+    try:
+        # None becomes NaN; numeric strings parse, as in Pydantic's lax mode
+        numbers = np.array(values, dtype=np.float64)
+        if numbers.ndim != 1:
+            raise ValueError  # nested lists
+    except (TypeError, ValueError, OverflowError):  # ints beyond float range
+        numbers = np.full(len(values), np.nan)
+        for i, value in enumerate(values):
+            if value is None:
+                continue
+            try:
+                if isinstance(value, bytes):
+                    raise TypeError
+                numbers[i] = float(value)
+            except (TypeError, ValueError, OverflowError):
+                wrong_type[i] = True
+                errors.append(RowError(i, name, "Input should be a valid number"))
+    # JSON has no NaN literal, so a NaN that was not a null came from a string
+    not_finite = ~np.isfinite(numbers) & ~wrong_type
+    for i in np.flatnonzero(not_finite):
+        if values[i] is None:
+            not_finite[i] = False
+        else:
+            errors.append(RowError(int(i), name, "Input should be a finite number"))
+    numbers[~np.isfinite(numbers)] = np.nan
+    return numbers, ~(wrong_type | not_finite)
+
+
+def validate_fundamentals(payload: Payload) -> ValidatedFundamentals:
+    """
+    Validate a whole batch (list of records or mapping of columns); raises
+    ``ValueError`` only when the batch itself is malformed
+    """
+    received, columns = _columns(payload)
+    errors: list[RowError] = []
+    tickers, ok = _validate_tickers(columns.get("ticker", [None] * received), errors)
+    periods, periods_ok = _validate_periods(
+        columns.get("period_end", [None] * received), errors
+    )
+    ok &= periods_ok
+    values: dict[str, np.ndarray] = {}
+    for name in FUNDAMENTAL_FIELDS:
+        if name not in columns:  # a submitted row replaces the whole period
+            values[name] = np.full(received, np.nan)
+            continue
+        values[name], valid = _validate_numbers(name, columns[name], errors)
+        ok &= valid
+
+    # Last occurrence of a (ticker, period_end) wins: number each key, then
+    # find its last valid row by taking first occurrences in reverse order
+    candidates = np.flatnonzero(ok)
+    _, codes = np.unique(tickers[candidates], return_inverse=True)
+    days = (periods[candidates] - _FIRST_DAY).astype(np.int64)  # < 2**22
+    keys = codes.astype(np.int64) << 32 | days
+    _, first, inverse = np.unique(keys[::-1], return_index=True, return_inverse=True)
+    winners = candidates[::-1][first][inverse][::-1]
+    for i in np.flatnonzero(winners != candidates):
+        row, winner = int(candidates[i]), int(winners[i])
+        ok[row] = False
+        errors.append(RowError(row, "period_end", f"Superseded by row {winner}"))
+
+    rows = np.flatnonzero(ok)
+    errors.sort(key=lambda e: (e.row, e.field))
+    return ValidatedFundamentals(
+        received=received,
+        rows=rows,
+        tickers=tickers[rows].tolist(),
+        periods=periods[rows],
+        values={name: column[rows] for name, column in values.items()},
+        errors=errors,
+    )
+
+
+async def load_fundamentals(
+    session: AsyncSession, batch: ValidatedFundamentals, chunk_size: int = LOAD_CHUNK
+) -> tuple[int, int]:
+    """
+    Insert new (ticker, period_end) rows and overwrite existing ones, bumping
+    ``updated_at`` so the store sync sees them. Returns (inserted, updated).
+
+    Chunks commit one by one: if a chunk fails, the earlier ones stay
+    loaded, and resending the batch is safe.
+    """
+    inserted = updated = 0
+    for start in range(0, len(batch), chunk_size):
+        now = datetime.now(timezone.utc)
+        records = batch.records(start, start + chunk_size)
+        keys = [(r["ticker"], r["period_end"]) for r in records]
+        result = await session.execute(
+            select(Fundamental.id, Fundamental.ticker, Fundamental.period_end).where(
+                tuple_(Fundamental.ticker, Fundamental.period_end).in_(keys)
+            )
+        )
+        existing = {(ticker, period): id_ for id_, ticker, period in result}
+        new, changed = [], []
+        for record in records:
+            record["updated_at"] = now
+            id_ = existing.get((record["ticker"], record["period_end"]))
+            if id_ is None:
+                new.append(record)
+            else:
+                changed.append({"id": id_, **record})
+        if new:
+            await session.execute(insert(Fundamental), new)
+        if changed:
+            await session.execute(update(Fundamental), changed)
+        await session.commit()
+        inserted += len(new)
+        updated += len(changed)
+    return inserted, updated
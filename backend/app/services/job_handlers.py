@@ -0,0 +1,114 @@
+"""
+CPU-bound analyses run through the job queue.
+
+Every handler is a top-level function ``handler(params, progress)`` so it can
+be pickled into a worker process; it must return JSON-serialisable data.
+"""
+
+from functools import lru_cache
+from typing import Any, Callable
+
+import numpy as np
+
+from formulas.quality_and_sustainability_metrics import calculate_moat_score
+from formulas.risk_adjusted_return_metrics import annualized_return, total_return
+
+from ..core.config import settings
+from ..core.jobs import JobHandler, JobManager, JobStore
+
+Progress = Callable[..., None]
+
+
+def monte_carlo_ddm(params: dict[str, Any], progress: Progress) -> dict[str, Any]:
+    """
+    Gordon growth value distribution under normally distributed required
+    return and growth; draws with r <= g are discarded rather than raising.
+    """
+    simulations = int(params.get("simulations", 100_000))
+    chunks = max(1, min(20, simulations // 10_000))
+    rng = np.random.default_rng(params.get("seed"))
+    dividend = float(params["next_period_dividend"])
+
+    values = []
+    for i, size in enumerate(np.array_split(np.arange(simulations), chunks)):
+        r = rng.normal(
+            params["required_return"], params.get("required_return_sd", 0.01), size.size
+        )
+        g = rng.normal(
+            params["growth_rate"], params.get("growth_rate_sd", 0.01), size.size
+        )
+        valid = r > g
+        values.append(dividend / (r[valid] - g[valid]))
+        progress((i + 1) / chunks, f"{(i + 1) * 100 // chunks}% of draws")
+
+    values = np.concatenate(values)
+    if not values.size:
+        return {"valid_fraction": 0.0}
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return {
+        "valid_fraction": values.size / simulations,
+        "mean": float(values.mean()),
+        "median": float(p50),
+        "p5": float(p5),
+        "p95": float(p95),
+    }
+
+
+def moat_scores(params: dict[str, Any], progress: Progress) -> dict[str, Any]:
+    """``calculate_moat_score`` for every company in ``params['companies']``"""
+    companies: dict[str, dict[str, Any]] = params["companies"]
+    scores = {}
+    for i, (ticker, inputs) in enumerate(companies.items(), 1):
+        scores[ticker] = calculate_moat_score(**inputs)
+        progress(i / len(companies), ticker)
+    return scores
+
+
+def dividend_reinvestment_backtest(
+    params: dict[str, Any], progress: Progress
+) -> dict[str, Any]:
+    """Reinvest every per-period dividend at that period's price"""
+    prices = np.asarray(params["prices"], dtype=np.float64)
+    dividends = np.asarray(params["dividends"], dtype=np.float64)
+    periods_per_year = params.get("periods_per_year", 4)
+    shares = float(params.get("initial_investment", 10_000)) / prices[0]
+    received = 0.0
+    for i in range(1, len(prices)):
+        cash = shares * dividends[i]
+        received += cash
+        shares += cash / prices[i]
+        if i % 100 == 0:
+            progress(i / len(prices))
+
+    initial_value = float(params.get("initial_investment", 10_000))
+    final_value = shares * prices[-1]
+    years = (len(prices) - 1) / periods_per_year
+    return {
+        "final_value": final_value,
+        "dividends_received": received,
+        "shares": shares,
+        "total_return": total_return(final_value, initial_value, 0.0),
+        "annualized_return": (
+            annualized_return(final_value, initial_value, 0.0, years)
+            if years > 0
+            else None
+        ),
+    }
+
+
+JOB_HANDLERS: dict[str, JobHandler] = {
+    "monte_carlo_ddm": monte_carlo_ddm,
+    "moat_scores": moat_scores,
+    "dividend_reinvestment_backtest": dividend_reinvestment_backtest,
+}
+
+
+@lru_cache()
+def get_job_manager() -> JobManager:
+    return JobManager(
+        JobStore(settings.JOBS_DB_PATH),
+        JOB_HANDLERS,
+        max_workers=settings.JOBS_MAX_WORKERS,
+        result_ttl=settings.JOBS_RESULT_TTL_SECONDS,
+        formula_stats_path=settings.FORMULA_STATS_PATH,
+    )
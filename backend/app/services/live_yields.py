@@ -0,0 +1,219 @@
+"""
+Live yield push feed.
+
+Price ticks are coalesced per ticker (latest price wins) and flushed every
+``LIVE_YIELD_INTERVAL_SECONDS``: each dirty ticker's yield metrics are
+computed once, written to the shared cache, and fanned out to every
+subscriber of that ticker.
+
+Ticks reach whichever worker took the POST, while subscribers are spread
+over every worker, so ticks go through a ``PriceTickLog`` (a small SQLite
+table next to the job queue): any worker appends, and each worker's hub
+reads the rows past its own cursor before every flush. Rows older than
+``LIVE_TICK_RETENTION_SECONDS`` are dropped on append. A failed flush is
+logged and the feed carries on.
+
+Each subscriber keeps at most one pending message per ticker, so a slow
+client never accumulates a backlog - it simply receives the newest values
+when it catches up. A client whose socket cannot take a send within
+``LIVE_SEND_TIMEOUT_SECONDS`` is disconnected.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+from ..core.cache import MemoryCache, get_cache, price_metric_ttl
+from ..core.columnar_store import FundamentalsStore, get_fundamentals_store
+from ..core.config import settings
+from .yield_metrics import compute_yield_metrics, yield_cache_key
+
+logger = logging.getLogger(__name__)
+
+TICKS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ticks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticker TEXT NOT NULL,
+    price REAL NOT NULL,
+    received_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ticks_received ON ticks (received_at);
+"""
+
+
+class PriceTickLog:
+    """Append-only price ticks shared by every worker process"""
+
+    def __init__(self, path: str, retention_seconds: float = 60.0):
+        self.path = path
+        self.retention_seconds = retention_seconds
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(TICKS_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def append(self, ticks: Iterable[tuple[str, float]]) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO ticks (ticker, price, received_at) VALUES (?, ?, ?)",
+                [(ticker, price, now) for ticker, price in ticks],
+            )
+            conn.execute(
+                "DELETE FROM ticks WHERE received_at < ?",
+                (now - self.retention_seconds,),
+            )
+            conn.execute("COMMIT")
+
+    def last_id(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM ticks").fetchone()[0]
+
+    def read_since(self, after_id: int) -> tuple[int, dict[str, float]]:
+        """Latest price per ticker among rows after ``after_id``, and the new cursor"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, ticker, price FROM ticks WHERE id > ? ORDER BY id",
+                (after_id,),
+            ).fetchall()
+        prices = {ticker: price for _, ticker, price in rows}
+        return (rows[-1][0] if rows else after_id), prices
+
+
+class Subscriber:
+    def __init__(self):
+        self.tickers: set[str] = set()
+        self._pending: dict[str, dict[str, Any]] = {}
+        self._ready = asyncio.Event()
+        self.superseded = 0  # updates replaced before the client received them
+
+    def offer(self, ticker: str, message: dict[str, Any]) -> None:
+        if ticker in self._pending:
+            self.superseded += 1
+        self._pending[ticker] = message
+        self._ready.set()
+
+    async def drain(self) -> list[dict[str, Any]]:
+        """Wait for updates, then take every pending message at once"""
+        await self._ready.wait()
+        self._ready.clear()
+        pending, self._pending = self._pending, {}
+        return list(pending.values())
+
+
+class LiveYieldHub:
+    def __init__(
+        self,
+        store: FundamentalsStore,
+        cache: MemoryCache,
+        interval: float = 1.0,
+        ticks: Optional[PriceTickLog] = None,
+    ):
+        self.store = store
+        self.cache = cache
+        self.interval = interval
+        self.ticks = ticks
+        self._cursor: Optional[int] = None  # last tick log row this hub has read
+        self._prices: dict[str, float] = {}
+        self._subscribers: dict[str, set[Subscriber]] = defaultdict(set)
+
+    def publish_price(self, ticker: str, price: float) -> None:
+        """Queue a tick for this process's next flush only"""
+        self._prices[ticker] = price
+
+    async def publish_prices(self, ticks: Iterable[tuple[str, float]]) -> None:
+        """Queue ticks for every worker's hub (just this one without a tick log)"""
+        if self.ticks is None:
+            for ticker, price in ticks:
+                self.publish_price(ticker, price)
+        else:
+            await asyncio.to_thread(self.ticks.append, list(ticks))
+
+    async def _read_ticks(self) -> None:
+        if self.ticks is None:
+            return
+        if self._cursor is None:  # start from now, not from retained history
+            self._cursor = await asyncio.to_thread(self.ticks.last_id)
+            return
+        self._cursor, prices = await asyncio.to_thread(
+            self.ticks.read_since, self._cursor
+        )
+        self._prices.update(prices)
+
+    def subscribe(self, subscriber: Subscriber, tickers: Iterable[str]) -> None:
+        for ticker in tickers:
+            subscriber.tickers.add(ticker)
+            self._subscribers[ticker].add(subscriber)
+
+    def unsubscribe(
+        self, subscriber: Subscriber, tickers: Optional[Iterable[str]] = None
+    ) -> None:
+        for ticker in list(subscriber.tickers if tickers is None else tickers):
+            subscriber.tickers.discard(ticker)
+            subscribers = self._subscribers.get(ticker)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[ticker]
+
+    def _compute(self, prices: dict[str, float]) -> dict[str, dict[str, Any]]:
+        results = {}
+        for ticker, price in prices.items():
+            try:
+                results[ticker] = compute_yield_metrics(self.store, ticker, price=price)
+            except (KeyError, ValueError):
+                continue
+            except Exception:
+                logger.exception("Live yields for %s failed", ticker)
+        return results
+
+    async def flush(self) -> int:
+        """Recompute every ticker that ticked since the last flush, once"""
+        await self._read_ticks()
+        prices, self._prices = self._prices, {}
+        if not prices:
+            return 0
+        results = await asyncio.to_thread(self._compute, prices)
+        ttl = price_metric_ttl()
+        for ticker, metrics in results.items():
+            self.cache.set(yield_cache_key(ticker, self.store), metrics, ttl)
+            message = {"type": "yields", **metrics}
+            for subscriber in self._subscribers.get(ticker, ()):
+                subscriber.offer(ticker, message)
+        return len(results)
+
+    async def run(self) -> None:
+        await self._read_ticks()  # set the cursor before the first interval
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Live yield flush failed; retrying next interval")
+
+
+@lru_cache()
+def get_live_yield_hub() -> LiveYieldHub:
+    return LiveYieldHub(
+        get_fundamentals_store(),
+        get_cache(),
+        interval=settings.LIVE_YIELD_INTERVAL_SECONDS,
+        ticks=PriceTickLog(
+            settings.LIVE_TICKS_PATH, settings.LIVE_TICK_RETENTION_SECONDS
+        ),
+    )
@@ -0,0 +1,424 @@
+"""
+Metric dependency graph over every function in ``formulas/``.
+
+Each formula is a node whose parameters are wired by name: a parameter
+named after another formula (``funds_from_operations``, ``rate_base``,
+``return_on_equity``...) or listed in ``ALIASES`` (``wacc``, ``roic``...)
+is fed from that formula's output; anything else is a raw input such as a
+fundamentals field. Callers ask a ``MetricBatch`` for target metrics; the
+planner picks the minimum set of nodes reachable from the supplied inputs
+and every intermediate is evaluated once per batch and kept for later
+requests against the same batch.
+
+Batches hold either scalars or equal-length arrays (one row per ticker).
+Formulas are first called with whole arrays; those that branch on their
+inputs fall back to a per-row loop, where rows that raise become NaN.
+Errors outside ``_ROW_ERRORS`` (a formula bug rather than an input it cannot
+handle) become NaN too, but are logged once per evaluation. Non-finite
+vectorized results become NaN, as the zero division behind them does in the
+scalar and per-row paths.
+"""
+
+import inspect
+import logging
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from types import ModuleType
+from typing import Any, Callable, Collection, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+
+from formulas import (
+    core_dividend_safety_and_coverage,
+    growth_and_projection,
+    historical_and_trend_analysis,
+    quality_and_sustainability_metrics,
+    risk_adjusted_return_metrics,
+    sector_specific_metrics,
+    valuation_and_relative_metrics,
+)
+
+from ..core.columnar_store import FundamentalsStore
+from ..core.market_assumptions import MarketAssumptions, current_market_assumptions
+
+FORMULA_MODULES: tuple[ModuleType, ...] = (
+    core_dividend_safety_and_coverage,
+    growth_and_projection,
+    historical_and_trend_analysis,
+    quality_and_sustainability_metrics,
+    risk_adjusted_return_metrics,
+    sector_specific_metrics,
+    valuation_and_relative_metrics,
+)
+
+# Parameter names that mean another node (or input) under a different name.
+# The parameter itself is tried first, so callers can still supply it directly.
+ALIASES: dict[str, str] = {
+    "wacc": "weighted_average_cost_of_capital",
+    "roic": "return_on_invested_capital",
+    "ending_rate_base": "rate_base",
+    "current_yield": "current_dividend_yield",
+    "annual_dividend_per_share": "dividend_per_share",
+    "annual_dividend": "dividend_per_share",
+    "current_price": "stock_price",
+    "current_share_price": "stock_price",
+}
+
+# Inputs a formula cannot handle; any other exception is logged
+_ROW_ERRORS = (ArithmeticError, ValueError, TypeError)
+
+logger = logging.getLogger(__name__)
+
+
+def _log_unexpected(node_name: str, error: Exception, rows: int = 1) -> None:
+    if not isinstance(error, _ROW_ERRORS):
+        logger.warning(
+            "%s raised %s on %d row(s); returned NaN",
+            node_name,
+            type(error).__name__,
+            rows,
+            exc_info=error,
+        )
+
+
+@dataclass(frozen=True)
+class MetricNode:
+    name: str
+    func: Callable[..., Any]
+    params: tuple[str, ...]
+    defaults: Mapping[str, Any]
+    list_params: frozenset[str]
+
+    @classmethod
+    def from_function(cls, func: Callable[..., Any], name: Optional[str] = None):
+        signature = inspect.signature(func)
+        params = tuple(signature.parameters)
+        defaults = {
+            p.name: p.default
+            for p in signature.parameters.values()
+            if p.default is not inspect.Parameter.empty
+        }
+        # History-style parameters take one list per row and are never broadcast
+        list_params = frozenset(
+            p.name
+            for p in signature.parameters.values()
+            if p.annotation is list or getattr(p.annotation, "__origin__", None) is list
+        )
+        return cls(name or func.__name__, func, params, defaults, list_params)
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    node: MetricNode
+    # parameter -> name of the input/node feeding it (None = default value)
+    bindings: Mapping[str, Optional[str]]
+
+
+@dataclass
+class EvaluationPlan:
+    targets: tuple[str, ...]
+    steps: list[PlanStep]
+    inputs: set[str]
+
+    def describe(self) -> str:
+        lines = [f"targets: {', '.join(self.targets)}"]
+        lines.append(f"inputs: {', '.join(sorted(self.inputs)) or '-'}")
+        for i, step in enumerate(self.steps, 1):
+            args = ", ".join(
+                f"{param}={source or 'default'}"
+                for param, source in step.bindings.items()
+            )
+            lines.append(f"{i}. {step.node.name}({args})")
+        return "\n".join(lines)
+
+
+@dataclass
+class NodeTiming:
+    name: str
+    seconds: float
+    mode: str  # "vectorized" or "rowwise"
+    errors: int = 0
+
+
+class MetricGraph:
+    def __init__(self, aliases: Optional[Mapping[str, str]] = None):
+        self.nodes: dict[str, MetricNode] = {}
+        self.aliases: dict[str, str] = dict(ALIASES if aliases is None else aliases)
+
+    @classmethod
+    def from_modules(cls, modules: Iterable[ModuleType] = FORMULA_MODULES):
+        graph = cls()
+        for module in modules:
+            for name, func in inspect.getmembers(module, inspect.isfunction):
+                if name.startswith("_") or func.__module__ != module.__name__:
+                    continue
+                graph.register(func)
+        return graph
+
+    def register(self, func: Callable[..., Any], name: Optional[str] = None) -> None:
+        node = MetricNode.from_function(func, name)
+        if node.name in self.nodes:
+            raise ValueError(f"Metric {node.name} is already registered")
+        self.nodes[node.name] = node
+
+    def _candidates(self, param: str) -> list[str]:
+        alias = self.aliases.get(param)
+        return [param, alias] if alias else [param]
+
+    def dependents(self, names: Collection[str]) -> set[str]:
+        """Every node that (transitively) consumes any of ``names``"""
+        consumers: dict[str, set[str]] = {}
+        for node in self.nodes.values():
+            for param in node.params:
+                for candidate in self._candidates(param):
+                    consumers.setdefault(candidate, set()).add(node.name)
+        affected: set[str] = set()
+        stack = list(names)
+        while stack:
+            for consumer in consumers.get(stack.pop(), ()):
+                if consumer not in affected:
+                    affected.add(consumer)
+                    stack.append(consumer)
+        return affected
+
+    def plan(
+        self, targets: Sequence[str], available: Collection[str]
+    ) -> EvaluationPlan:
+        """
+        Minimum ordered set of nodes computing ``targets`` from ``available``.
+
+        Available names (inputs or already computed values) always win over
+        recomputation; a parameter that cannot be fed falls back to its
+        default, and a target that cannot be reached raises ``ValueError``.
+        """
+        resolvable: dict[str, bool] = {}
+
+        def can_resolve(name: str, visiting: frozenset[str]) -> bool:
+            if name in available:
+                return True
+            if name in resolvable:
+                return resolvable[name]
+            node = self.nodes.get(name)
+            if node is None or name in visiting:
+                return False
+            ok = all(
+                any(can_resolve(c, visiting | {name}) for c in self._candidates(p))
+                or p in node.defaults
+                for p in node.params
+            )
+            resolvable[name] = ok
+            return ok
+
+        steps: list[PlanStep] = []
+        used_inputs: set[str] = set()
+        planned: set[str] = set()
+
+        def visit(name: str) -> None:
+            if name in available:
+                used_inputs.add(name)
+                return
+            if name in planned:
+                return
+            node = self.nodes[name]
+            bindings: dict[str, Optional[str]] = {}
+            for param in node.params:
+                source = next(
+                    (
+                        c
+                        for c in self._candidates(param)
+                        if c != name and can_resolve(c, frozenset({name}))
+                    ),
+                    None,
+                )
+                if source is not None:
+                    visit(source)
+                bindings[param] = source
+            planned.add(name)
+            steps.append(PlanStep(node, bindings))
+
+        for target in targets:
+            if target not in available and target not in self.nodes:
+                raise ValueError(f"Unknown metric: {target}")
+            if not can_resolve(target, frozenset()):
+                missing = sorted(
+                    p
+                    for p in self.nodes[target].params
+                    if p not in self.nodes[target].defaults
+                    and not any(
+                        can_resolve(c, frozenset({target})) for c in self._candidates(p)
+                    )
+                )
+                raise ValueError(
+                    f"Cannot compute {target}: missing inputs {', '.join(missing)}"
+                )
+            visit(target)
+        return EvaluationPlan(tuple(targets), steps, used_inputs)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+
+
+class MetricBatch:
+    """
+    Inputs for one batch (scalars, or one row per ticker when ``size`` is set)
+    plus every value computed for it so far.
+    """
+
+    def __init__(
+        self,
+        graph: MetricGraph,
+        inputs: Mapping[str, Any],
+        size: Optional[int] = None,
+    ):
+        self.graph = graph
+        self.size = size
+        self.inputs: dict[str, Any] = dict(inputs)
+        self.values: dict[str, Any] = {}
+        self.timings: dict[str, NodeTiming] = {}
+
+    def _available(self) -> set[str]:
+        return set(self.inputs) | set(self.values)
+
+    def _lookup(self, name: str) -> Any:
+        return self.inputs[name] if name in self.inputs else self.values[name]
+
+    def plan(self, targets: Sequence[str]) -> EvaluationPlan:
+        return self.graph.plan(targets, self._available())
+
+    def compute(self, targets: Sequence[str]) -> dict[str, Any]:
+        """Evaluate whatever ``targets`` still need and return their values"""
+        for step in self.plan(targets).steps:
+            self._evaluate(step)
+        return {target: self._lookup(target) for target in targets}
+
+    def invalidate(self, names: Collection[str]) -> set[str]:
+        """Drop cached values for ``names`` and everything derived from them"""
+        dropped = (set(names) | self.graph.dependents(names)) & set(self.values)
+        for name in dropped:
+            del self.values[name]
+            self.timings.pop(name, None)
+        return dropped
+
+    def update_inputs(self, changes: Mapping[str, Any]) -> set[str]:
+        """Replace inputs and invalidate only the values that depend on them"""
+        self.inputs.update(changes)
+        return self.invalidate(changes)
+
+    def report(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "metric": t.name,
+                "ms": t.seconds * 1000,
+                "mode": t.mode,
+                "errors": t.errors,
+            }
+            for t in self.timings.values()
+        ]
+
+    def _evaluate(self, step: PlanStep) -> None:
+        node = step.node
+        kwargs = {
+            param: self._lookup(source)
+            for param, source in step.bindings.items()
+            if source is not None
+        }
+        start = time.perf_counter()
+        mode, errors = "vectorized", 0
+        if self.size is None:
+            try:
+                value = node.func(**kwargs)
+            except Exception as e:
+                _log_unexpected(node.name, e)
+                value, errors = float("nan"), 1
+        else:
+            value = None
+            if not node.list_params:
+                try:
+                    with np.errstate(all="ignore"):
+                        value = node.func(
+                            **{
+                                k: np.asarray(v, dtype=np.float64)
+                                for k, v in kwargs.items()
+                            }
+                        )
+                except Exception:
+                    value = None  # the per-row loop reports what failed
+                if isinstance(value, (np.ndarray, np.floating)) and (
+                    np.asarray(value).dtype.kind == "f"
+                ):
+                    value = np.where(np.isfinite(value), value, np.nan)
+            if value is None:
+                mode = "rowwise"
+                value, errors = self._evaluate_rows(node, kwargs)
+        self.values[node.name] = value
+        self.timings[node.name] = NodeTiming(
+            node.name, time.perf_counter() - start, mode, errors
+        )
+
+    def _evaluate_rows(
+        self, node: MetricNode, kwargs: Mapping[str, Any]
+    ) -> tuple[Any, int]:
+        def row(value: Any, param: str, i: int) -> Any:
+            if param in node.list_params:
+                # Either one history per row (2-D / list of lists) or shared
+                if isinstance(value, np.ndarray):
+                    return value[i].tolist() if value.ndim == 2 else value.tolist()
+                per_row = len(value) == self.size and all(
+                    isinstance(v, (list, tuple, np.ndarray)) for v in value
+                )
+                return value[i] if per_row else value
+            if isinstance(value, np.ndarray) and value.ndim:
+                return value[i].item()
+            if isinstance(value, (list, tuple)):
+                return value[i]
+            return value
+
+        results, errors = [], 0
+        unexpected: Optional[Exception] = None
+        for i in range(self.size or 0):
+            try:
+                results.append(
+                    node.func(**{k: row(v, k, i) for k, v in kwargs.items()})
+                )
+            except Exception as e:
+                results.append(float("nan"))
+                errors += 1
+                if not isinstance(e, _ROW_ERRORS):
+                    unexpected = e
+        if unexpected is not None:
+            _log_unexpected(node.name, unexpected, errors)
+        if all(_is_number(r) for r in results):
+            return np.array(results, dtype=np.float64), errors
+        return np.array(results, dtype=object), errors
+
+
+@lru_cache()
+def get_metric_graph() -> MetricGraph:
+    return MetricGraph.from_modules()
+
+
+def market_inputs(assumptions: Optional[MarketAssumptions] = None) -> dict[str, float]:
+    """Market-wide inputs shared by every row of a batch, from a snapshot"""
+    assumptions = assumptions or current_market_assumptions()
+    return {
+        "risk_free_rate": assumptions.risk_free_rate(),
+        "expected_market_return": assumptions.expected_market_return,
+    }
+
+
+def batch_from_store(
+    store: FundamentalsStore,
+    tickers: Sequence[str],
+    graph: Optional[MetricGraph] = None,
+) -> MetricBatch:
+    """One row per ticker, fed with each field's latest reported value"""
+    rows = [store.ticker_index(t) for t in tickers]
+    inputs: dict[str, Any] = market_inputs()
+    for name in store.fields:
+        values = store.latest(name)[rows]
+        # Fields nobody reported stay unavailable so the graph can derive them
+        if not np.isnan(values).all():
+            inputs[name] = values
+    return MetricBatch(graph or get_metric_graph(), inputs, size=len(tickers))
@@ -0,0 +1,91 @@
+"""
+Portfolio-level risk from the cached universe covariance.
+
+Weights are checked against ``MarketConfig`` portfolio limits, then the
+portfolio's covariance is pulled out as a sub-matrix, so a request costs
+O(k^2) in the number of positions whatever the universe size.
+"""
+
+from typing import Any, Mapping, Optional
+
+import numpy as np
+
+from formulas.risk_adjusted_return_metrics import sharpe_ratio
+
+from ..core.columnar_store import FundamentalsStore
+from ..core.config import MarketConfig
+from ..core.market_assumptions import current_market_assumptions
+from .corporate_actions import CorporateActionAdjuster
+from .covariance import CovarianceCache, total_returns
+
+WEIGHT_TOLERANCE = 1e-6
+
+
+def validate_weights(weights: Mapping[str, float]) -> None:
+    """Raise ``ValueError`` unless weights respect ``MarketConfig`` limits"""
+    if not weights:
+        raise ValueError("Portfolio has no positions")
+    if len(weights) > MarketConfig.MAX_PORTFOLIO_SIZE:
+        raise ValueError(
+            f"Portfolio has {len(weights)} positions, "
+            f"more than {MarketConfig.MAX_PORTFOLIO_SIZE}"
+        )
+    for ticker, weight in weights.items():
+        if not (
+            MarketConfig.MIN_POSITION_SIZE - WEIGHT_TOLERANCE
+            <= weight
+            <= MarketConfig.MAX_POSITION_SIZE + WEIGHT_TOLERANCE
+        ):
+            raise ValueError(
+                f"{ticker} weight {weight:.4f} is outside "
+                f"[{MarketConfig.MIN_POSITION_SIZE}, {MarketConfig.MAX_POSITION_SIZE}]"
+            )
+    total = sum(weights.values())
+    if abs(total - 1) > WEIGHT_TOLERANCE:
+        raise ValueError(f"Weights sum to {total:.6f}, not 1")
+
+
+def portfolio_risk(
+    store: FundamentalsStore,
+    adjuster: CorporateActionAdjuster,
+    cache: CovarianceCache,
+    weights: Mapping[str, float],
+    window: int,
+    end: Optional[str] = None,
+) -> dict[str, Any]:
+    """Annualized return, volatility, Sharpe ratio and risk contributions"""
+    validate_weights(weights)
+    tickers = list(weights)
+    w = np.array([weights[t] for t in tickers])
+
+    cov = cache.get(store, adjuster, window, end)
+    sigma = cov.sub(tickers)
+    returns, _, scale = total_returns(store, adjuster, window, cov.end, tickers)
+    with np.errstate(invalid="ignore"):
+        expected = np.nan_to_num(np.nanmean(returns, axis=0)) * scale
+
+    marginal = sigma @ w
+    variance = float(w @ marginal)
+    volatility = float(np.sqrt(variance))
+    expected_return = float(w @ expected)
+    rf = current_market_assumptions().risk_free_rate()
+    return {
+        "end": cov.end,
+        "window": window,
+        "expected_return": expected_return,
+        "volatility": volatility,
+        "sharpe_ratio": sharpe_ratio(expected_return, rf, volatility),
+        "risk_free_rate": rf,
+        "shrinkage": cov.shrinkage,
+        "positions": {
+            ticker: {
+                "weight": float(w[i]),
+                "expected_return": float(expected[i]),
+                "volatility": float(np.sqrt(sigma[i, i])),
+                "risk_contribution": (
+                    float(w[i] * marginal[i] / variance) if variance > 0 else None
+                ),
+            }
+            for i, ticker in enumerate(tickers)
+        },
+    }
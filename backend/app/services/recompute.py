@@ -0,0 +1,117 @@
+"""
+Incremental recomputation of derived metrics.
+
+Each ticker that has been asked for metrics keeps a scalar ``MetricBatch``
+with its latest fundamentals as inputs and every derived value computed so
+far. When a sync reports that some fields changed for a ticker, only the
+values downstream of those fields in the metric graph are dropped (e.g.
+``net_plant_in_service`` -> ``rate_base`` -> ``rate_base_growth`` and
+``allowed_earnings``), and a background worker recomputes exactly those.
+Tickers nobody has asked about cost nothing.
+"""
+
+import asyncio
+import logging
+import math
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Collection, Mapping, Optional, Sequence
+
+from ..core.columnar_store import FundamentalsStore, get_fundamentals_store
+from .metric_graph import MetricBatch, MetricGraph, get_metric_graph, market_inputs
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalRecomputer:
+    def __init__(self, store: FundamentalsStore, graph: Optional[MetricGraph] = None):
+        self.store = store
+        self.graph = graph or get_metric_graph()
+        self.batches: dict[str, MetricBatch] = {}
+        self.recomputed = 0
+        self._pending: dict[str, set[str]] = defaultdict(set)
+        self._locks: dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._wakeup = asyncio.Event()
+
+    def _inputs(self, ticker: str, fields: Optional[Collection[str]] = None):
+        row = self.store.latest_row(ticker, fields)
+        present = {f: v for f, v in row.items() if not math.isnan(v)}
+        return present, set(row) - set(present)
+
+    async def metrics(self, ticker: str, targets: Sequence[str]) -> dict[str, Any]:
+        """Derived values for one ticker, computing only what is not cached"""
+        async with self._locks[ticker]:
+            batch = self.batches.get(ticker)
+            if batch is None:
+                inputs, _ = self._inputs(ticker)
+                batch = MetricBatch(self.graph, {**market_inputs(), **inputs})
+                self.batches[ticker] = batch
+            return await asyncio.to_thread(batch.compute, targets)
+
+    async def notify_changes(self, changes: Mapping[str, Collection[str]]) -> int:
+        """Invalidate values affected by changed fields and queue recomputation"""
+        invalidated = 0
+        for ticker, fields in changes.items():
+            if ticker not in self.batches:
+                continue
+            async with self._locks[ticker]:
+                batch = self.batches[ticker]
+                present, missing = self._inputs(ticker, fields)
+                # Fields reported as changed may not have moved the latest value
+                moved = {f: v for f, v in present.items() if batch.inputs.get(f) != v}
+                gone = [f for f in missing if f in batch.inputs]
+                for field in gone:
+                    del batch.inputs[field]
+                dropped = batch.update_inputs(moved) | batch.invalidate(gone)
+            if dropped:
+                self._pending[ticker] |= dropped
+                invalidated += len(dropped)
+        if self._pending:
+            self._wakeup.set()
+        return invalidated
+
+    async def notify_market_change(self) -> int:
+        """Push a new market-assumptions snapshot into every cached batch"""
+        inputs = market_inputs()
+        invalidated = 0
+        for ticker, batch in self.batches.items():
+            async with self._locks[ticker]:
+                dropped = batch.update_inputs(inputs)
+            if dropped:
+                self._pending[ticker] |= dropped
+                invalidated += len(dropped)
+        if self._pending:
+            self._wakeup.set()
+        return invalidated
+
+    async def _recompute(self, ticker: str, metrics: set[str]) -> None:
+        async with self._locks[ticker]:
+            batch = self.batches[ticker]
+            # Values can become unreachable when a field disappears
+            computable = []
+            for metric in sorted(metrics):
+                try:
+                    batch.plan([metric])
+                except ValueError:
+                    continue
+                computable.append(metric)
+            await asyncio.to_thread(batch.compute, computable)
+        self.recomputed += len(computable)
+
+    async def run(self) -> None:
+        """Background worker draining queued recomputations, one ticker at a time"""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._pending:
+                ticker = next(iter(self._pending))
+                try:
+                    await self._recompute(ticker, self._pending.pop(ticker))
+                except Exception:
+                    # Its values stay uncached and are computed on the next request
+                    logger.exception("Recomputing metrics for %s failed", ticker)
+
+
+@lru_cache()
+def get_recomputer() -> IncrementalRecomputer:
+    return IncrementalRecomputer(get_fundamentals_store())
@@ -0,0 +1,181 @@
+"""
+Universe screens over materialized metric values.
+
+``materialize_metric_values`` evaluates ``SCREENER_METRICS`` through the
+metric graph and upserts them into ``metric_values``, only for tickers whose
+fundamentals changed. ``screen`` then sorts on one metric and filters on
+any others, paging with keyset cursors on the
+``(metric, value, ticker)`` index.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import and_, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlmodel import col, select
+
+from ..core.columnar_store import FundamentalsStore
+from ..core.pagination import (
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+    query_fingerprint,
+)
+from ..models.metrics import MetricValue
+from .metric_graph import batch_from_store
+
+SCREENER_METRICS = (
+    "current_dividend_yield",
+    "earnings_payout_ratio",
+    "free_cash_flow_payout_ratio",
+    "interest_coverage_ratio",
+    "net_debt_to_ebitda",
+    "debt_to_capital_ratio",
+    "return_on_equity",
+    "price_to_dividend_ratio",
+)
+UPSERT_CHUNK = 1000  # tickers per IN (...) lookup
+
+
+@dataclass(frozen=True)
+class MetricFilter:
+    metric: str
+    min: Optional[float] = None
+    max: Optional[float] = None
+
+    @classmethod
+    def parse(cls, spec: str) -> "MetricFilter":
+        """``metric:min:max`` with either bound optional, e.g. ``return_on_equity:0.15:``"""
+        metric, _, bounds = spec.partition(":")
+        low, _, high = bounds.partition(":")
+        try:
+            return cls(
+                metric, float(low) if low else None, float(high) if high else None
+            )
+        except ValueError:
+            raise ValueError(f"Invalid filter: {spec}")
+
+
+@dataclass
+class ScreenPage:
+    items: list[dict[str, Any]]
+    next_cursor: Optional[str]
+
+
+async def materialize_metric_values(
+    session: AsyncSession,
+    store: FundamentalsStore,
+    tickers: Optional[Sequence[str]] = None,
+    metrics: Sequence[str] = SCREENER_METRICS,
+) -> int:
+    """Upsert changed metric values (deleting ones that became NaN)"""
+    tickers = list(store.tickers if tickers is None else tickers)
+    if not tickers:
+        return 0
+    batch = batch_from_store(store, tickers)
+    computed: dict[str, np.ndarray] = {}
+    for metric in metrics:
+        try:
+            values = batch.compute([metric])[metric]
+        except ValueError:  # inputs missing for the whole batch
+            continue
+        computed[metric] = np.broadcast_to(
+            np.asarray(values, dtype=np.float64), len(tickers)
+        )
+    if not computed:
+        return 0
+
+    now = datetime.now(timezone.utc)
+    written = 0
+    for lo in range(0, len(tickers), UPSERT_CHUNK):
+        chunk = tickers[lo : lo + UPSERT_CHUNK]
+        result = await session.execute(
+            select(MetricValue).where(
+                col(MetricValue.metric).in_(computed),
+                col(MetricValue.ticker).in_(chunk),
+            )
+        )
+        existing = {(row.metric, row.ticker): row for row in result.scalars()}
+        for metric, values in computed.items():
+            for i, ticker in enumerate(chunk, lo):
+                value = float(values[i])
+                row = existing.get((metric, ticker))
+                if not np.isfinite(value):
+                    if row is not None:
+                        await session.delete(row)
+                        written += 1
+                elif row is None:
+                    session.add(
+                        MetricValue(
+                            metric=metric, ticker=ticker, value=value, updated_at=now
+                        )
+                    )
+                    written += 1
+                elif row.value != value:
+                    row.value, row.updated_at = value, now
+                    written += 1
+    await session.commit()
+    return written
+
+
+async def available_metrics(session: AsyncSession) -> dict[str, int]:
+    result = await session.execute(
+        select(MetricValue.metric, func.count()).group_by(MetricValue.metric)
+    )
+    return dict(result.tuples().all())
+
+
+async def screen(
+    session: AsyncSession,
+    sort: str,
+    descending: bool = True,
+    filters: Sequence[MetricFilter] = (),
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> ScreenPage:
+    """
+    One page of tickers ordered by ``sort`` (ties by ticker) that pass every
+    filter; raises ``InvalidCursor`` for a cursor from another query
+    """
+    fingerprint = query_fingerprint(
+        sort, descending, [(f.metric, f.min, f.max) for f in filters]
+    )
+    primary = aliased(MetricValue)
+    stmt = select(primary.ticker, primary.value).where(primary.metric == sort)
+    for f in filters:
+        other = primary if f.metric == sort else aliased(MetricValue)
+        if other is not primary:
+            stmt = stmt.join(
+                other, and_(other.ticker == primary.ticker, other.metric == f.metric)
+            ).add_columns(other.value.label(f.metric))
+        if f.min is not None:
+            stmt = stmt.where(other.value >= f.min)
+        if f.max is not None:
+            stmt = stmt.where(other.value <= f.max)
+
+    key = tuple_(primary.value, primary.ticker)
+    if cursor is not None:
+        last = tuple(decode_cursor(cursor, fingerprint))
+        if len(last) != 2:
+            raise InvalidCursor("Malformed cursor")
+        stmt = stmt.where(key < last if descending else key > last)
+    order = (
+        (primary.value.desc(), primary.ticker.desc())
+        if descending
+        else (primary.value.asc(), primary.ticker.asc())
+    )
+    rows = (await session.execute(stmt.order_by(*order).limit(limit + 1))).all()
+
+    items = [dict(row._mapping) for row in rows[:limit]]
+    for item in items:
+        item[sort] = item.pop("value")
+    next_cursor = (
+        encode_cursor([rows[limit - 1].value, rows[limit - 1].ticker], fingerprint)
+        if len(rows) > limit
+        else None
+    )
+    return ScreenPage(items, next_cursor)
@@ -0,0 +1,125 @@
+"""
+The universe arrays every worker reads, published once into shared memory.
+
+A snapshot holds, for every ticker in the store:
+
+* ``latest/<field>``: each fundamentals field's latest reported value,
+* ``metric/<name>``: the screener metrics already evaluated by the graph,
+* ``returns``: the ``periods x tickers`` total-return panel over
+  ``COVARIANCE_WINDOW`` periods (split-adjusted),
+
+with the ticker and period axes, the store version and the market
+assumption version in its metadata. The store writer's sync loop rebuilds
+it whenever one of those inputs changes; workers read it as zero-copy views
+through ``current_universe()``. A follower whose store index is older than
+the snapshot reloads the index, so both agree on the on-disk version.
+"""
+
+from functools import lru_cache
+from typing import Optional, Sequence
+
+import numpy as np
+
+from ..core.columnar_store import FundamentalsStore
+from ..core.config import settings
+from ..core.market_assumptions import current_market_assumptions
+from ..core.shared_snapshot import SharedSnapshot, SnapshotPublisher, SnapshotReader
+from .corporate_actions import CorporateActionAdjuster
+from .covariance import total_returns
+from .metric_graph import MetricBatch, batch_from_store, get_metric_graph, market_inputs
+from .screener import SCREENER_METRICS
+
+
+def build_universe_arrays(
+    store: FundamentalsStore,
+    adjuster: CorporateActionAdjuster,
+    window: int = settings.COVARIANCE_WINDOW,
+    metrics: Sequence[str] = SCREENER_METRICS,
+) -> tuple[dict[str, np.ndarray], dict]:
+    """Arrays and metadata for one snapshot of the whole store universe"""
+    tickers = list(store.tickers)
+    arrays: dict[str, np.ndarray] = {
+        f"latest/{field}": store.latest(field) for field in store.fields
+    }
+    batch = batch_from_store(store, tickers)
+    for metric in metrics:
+        try:
+            values = batch.compute([metric])[metric]
+        except ValueError:  # inputs missing for the whole universe
+            continue
+        arrays[f"metric/{metric}"] = np.broadcast_to(
+            np.asarray(values, dtype=np.float64), len(tickers)
+        )
+    returns, periods, scale = total_returns(store, adjuster, window)
+    arrays["returns"] = returns
+    meta = {
+        "tickers": tickers,
+        "return_periods": list(periods),
+        "periods_per_year": scale,
+        "store_version": store.version,
+        "market_version": current_market_assumptions().version,
+    }
+    return arrays, meta
+
+
+def publish_universe(
+    publisher: SnapshotPublisher,
+    store: FundamentalsStore,
+    adjuster: CorporateActionAdjuster,
+) -> int:
+    arrays, meta = build_universe_arrays(store, adjuster)
+    return publisher.publish(arrays, meta)
+
+
+def batch_from_snapshot(
+    snapshot: SharedSnapshot, tickers: Sequence[str]
+) -> MetricBatch:
+    """
+    Like ``batch_from_store`` but fed from the shared snapshot, with the
+    precomputed metrics supplied as inputs so the graph does not redo them.
+    Raises ``KeyError`` for tickers the snapshot does not have.
+    """
+    positions = snapshot.index("tickers")
+    rows = [positions[t] for t in tickers]
+    inputs = market_inputs()
+    for name, values in snapshot.arrays.items():
+        kind, _, key = name.partition("/")
+        if kind not in ("latest", "metric"):
+            continue
+        values = values[rows]
+        if not np.isnan(values).all():
+            inputs[key] = values
+    return MetricBatch(get_metric_graph(), inputs, size=len(tickers))
+
+
+def universe_batch(store: FundamentalsStore, tickers: Sequence[str]) -> MetricBatch:
+    """Batch from the current snapshot when it is up to date, else the store"""
+    snapshot = current_universe()
+    if snapshot is not None and snapshot.meta["store_version"] != store.version:
+        store.refresh()
+    if (
+        snapshot is not None
+        and snapshot.meta["store_version"] == store.version
+        and snapshot.meta["market_version"] == current_market_assumptions().version
+    ):
+        try:
+            return batch_from_snapshot(snapshot, tickers)
+        except KeyError:
+            pass
+    return batch_from_store(store, tickers)
+
+
+@lru_cache()
+def get_snapshot_publisher() -> SnapshotPublisher:
+    return SnapshotPublisher(
+        settings.SHARED_SNAPSHOT_PATH, prefix=settings.SHARED_SNAPSHOT_PREFIX
+    )
+
+
+@lru_cache()
+def get_snapshot_reader() -> SnapshotReader:
+    return SnapshotReader(settings.SHARED_SNAPSHOT_PATH)
+
+
+def current_universe() -> Optional[SharedSnapshot]:
+    return get_snapshot_reader().current()
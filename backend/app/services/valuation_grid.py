@@ -0,0 +1,231 @@
+"""
+Vectorized required-return x growth sensitivity grids for the dividend
+discount models in ``formulas/growth_and_projection.py``.
+
+Each grid is one broadcast pass over ``required_returns[:, None]`` and
+``growth_rates[None, :]`` using the same arithmetic as the scalar models.
+Cells where the required return does not exceed the (stable) growth rate,
+where the scalar models raise ``ValueError``, are NaN instead. Multi-stage
+sums are accumulated one period at a time, so the largest temporary is one
+grid rather than periods x grid.
+
+Finished grids are cached by their (rounded) inputs, up to
+``VALUATION_GRID_CACHE_MAX_BYTES`` per process.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Hashable, Literal, Optional
+
+import numpy as np
+
+from ..core.config import settings
+
+GrowthAxis = Literal["initial", "stable"]
+
+
+def _mask(values: np.ndarray, required_return, stable_growth_rate) -> np.ndarray:
+    return np.where(required_return > stable_growth_rate, values, np.nan)
+
+
+def gordon_growth_grid(
+    next_period_dividend, required_returns: np.ndarray, growth_rates: np.ndarray
+) -> np.ndarray:
+    r = np.asarray(required_returns, dtype=np.float64)[:, None]
+    g = np.asarray(growth_rates, dtype=np.float64)[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return _mask(next_period_dividend / (r - g), r, g)
+
+
+def _present_value_of_growth(
+    dividend, growth, required_return, periods: int, offset: int = 0
+):
+    """sum_{t=1..periods} dividend * (1+growth)^t / (1+r)^(offset+t), broadcast"""
+    growth, required_return = np.broadcast_arrays(growth, required_return)
+    total = np.zeros(growth.shape)
+    for t in range(1, periods + 1):
+        total += (1 + growth) ** t / (1 + required_return) ** (offset + t)
+    return dividend * total
+
+
+def two_stage_ddm_grid(
+    initial_dividend: float,
+    initial_growth_rate,
+    stable_growth_rate,
+    required_return,
+    initial_periods: int,
+) -> np.ndarray:
+    """Broadcasting twin of ``two_stage_dividend_discount_model``"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pv_initial = _present_value_of_growth(
+            initial_dividend, initial_growth_rate, required_return, initial_periods
+        )
+        terminal_value = (
+            initial_dividend * (1 + initial_growth_rate) ** initial_periods
+        ) / (required_return - stable_growth_rate)
+        pv_terminal = terminal_value / (1 + required_return) ** initial_periods
+        return _mask(pv_initial + pv_terminal, required_return, stable_growth_rate)
+
+
+def three_stage_ddm_grid(
+    initial_dividend: float,
+    initial_growth_rate,
+    stable_growth_rate,
+    required_return,
+    initial_periods: int,
+    transition_periods: int,
+) -> np.ndarray:
+    """Broadcasting twin of ``three_stage_dividend_discount_model``"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pv_initial = _present_value_of_growth(
+            initial_dividend, initial_growth_rate, required_return, initial_periods
+        )
+        end_of_initial = initial_dividend * (1 + initial_growth_rate) ** initial_periods
+        pv_transition = _present_value_of_growth(
+            end_of_initial,
+            stable_growth_rate,
+            required_return,
+            transition_periods,
+            offset=initial_periods,
+        )
+        terminal_value = (
+            end_of_initial * (1 + stable_growth_rate) ** transition_periods
+        ) / (required_return - stable_growth_rate)
+        pv_terminal = terminal_value / (1 + required_return) ** (
+            initial_periods + transition_periods
+        )
+        return _mask(
+            pv_initial + pv_transition + pv_terminal,
+            required_return,
+            stable_growth_rate,
+        )
+
+
+class GridCache:
+    """Read-only grids by their inputs, LRU-evicted beyond ``max_bytes``"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._grids: OrderedDict[Hashable, np.ndarray] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()  # grids are computed in worker threads
+
+    def get(self, key: Hashable) -> Optional[np.ndarray]:
+        with self._lock:
+            grid = self._grids.get(key)
+            if grid is not None:
+                self._grids.move_to_end(key)
+            return grid
+
+    def put(self, key: Hashable, grid: np.ndarray) -> np.ndarray:
+        with self._lock:
+            if key not in self._grids:
+                self._grids[key] = grid
+                self._bytes += grid.nbytes
+            while self._bytes > self.max_bytes and len(self._grids) > 1:
+                _, evicted = self._grids.popitem(last=False)
+                self._bytes -= evicted.nbytes
+            return self._grids.get(key, grid)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._grids.clear()
+            self._bytes = 0
+
+
+GRID_CACHE = GridCache(settings.VALUATION_GRID_CACHE_MAX_BYTES)
+
+
+def valuation_grid(
+    model: str,
+    dividend: float,
+    r_min: float,
+    r_max: float,
+    r_steps: int,
+    g_min: float,
+    g_max: float,
+    g_steps: int,
+    growth_axis: GrowthAxis = "stable",
+    initial_growth_rate: float = 0.0,
+    stable_growth_rate: float = 0.0,
+    initial_periods: int = 5,
+    transition_periods: int = 5,
+) -> np.ndarray:
+    """
+    Cached float32 grid (rows = required return, columns = growth rate).
+
+    Callers should round their inputs (see ``round_grid_inputs``) so nearby
+    slider positions share a cache entry. The returned array is read-only.
+    """
+    key = (
+        model,
+        dividend,
+        r_min,
+        r_max,
+        r_steps,
+        g_min,
+        g_max,
+        g_steps,
+        growth_axis,
+        initial_growth_rate,
+        stable_growth_rate,
+        initial_periods,
+        transition_periods,
+    )
+    grid = GRID_CACHE.get(key)
+    if grid is None:
+        grid = GRID_CACHE.put(key, _compute_grid(*key))
+    return grid
+
+
+def _compute_grid(
+    model: str,
+    dividend: float,
+    r_min: float,
+    r_max: float,
+    r_steps: int,
+    g_min: float,
+    g_max: float,
+    g_steps: int,
+    growth_axis: GrowthAxis,
+    initial_growth_rate: float,
+    stable_growth_rate: float,
+    initial_periods: int,
+    transition_periods: int,
+) -> np.ndarray:
+    r = np.linspace(r_min, r_max, r_steps)[:, None]
+    g = np.linspace(g_min, g_max, g_steps)[None, :]
+
+    if model == "gordon":
+        # D1 = D0 * (1 + g) for each growth rate in the grid
+        grid = gordon_growth_grid(dividend * (1 + g[0]), r[:, 0], g[0])
+    elif model in ("two_stage", "three_stage"):
+        g1, gs = (
+            (g, stable_growth_rate)
+            if growth_axis == "initial"
+            else (
+                initial_growth_rate,
+                g,
+            )
+        )
+        if model == "two_stage":
+            grid = two_stage_ddm_grid(dividend, g1, gs, r, initial_periods)
+        else:
+            grid = three_stage_ddm_grid(
+                dividend, g1, gs, r, initial_periods, transition_periods
+            )
+        grid = np.broadcast_to(grid, (r_steps, g_steps))
+    else:
+        raise ValueError(f"Unknown valuation model: {model}")
+
+    grid = np.ascontiguousarray(grid, dtype=np.float32)
+    grid.flags.writeable = False
+    return grid
+
+
+def round_grid_inputs(**inputs: float) -> dict[str, float]:
+    """Round rates to 0.01bp and amounts to 1e-6 for cache keying"""
+    return {
+        name: round(value, 6) if isinstance(value, float) else value
+        for name, value in inputs.items()
+    }
@@ -0,0 +1,149 @@
+"""
+Universe-wide WACC, the vectorized ``weighted_average_cost_of_capital``.
+
+WACC splits into a fundamentals part and a market part. The fundamentals
+part is capital weights and after-tax cost of debt. The market part is the
+CAPM cost of equity. The fundamentals part is computed once per columnar
+store version. The market part is two array operations per assumptions
+snapshot. Publishing a new risk-free curve therefore recomputes the whole
+universe in microseconds, and results are cached per
+``(store version, snapshot version)``.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Sequence
+
+import numpy as np
+
+from ..core.columnar_store import FundamentalsStore, get_fundamentals_store
+from ..core.market_assumptions import (
+    MarketAssumptions,
+    MarketAssumptionsStore,
+    get_market_assumptions_store,
+)
+
+DEFAULT_BETA = 1.0  # no beta in fundamentals; market beta unless supplied
+
+
+@dataclass(frozen=True)
+class CapitalStructure:
+    """Assumption-independent WACC inputs, one entry per ticker"""
+
+    equity_weight: np.ndarray
+    debt_weight: np.ndarray
+    cost_of_debt: np.ndarray
+    tax_rate: np.ndarray  # NaN where pre-tax income <= 0 (snapshot default)
+    has_value: np.ndarray  # total_value > 0
+
+    @classmethod
+    def from_arrays(
+        cls,
+        interest_expense: np.ndarray,
+        total_debt: np.ndarray,
+        shares_outstanding: np.ndarray,
+        stock_price: np.ndarray,
+        income_tax_expense: np.ndarray,
+        pre_tax_income: np.ndarray,
+    ) -> "CapitalStructure":
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cost_of_debt = np.where(total_debt > 0, interest_expense / total_debt, 0.0)
+            equity = shares_outstanding * stock_price
+            total_value = equity + total_debt  # debt at book value
+            has_value = total_value > 0
+            return cls(
+                equity_weight=np.where(has_value, equity / total_value, np.nan),
+                debt_weight=np.where(has_value, total_debt / total_value, np.nan),
+                cost_of_debt=cost_of_debt,
+                tax_rate=np.where(
+                    pre_tax_income > 0, income_tax_expense / pre_tax_income, np.nan
+                ),
+                has_value=has_value,
+            )
+
+
+def batch_wacc(
+    structure: CapitalStructure,
+    assumptions: MarketAssumptions,
+    beta: np.ndarray,
+) -> dict[str, np.ndarray]:
+    """Cost of equity, after-tax cost of debt and WACC for every row"""
+    cost_of_equity = (
+        assumptions.risk_free_rate()
+        + np.asarray(beta) * assumptions.equity_risk_premium
+    )
+    tax_rate = np.where(
+        np.isnan(structure.tax_rate), assumptions.default_tax_rate, structure.tax_rate
+    )
+    after_tax_cost_of_debt = structure.cost_of_debt * (1 - tax_rate)
+    wacc = np.where(
+        structure.has_value,
+        structure.equity_weight * cost_of_equity
+        + structure.debt_weight * after_tax_cost_of_debt,
+        cost_of_equity,
+    )
+    return {
+        "cost_of_equity": cost_of_equity,
+        "cost_of_debt": structure.cost_of_debt,
+        "after_tax_cost_of_debt": after_tax_cost_of_debt,
+        "tax_rate": tax_rate,
+        "equity_weight": structure.equity_weight,
+        "wacc": wacc,
+    }
+
+
+class WaccEngine:
+    def __init__(self, store: FundamentalsStore, assumptions: MarketAssumptionsStore):
+        self.store = store
+        self.assumptions = assumptions
+        self._structure: Optional[tuple[int, CapitalStructure]] = None
+        self._results: dict[tuple[int, int], dict[str, np.ndarray]] = {}
+
+    def structure(self) -> CapitalStructure:
+        """Universe capital structure, rebuilt only when the store changes"""
+        if self._structure is None or self._structure[0] != self.store.version:
+            latest = {
+                field: self.store.latest(field)
+                for field in (
+                    "interest_expense",
+                    "total_debt",
+                    "shares_outstanding",
+                    "stock_price",
+                    "income_tax_expense",
+                    "pre_tax_income",
+                )
+            }
+            self._structure = (
+                self.store.version,
+                CapitalStructure.from_arrays(**latest),
+            )
+            self._results.clear()
+        return self._structure[1]
+
+    def universe(
+        self, version: Optional[int] = None, betas: Optional[Sequence[float]] = None
+    ) -> dict[str, np.ndarray]:
+        """
+        WACC for every ticker under snapshot ``version`` (default current).
+
+        Results with default betas are cached per store/snapshot version;
+        explicit ``betas`` (one per store ticker) are always recomputed.
+        """
+        snapshot = (
+            self.assumptions.current()
+            if version is None
+            else self.assumptions.get(version)
+        )
+        structure = self.structure()
+        if betas is not None:
+            return batch_wacc(structure, snapshot, np.asarray(betas, dtype=np.float64))
+        key = (self.store.version, snapshot.version)
+        if key not in self._results:
+            beta = np.full(len(self.store.tickers), DEFAULT_BETA)
+            self._results[key] = batch_wacc(structure, snapshot, beta)
+        return self._results[key]
+
+
+@lru_cache()
+def get_wacc_engine() -> WaccEngine:
+    return WaccEngine(get_fundamentals_store(), get_market_assumptions_store())
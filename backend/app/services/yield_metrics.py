@@ -0,0 +1,94 @@
+"""
+Price-derived yield metrics for one ticker, from the columnar store.
+
+The latest period's ``dividend_per_share`` is taken as the annual dividend
+and its ``stock_price`` as the price unless a live price is passed in. Both
+series are split/spin-off adjusted first, so a dividend reported before a
+split is not set against a post-split live price.
+"""
+
+from typing import Any, Optional
+
+import numpy as np
+
+from formulas.core_dividend_safety_and_coverage import current_dividend_yield
+from formulas.valuation_and_relative_metrics import (
+    price_to_dividend_ratio,
+    relative_dividend_yield,
+    yield_spread_analysis,
+)
+
+from ..core.cache import MemoryCache, price_metric_ttl
+from ..core.columnar_store import FundamentalsStore
+from ..core.market_assumptions import current_market_assumptions
+from .corporate_actions import get_corporate_action_adjuster
+
+
+def yield_cache_key(ticker: str, store: FundamentalsStore) -> str:
+    # Entries are per market snapshot (yield spreads use the risk-free rate)
+    # and per store version, so a fundamentals sync is never served stale
+    # through a TTL stretched to the next open
+    market_version = current_market_assumptions().version
+    return f"yields:{ticker}:v{market_version}:s{store.version}"
+
+
+def _last_valid(values: np.ndarray) -> float:
+    valid = values[~np.isnan(values)]
+    return float(valid[-1]) if valid.size else float("nan")
+
+
+def compute_yield_metrics(
+    store: FundamentalsStore,
+    ticker: str,
+    price: Optional[float] = None,
+    ten_year_treasury_yield: Optional[float] = None,
+) -> dict[str, Any]:
+    """Raises ``KeyError`` for unknown tickers, ``ValueError`` without data"""
+    adjuster = get_corporate_action_adjuster()
+    dividends = adjuster.adjusted_series(store, "dividend_per_share", ticker)
+    prices = adjuster.adjusted_series(store, "stock_price", ticker)
+
+    annual_dividend = _last_valid(dividends)
+    if price is None:
+        price = _last_valid(prices)
+    if np.isnan(annual_dividend) or np.isnan(price) or price <= 0:
+        raise ValueError(f"No dividend and price data for {ticker}")
+    if ten_year_treasury_yield is None:
+        ten_year_treasury_yield = current_market_assumptions().risk_free_rate(10) * 100
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        history = np.where(prices > 0, dividends / prices * 100, np.nan)
+    historical_average_yield = (
+        float(np.nanmean(history)) if np.any(~np.isnan(history)) else None
+    )
+
+    current_yield = current_dividend_yield(annual_dividend, price)
+    return {
+        "ticker": ticker,
+        "price": price,
+        "annual_dividend": annual_dividend,
+        "current_dividend_yield": current_yield,
+        "historical_average_yield": historical_average_yield,
+        "relative_dividend_yield": (
+            relative_dividend_yield(current_yield, historical_average_yield)
+            if historical_average_yield
+            else None
+        ),
+        "yield_spread": yield_spread_analysis(current_yield, ten_year_treasury_yield),
+        "price_to_dividend_ratio": (
+            price_to_dividend_ratio(price, annual_dividend) if annual_dividend else None
+        ),
+    }
+
+
+def cached_yield_metrics(
+    store: FundamentalsStore, ticker: str, cache: MemoryCache
+) -> dict[str, Any]:
+    """Serve from cache, computing and storing with a market-aware TTL on miss"""
+    cache.record_request(ticker)
+    key = yield_cache_key(ticker, store)
+    metrics = cache.get(key)
+    if metrics is None:
+        metrics = compute_yield_metrics(store, ticker)
+        cache.set(key, metrics, price_metric_ttl())
+    return metrics
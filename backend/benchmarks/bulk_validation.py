@@ -0,0 +1,132 @@
+"""
+Batch validation time: one Pydantic model per record vs column-wise.
+
+Validates the same fundamentals batch with a per-row model mirroring
+``Fundamental`` and with ``validate_fundamentals`` (posted as a list of
+records and as a mapping of columns), then checks all accept the same rows.
+"prepared" adds turning the result into what the loaders take: row dicts
+for the database and float columns for the fundamentals store.
+
+    cd backend && python -m benchmarks.bulk_validation --rows 100000 --bad 0.01
+"""
+
+import argparse
+import os
+import timeit
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, create_model
+
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/benchmark")
+
+from app.models.fundamentals import FUNDAMENTAL_FIELDS  # noqa: E402
+from app.services.fundamentals_ingest import validate_fundamentals  # noqa: E402
+
+
+class _Row(BaseModel):
+    model_config = ConfigDict(allow_inf_nan=False)
+
+    ticker: str = Field(min_length=1, max_length=16)
+    period_end: date
+
+
+FundamentalRow = create_model(
+    "FundamentalRow",
+    __base__=_Row,
+    **{name: (Optional[float], None) for name in FUNDAMENTAL_FIELDS},
+)
+
+
+def make_batch(rows: int, bad_fraction: float, seed: int = 0) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    tickers = 1 + rows // 40
+    values = rng.lognormal(10.0, 2.0, (rows, len(FUNDAMENTAL_FIELDS)))
+    values[rng.random(values.shape) < 0.05] = np.nan
+    start = date(2000, 3, 31)
+    batch = []
+    for i in range(rows):
+        record = {
+            "ticker": f"T{i % tickers:05d}",
+            "period_end": (start + timedelta(days=91 * (i // tickers))).isoformat(),
+        }
+        for name, value in zip(FUNDAMENTAL_FIELDS, values[i].tolist()):
+            record[name] = None if value != value else value
+        batch.append(record)
+    for i in np.flatnonzero(rng.random(rows) < bad_fraction):
+        batch[i]["revenue" if i % 2 else "period_end"] = "n/a"
+    return batch
+
+
+def per_row(batch: list[dict]) -> tuple[list[int], list[FundamentalRow]]:
+    rows, models = [], []
+    for i, record in enumerate(batch):
+        try:
+            models.append(FundamentalRow.model_validate(record))
+        except ValidationError:
+            continue
+        rows.append(i)
+    return rows, models
+
+
+def per_row_prepared(batch: list[dict]):
+    _, models = per_row(batch)
+    records = [m.model_dump() for m in models]
+    columns = {
+        name: np.array([r[name] for r in records], dtype=np.float64)
+        for name in FUNDAMENTAL_FIELDS
+    }
+    return records, columns
+
+
+def bulk_prepared(payload):
+    validated = validate_fundamentals(payload)
+    return validated.records(), validated.values
+
+
+def best_of(func, repeat: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--bad", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    batch = make_batch(args.rows, args.bad)
+    columns = {name: [r[name] for r in batch] for name in batch[0]}
+    validated = validate_fundamentals(batch)
+    assert validated.rows.tolist() == per_row(batch)[0]
+    assert validate_fundamentals(columns).rows.tolist() == validated.rows.tolist()
+
+    print(
+        f"{args.rows:,} rows x {len(FUNDAMENTAL_FIELDS)} fields, "
+        f"{len(validated.errors):,} invalid"
+    )
+    print(f"{'validator':<18}{'validate ms':>13}{'prepared ms':>13}{'rows/s':>12}")
+    for name, validate, prepare in (
+        ("per-row", lambda: per_row(batch), lambda: per_row_prepared(batch)),
+        (
+            "bulk (records)",
+            lambda: validate_fundamentals(batch),
+            lambda: bulk_prepared(batch),
+        ),
+        (
+            "bulk (columns)",
+            lambda: validate_fundamentals(columns),
+            lambda: bulk_prepared(columns),
+        ),
+    ):
+        validated_in = best_of(validate, args.repeat)
+        prepared_in = best_of(prepare, args.repeat)
+        print(
+            f"{name:<18}{validated_in * 1000:>13.1f}{prepared_in * 1000:>13.1f}"
+            f"{args.rows / prepared_in:>12,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
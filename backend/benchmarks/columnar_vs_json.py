@@ -0,0 +1,74 @@
+"""
+Payload size and encode time: JSON vs the binary columnar format.
+
+Encodes a metric grid the way ``/metrics/evaluate`` does on each path
+(``_jsonable`` + orjson vs ``encode_columns``), raw and gzipped.
+
+    cd backend && python -m benchmarks.columnar_vs_json --rows 5000 --metrics 40
+"""
+
+import argparse
+import gzip
+import os
+import timeit
+
+import numpy as np
+
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/benchmark")
+
+from app.api.metrics import _jsonable  # noqa: E402
+from app.core.columnar_format import decode_columns, encode_columns  # noqa: E402
+from app.core.conditional import json_bytes  # noqa: E402
+
+
+def make_grid(rows: int, metrics: int, null_fraction: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    tickers = [f"T{i:05d}" for i in range(rows)]
+    values = {}
+    for m in range(metrics):
+        column = rng.lognormal(0.0, 1.0, rows)
+        column[rng.random(rows) < null_fraction] = np.nan
+        values[f"metric_{m:02d}"] = column
+    return {"tickers": tickers, "metrics": values}
+
+
+def best_of(func, repeat: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--metrics", type=int, default=40)
+    parser.add_argument("--nulls", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    result = make_grid(args.rows, args.metrics, args.nulls)
+    tickers = result["tickers"]
+
+    def encode_json() -> bytes:
+        return json_bytes(_jsonable(result))
+
+    def encode_binary() -> bytes:
+        return encode_columns({"ticker": tickers, **result["metrics"]}, len(tickers))
+
+    as_json, as_binary = encode_json(), encode_binary()
+    columns, _ = decode_columns(as_binary)
+    for name, values in result["metrics"].items():
+        assert np.array_equal(columns[name], values, equal_nan=True)
+
+    print(f"{args.rows} rows x {args.metrics} metrics, {args.nulls:.0%} nulls")
+    print(f"{'format':<10}{'bytes':>12}{'gzip bytes':>14}{'encode ms':>12}")
+    for name, payload, encode in (
+        ("json", as_json, encode_json),
+        ("columnar", as_binary, encode_binary),
+    ):
+        print(
+            f"{name:<10}{len(payload):>12,}{len(gzip.compress(payload, 6)):>14,}"
+            f"{best_of(encode, args.repeat) * 1000:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
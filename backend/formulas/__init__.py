@@ -0,0 +1,25 @@
+"""
+Dividend analysis formulas, one module per topic.
+
+Importing the package wraps every public function of the formula modules
+with a call counter (see ``instrumentation``) before any caller can bind
+one, so ``from formulas.growth_and_projection import chowder_number`` gets
+the counted function too.
+"""
+
+from importlib import import_module
+
+from .instrumentation import COUNTERS
+
+FORMULA_MODULES = (
+    "core_dividend_safety_and_coverage",
+    "growth_and_projection",
+    "historical_and_trend_analysis",
+    "quality_and_sustainability_metrics",
+    "risk_adjusted_return_metrics",
+    "sector_specific_metrics",
+    "valuation_and_relative_metrics",
+)
+
+for _module in FORMULA_MODULES:
+    COUNTERS.instrument_module(import_module(f"{__name__}.{_module}"))
@@ -0,0 +1,119 @@
+"""
+Call counters for every formula.
+
+``instrument`` wraps a function so every call adds to its ``FormulaStats``:
+call count, cumulative wall time and rows processed (the length of the
+longest array argument, 1 for scalar calls). The cost is two
+``perf_counter`` calls and a short critical section per call.
+
+The package ``__init__`` applies it to each formula module in place, so
+the metric graph and services calling formulas directly are counted the
+same way. Counters are per process.
+"""
+
+import inspect
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import wraps
+from types import ModuleType
+from typing import Any, Callable
+
+
+@dataclass
+class FormulaStats:
+    name: str
+    calls: int = 0
+    seconds: float = 0.0
+    rows: int = 0
+    max_rows: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, seconds: float, rows: int) -> None:
+        with self._lock:
+            self.calls += 1
+            self.seconds += seconds
+            self.rows += rows
+            if rows > self.max_rows:
+                self.max_rows = rows
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "function": self.name,
+            "calls": self.calls,
+            "total_ms": self.seconds * 1000,
+            "mean_us": self.seconds / self.calls * 1e6 if self.calls else 0.0,
+            "rows": self.rows,
+            "mean_rows": self.rows / self.calls if self.calls else 0.0,
+            "max_rows": self.max_rows,
+        }
+
+
+class FormulaCounters:
+    def __init__(self):
+        self.stats: dict[str, FormulaStats] = {}
+
+    def instrument(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap ``func`` so its calls are counted (signature is preserved)"""
+        if hasattr(func, "__formula_stats__"):
+            return func
+        name = f"{func.__module__}.{func.__qualname__}"
+        stats = self.stats.setdefault(name, FormulaStats(name))
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                rows = 1
+                for value in (*args, *kwargs.values()):
+                    shape = getattr(value, "shape", None)
+                    if shape:
+                        rows = max(rows, shape[0])
+                stats.add(time.perf_counter() - start, rows)
+
+        wrapper.__formula_stats__ = stats
+        return wrapper
+
+    def instrument_module(self, module: ModuleType) -> None:
+        """Replace the module's own public functions with counted wrappers"""
+        for name, func in inspect.getmembers(module, inspect.isfunction):
+            if not name.startswith("_") and func.__module__ == module.__name__:
+                setattr(module, name, self.instrument(func))
+
+    def report(self, sort: str = "total_ms") -> list[dict[str, Any]]:
+        rows = [s.to_dict() for s in self.stats.values() if s.calls]
+        return sorted(rows, key=lambda r: r[sort], reverse=True)
+
+    def reset(self) -> None:
+        for stats in self.stats.values():
+            with stats._lock:
+                stats.calls, stats.seconds, stats.rows, stats.max_rows = 0, 0.0, 0, 0
+
+    def snapshot(self) -> dict[str, tuple[int, float, int, int]]:
+        """``(calls, seconds, rows, max_rows)`` of every function called so far"""
+        snapshot = {}
+        for name, stats in self.stats.items():
+            with stats._lock:
+                if stats.calls:
+                    snapshot[name] = (
+                        stats.calls,
+                        stats.seconds,
+                        stats.rows,
+                        stats.max_rows,
+                    )
+        return snapshot
+
+    def discount(self, snapshot: dict[str, tuple[int, float, int, int]]) -> None:
+        """Reset to the calls made after ``snapshot`` was taken"""
+        for name, stats in self.stats.items():
+            calls, seconds, rows, _ = snapshot.get(name, (0, 0.0, 0, 0))
+            with stats._lock:
+                stats.calls -= calls
+                stats.seconds -= seconds
+                stats.rows -= rows
+                stats.max_rows = 0
+
+
+COUNTERS = FormulaCounters()
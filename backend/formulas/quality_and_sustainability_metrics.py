@@ -3,6 +3,10 @@
 
 
 # Cash Flow Quality Indicators
+def free_cash_flow(operating_cash_flow: float, capital_expenditures: float) -> float:
+    return operating_cash_flow - capital_expenditures
+
+
 def free_cash_flow_margin(free_cash_flow: float, revenue: float) -> float:
     return free_cash_flow / revenue
 
@@ -0,0 +1,115 @@
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from app.core.columnar_format import (
+    _PREAMBLE,
+    MAGIC,
+    decode_columns,
+    encode_columns,
+)
+
+
+def schema_of(payload):
+    _, _, size = _PREAMBLE.unpack_from(payload)
+    return json.loads(payload[_PREAMBLE.size : _PREAMBLE.size + size])
+
+
+def test_round_trip_keeps_types_and_nulls():
+    payload = encode_columns(
+        {
+            "ticker": ["KO", "PEP", None, "ÅBB"],
+            "yield": np.array([3.1, np.nan, np.inf, -1.5]),
+            "streak": np.array([61, 51, 0, 3]),
+            "mixed": [1.5, None, 2, 0.0],
+        },
+        4,
+        {"sort": "yield", "next_cursor": None},
+    )
+    assert payload[:4] == MAGIC
+    assert (_PREAMBLE.size + _PREAMBLE.unpack_from(payload)[2]) % 8 == 0
+
+    columns, meta = decode_columns(payload)
+    assert meta == {"sort": "yield", "next_cursor": None}
+    assert columns["ticker"] == ["KO", "PEP", None, "ÅBB"]
+    np.testing.assert_array_equal(columns["yield"], [3.1, np.nan, np.nan, -1.5])
+    assert columns["streak"].dtype == np.dtype("<i4")
+    np.testing.assert_array_equal(columns["streak"], [61, 51, 0, 3])
+    np.testing.assert_array_equal(columns["mixed"], [1.5, np.nan, 2.0, 0.0])
+
+    types = {c["name"]: c["type"] for c in schema_of(payload)["columns"]}
+    assert types == {
+        "ticker": "utf8",
+        "yield": "float64",
+        "streak": "int32",
+        "mixed": "float64",
+    }
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("USD", ["USD"] * 3),
+        (b"USD", ["USD"] * 3),
+        (np.array("USD"), ["USD"] * 3),
+        (2.5, [2.5] * 3),
+        (np.float64(2.5), [2.5] * 3),
+        (7, [7] * 3),
+    ],
+)
+def test_scalars_are_broadcast(value, expected):
+    columns, _ = decode_columns(encode_columns({"value": value}, 3))
+    assert list(columns["value"]) == expected
+
+
+def test_null_scalar_and_empty_tables():
+    columns, _ = decode_columns(encode_columns({"value": None}, 2))
+    assert np.isnan(columns["value"]).all()
+
+    payload = encode_columns(
+        {"ticker": [], "yield": [], "streak": []},
+        0,
+        types={"ticker": "utf8", "streak": "int32"},
+    )
+    columns, meta = decode_columns(payload)
+    assert (columns["ticker"], meta) == ([], {})
+    types = {c["name"]: c["type"] for c in schema_of(payload)["columns"]}
+    assert types == {"ticker": "utf8", "yield": "float64", "streak": "int32"}
+
+
+def test_pinned_types_override_inference():
+    payload = encode_columns(
+        {"id": [1, 2], "code": [7, 8], "ticker": [None, None]},
+        2,
+        types={"id": "float64", "code": "utf8", "ticker": "utf8"},
+    )
+    columns, _ = decode_columns(payload)
+    assert columns["id"].dtype == np.dtype("<f8")
+    assert (columns["code"], columns["ticker"]) == (["7", "8"], [None, None])
+
+    with pytest.raises(ValueError, match="Unknown column types: text"):
+        encode_columns({"ticker": ["KO"]}, 1, types={"ticker": "text"})
+    with pytest.raises(ValueError, match="'ticker' is not numeric"):
+        encode_columns({"ticker": ["KO"]}, 1, types={"ticker": "float64"})
+    with pytest.raises(ValueError, match="'yield' does not fit int32"):
+        encode_columns({"yield": [1.5]}, 1, types={"yield": "int32"})
+
+
+def test_large_integers_fall_back_to_float64():
+    columns, _ = decode_columns(encode_columns({"cap": [2**40, 1]}, 2))
+    assert columns["cap"].dtype == np.dtype("<f8")
+    assert columns["cap"][0] == 2**40
+
+
+def test_columns_of_the_wrong_length_are_rejected():
+    with pytest.raises(ValueError, match="'ticker' has 2 rows, not 3"):
+        encode_columns({"ticker": ["KO", "PEP"]}, 3)
+    with pytest.raises(ValueError):
+        encode_columns({"yield": [1.0, 2.0]}, 3)
+
+
+def test_foreign_payloads_are_rejected():
+    with pytest.raises(ValueError, match="Not a columnar payload"):
+        decode_columns(struct.pack("<4sB3xI", b"JSON", 1, 0))
@@ -0,0 +1,115 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.core.columnar_store import FundamentalsStore
+from app.models.fundamentals import Fundamental
+
+
+def rows(*items):
+    return [
+        {"ticker": t, "period_end": p, "revenue": r, "net_income": n}
+        for t, p, r, n in items
+    ]
+
+
+def test_upsert_grows_axes_and_keeps_existing_values(store):
+    store.upsert(rows(("KO", "2023-12-31", 1.0, 0.1), ("PEP", "2023-12-31", 2.0, None)))
+    # New ticker and an earlier period: columns are re-laid, periods stay sorted
+    store.upsert(rows(("MSFT", "2022-12-31", 3.0, 0.3)))
+
+    assert store.tickers == ["KO", "PEP", "MSFT"]
+    assert store.periods == ["2022-12-31", "2023-12-31"]
+    np.testing.assert_array_equal(
+        store.get("revenue"), [[np.nan, 1.0], [np.nan, 2.0], [3.0, np.nan]]
+    )
+    np.testing.assert_array_equal(store.series("net_income", "KO"), [np.nan, 0.1])
+
+
+def test_upsert_reports_only_changed_fields(store):
+    assert store.upsert(rows(("KO", "2023-12-31", 1.0, None))) == {"KO": {"revenue"}}
+    assert store.upsert(rows(("KO", "2023-12-31", 1.0, 0.5))) == {"KO": {"net_income"}}
+    version = store.version
+    assert store.upsert(rows(("KO", "2023-12-31", 1.0, 0.5))) == {}
+    assert store.version == version
+
+
+def test_upsert_columns_matches_upsert(tmp_path):
+    by_rows = FundamentalsStore.open(tmp_path / "rows")
+    by_columns = FundamentalsStore.open(tmp_path / "columns")
+    by_rows.upsert(rows(("KO", date(2023, 12, 31), 1.0, None)))
+    by_columns.upsert_columns(
+        ["KO"], [date(2023, 12, 31)], {"revenue": np.array([1.0])}
+    )
+    for field in by_rows.fields:
+        np.testing.assert_array_equal(by_rows.get(field), by_columns.get(field))
+
+
+def test_reads_slice_and_latest(store):
+    store.upsert(
+        rows(
+            ("KO", "2021-12-31", 1.0, None),
+            ("KO", "2022-12-31", 2.0, None),
+            ("PEP", "2021-12-31", 5.0, None),
+        )
+    )
+    np.testing.assert_array_equal(
+        store.get("revenue", ["PEP"], start="2021-12-31", end="2021-12-31"), [[5.0]]
+    )
+    np.testing.assert_array_equal(store.latest("revenue"), [2.0, 5.0])
+    assert store.latest_row("PEP", ["revenue"]) == {"revenue": 5.0}
+    assert np.isnan(store.latest("net_income")).all()
+
+
+def test_single_writer_and_versions_on_disk(tmp_path):
+    writer = FundamentalsStore.open(tmp_path)
+    other = FundamentalsStore.open(tmp_path)
+    writer.upsert(rows(("KO", "2023-12-31", 1.0, None)))
+
+    assert not other.acquire_writer()
+    with pytest.raises(RuntimeError):
+        other.upsert(rows(("PEP", "2023-12-31", 2.0, None)))
+
+    # Readers follow the version written to the index
+    assert other.refresh()
+    assert (other.version, other.tickers) == (writer.version, ["KO"])
+    assert not other.refresh()
+
+    # A new writer carries on from the on-disk version
+    writer.close()
+    other.upsert(rows(("PEP", "2023-12-31", 2.0, None)))
+    assert other.version == writer.version + 1
+    np.testing.assert_array_equal(other.get("revenue"), [[1.0], [2.0]])
+    other.close()
+
+
+def test_readers_on_an_old_index_keep_aligned_columns(tmp_path):
+    writer = FundamentalsStore.open(tmp_path / "store")
+    writer.upsert(rows(("KO", "2023-12-31", 1.0, None)))
+    reader = FundamentalsStore.open(tmp_path / "store")
+
+    # An earlier period shifts every position; the reader has not refreshed
+    writer.upsert(rows(("KO", "2022-12-31", 0.5, None)))
+    np.testing.assert_array_equal(reader.series("revenue", "KO"), [1.0])
+    assert reader.refresh()
+    np.testing.assert_array_equal(reader.series("revenue", "KO"), [0.5, 1.0])
+
+    # Two re-lays behind: its files are gone, so it reloads the index
+    stale = FundamentalsStore.open(tmp_path / "store")
+    writer.upsert(rows(("KO", "2021-12-31", 0.1, None)))
+    writer.upsert(rows(("KO", "2020-12-31", 0.0, None)))
+    np.testing.assert_array_equal(stale.series("revenue", "KO"), [0.0, 0.1, 0.5, 1.0])
+    assert stale.version == writer.version
+    assert sorted(p.name for p in writer.path.glob("revenue*")) == [
+        "revenue.3.npy",
+        "revenue.4.npy",
+    ]
+
+
+async def test_sync_collects_changes_into_the_callers_dict(store, session):
+    session.add(Fundamental(ticker="KO", period_end=date(2023, 12, 31), revenue=1.0))
+    await session.commit()
+    changes = {}
+    assert await store.sync_from_db(session, changes=changes) is changes
+    assert changes == {"KO": {"revenue"}}
@@ -0,0 +1,154 @@
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.api import screener
+from app.core import conditional, market_assumptions
+from app.core.columnar_format import MEDIA_TYPE as COLUMNAR, decode_columns
+from app.core.columnar_store import FundamentalsStore, get_fundamentals_store
+from app.core.conditional import ResponseCache, versioned_response
+from app.core.market_assumptions import MarketAssumptionsStore
+from app.dependencies import get_async_session, get_dataset_versions
+from app.services.screener import materialize_metric_values
+
+METRICS = ("current_dividend_yield",)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = ResponseCache(gzip_min_bytes=1024)
+    monkeypatch.setattr(conditional, "get_response_cache", lambda: cache)
+    return cache
+
+
+@pytest.fixture
+def versioned(cache):
+    state = {"version": 1, "builds": 0}
+    app = FastAPI()
+
+    @app.get("/values")
+    async def values(request: Request, size: int = 10):
+        def build():
+            state["builds"] += 1
+            return {"version": state["version"], "values": list(range(size))}
+
+        return await versioned_response(request, {"data": state["version"]}, build)
+
+    return TestClient(app), state
+
+
+def test_etags_answer_304_until_a_version_moves(versioned):
+    client, state = versioned
+    first = client.get("/values")
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"') and first.headers["cache-control"] == (
+        "private, no-cache"
+    )
+
+    # Other clients get the cached body, this one a 304
+    assert client.get("/values").json() == first.json()
+    unchanged = client.get("/values", headers={"If-None-Match": f'"x", {etag}'})
+    assert (unchanged.status_code, unchanged.content) == (304, b"")
+    assert state["builds"] == 1
+
+    # Each query is its own representation
+    assert client.get("/values?size=2").headers["etag"] != etag
+
+    state["version"] = 2
+    moved = client.get("/values", headers={"If-None-Match": etag})
+    assert moved.status_code == 200 and moved.json()["version"] == 2
+    assert state["builds"] == 3
+
+
+def test_large_bodies_are_gzipped_once_when_accepted(versioned, cache):
+    client, _ = versioned
+    small = client.get("/values", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+    large = client.get("/values?size=1000", headers={"Accept-Encoding": "gzip"})
+    assert large.headers["content-encoding"] == "gzip"
+    entry = cache.get(large.headers["etag"])
+    assert entry.gzipped is not None and len(entry.gzipped) < len(entry.body)
+
+    plain = client.get("/values?size=1000", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == large.json()
+
+
+def rows(price):
+    return [
+        {
+            "ticker": "KO",
+            "period_end": "2023-12-31",
+            "dividend_per_share": 2.0,
+            "stock_price": price,
+        }
+    ]
+
+
+async def test_screener_etags_wait_for_materialized_values(session, store, cache):
+    store.upsert(rows(50.0))
+    await materialize_metric_values(session, store, metrics=METRICS)
+    store.mark_materialized()
+
+    # Served by a follower worker over the same store directory
+    follower = FundamentalsStore.open(store.path)
+    app = FastAPI()
+    app.include_router(screener.router)
+    app.dependency_overrides[get_fundamentals_store] = lambda: follower
+    app.dependency_overrides[get_async_session] = lambda: session
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        first = await client.get("/screener")
+        etag = first.headers["etag"]
+        assert first.json()["items"][0]["current_dividend_yield"] == pytest.approx(4.0)
+
+        # Synced but not yet materialized: the old rows keep the old tag
+        store.upsert(rows(25.0))
+        stale = await client.get("/screener", headers={"If-None-Match": etag})
+        assert stale.status_code == 304
+
+        await materialize_metric_values(session, store, ["KO"], metrics=METRICS)
+        store.mark_materialized()
+        fresh = await client.get("/screener", headers={"If-None-Match": etag})
+        assert fresh.status_code == 200 and fresh.headers["etag"] != etag
+        item = fresh.json()["items"][0]
+        assert item["current_dividend_yield"] == pytest.approx(8.0)
+        assert follower.materialized_version == store.version
+
+
+async def test_an_empty_columnar_page_keeps_text_columns(session, store, cache):
+    store.upsert(rows(50.0))
+    await materialize_metric_values(session, store, metrics=METRICS)
+    store.mark_materialized()
+    app = FastAPI()
+    app.include_router(screener.router)
+    app.dependency_overrides[get_fundamentals_store] = lambda: store
+    app.dependency_overrides[get_async_session] = lambda: session
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        response = await client.get(
+            "/screener",
+            params={"filter": "current_dividend_yield:100:"},
+            headers={"Accept": COLUMNAR},
+        )
+    columns, meta = decode_columns(response.content)
+    assert columns["ticker"] == [] and meta["next_cursor"] is None
+
+
+def test_dataset_versions_follow_other_processes(store, tmp_path, monkeypatch):
+    follower = FundamentalsStore.open(store.path)
+    market = MarketAssumptionsStore(tmp_path / "market")
+    monkeypatch.setattr(
+        market_assumptions, "get_market_assumptions_store", lambda: market
+    )
+    monkeypatch.setattr("app.dependencies.get_market_assumptions_store", lambda: market)
+    before = get_dataset_versions(follower)
+
+    store.upsert(rows(50.0))
+    MarketAssumptionsStore(tmp_path / "market").publish([1.0, 10.0], [4.0, 4.5], 5.0)
+    after = get_dataset_versions(follower)
+    assert after["fundamentals"] == store.version != before["fundamentals"]
+    assert (before["market"], after["market"]) == (0, 1)
+    assert not market.refresh()
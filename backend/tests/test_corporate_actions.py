@@ -0,0 +1,151 @@
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.models.corporate_actions import SPIN_OFF, SPLIT, CorporateAction
+from app.services.corporate_actions import (
+    NO_ADJUSTMENT,
+    AdjustmentFactors,
+    CorporateActionAdjuster,
+)
+from app.services.dividend_streaks import DividendStreakTracker
+
+
+def action(id, ticker, effective_date, action_type, ratio, **kwargs):
+    return CorporateAction(
+        id=id,
+        ticker=ticker,
+        effective_date=effective_date,
+        action_type=action_type,
+        ratio=ratio,
+        **kwargs,
+    )
+
+
+def test_factors_compound_backwards_from_each_effective_date():
+    factors = AdjustmentFactors.from_actions(
+        [(date(2022, 6, 1), 0.5), (date(2020, 1, 1), 0.25)]
+    )
+    dates = np.array(
+        ["2019-12-31", "2020-01-01", "2022-05-31", "2022-06-01", "2024-01-01"],
+        dtype="datetime64[D]",
+    )
+    # Values are restated from the ex-date on, not the day after
+    np.testing.assert_array_equal(factors.at(dates), [0.125, 0.5, 0.5, 1, 1])
+
+
+def test_splits_and_spin_offs_restate_per_share_values():
+    adjuster = CorporateActionAdjuster()
+    adjuster.record(action(1, "KO", date(2021, 1, 1), SPLIT, 2.0))
+    adjuster.record(action(2, "KO", date(2022, 1, 1), SPIN_OFF, 0.8))
+    dates = np.array(["2020-06-30", "2021-06-30", "2022-06-30"], "datetime64[D]")
+    np.testing.assert_allclose(
+        adjuster.adjust("KO", dates, [4.0, 2.0, 1.6]), [1.6, 1.6, 1.6]
+    )
+    assert adjuster.factors("PEP") is NO_ADJUSTMENT
+
+    # Re-recording an action replaces it and drops the cached factors
+    adjuster.record(action(1, "KO", date(2021, 1, 1), SPLIT, 4.0))
+    assert adjuster.adjust("KO", dates[:1], [4.0])[0] == pytest.approx(0.8)
+
+
+def test_store_reads_adjust_only_per_share_fields(store):
+    store.upsert(
+        [
+            {
+                "ticker": t,
+                "period_end": period,
+                "stock_price": price,
+                "revenue": 10.0,
+            }
+            for t in ("KO", "PEP")
+            for period, price in (("2020-12-31", 100.0), ("2021-12-31", 50.0))
+        ]
+    )
+    adjuster = CorporateActionAdjuster()
+    adjuster.record(action(1, "KO", date(2021, 6, 1), SPLIT, 2.0))
+    np.testing.assert_array_equal(
+        adjuster.adjusted_matrix(store, "stock_price"), [[50, 50], [100, 50]]
+    )
+    np.testing.assert_array_equal(
+        adjuster.adjusted_series(store, "stock_price", "KO"), [50, 50]
+    )
+    np.testing.assert_array_equal(
+        adjuster.adjusted_matrix(store, "revenue"), [[10, 10], [10, 10]]
+    )
+
+
+def test_a_split_halving_the_dividend_is_not_a_cut():
+    adjuster = CorporateActionAdjuster()
+    tracker = DividendStreakTracker(adjuster)
+    amounts = {2019: 1.0, 2020: 1.05, 2021: 1.1, 2022: 0.6, 2023: 0.65}
+    events = [
+        (date(year, month, 15), amount, False)
+        for year, amount in amounts.items()
+        for month in (3, 6, 9, 12)
+    ]
+    tracker.rebuild("KO", events)
+    assert (
+        tracker.snapshot(date(2023, 12, 31)).row(0)["consecutive_increase_years"] == 1
+    )
+
+    adjuster.record(action(1, "KO", date(2022, 1, 1), SPLIT, 2.0))
+    tracker.rebuild("KO", events)
+    assert (
+        tracker.snapshot(date(2023, 12, 31)).row(0)["consecutive_increase_years"] == 4
+    )
+    # New payments are adjusted too
+    assert tracker.add_payment("KO", date(2024, 3, 15), 0.7)
+    assert tracker.states["KO"].rate == pytest.approx(2.8)
+
+
+async def test_sync_reports_only_changed_tickers(session):
+    stamp = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    session.add(
+        CorporateAction(
+            ticker="KO",
+            effective_date=date(2021, 1, 1),
+            action_type=SPLIT,
+            ratio=2.0,
+            updated_at=stamp,
+        )
+    )
+    await session.commit()
+    adjuster = CorporateActionAdjuster()
+    assert await adjuster.sync_from_db(session) == {"KO"}
+    assert adjuster.synced_at.replace(tzinfo=timezone.utc) == stamp
+    assert await adjuster.sync_from_db(session) == set()
+    assert adjuster.factors("KO").at(np.datetime64("2020-01-01"))[()] == 0.5
+
+
+async def test_sync_catches_late_commits_and_deletes(session):
+    stamp = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    split = action(None, "KO", date(2021, 1, 1), SPLIT, 2.0, updated_at=stamp)
+    session.add(split)
+    await session.commit()
+    adjuster = CorporateActionAdjuster()
+    assert await adjuster.sync_from_db(session) == {"KO"}
+    version = adjuster.version
+
+    # Stamped before the watermark but committed after it
+    late = action(
+        None,
+        "PEP",
+        date(2022, 1, 1),
+        SPLIT,
+        3.0,
+        updated_at=stamp - timedelta(seconds=30),
+    )
+    session.add(late)
+    await session.commit()
+    assert await adjuster.sync_from_db(session) == {"PEP"}
+    assert await adjuster.sync_from_db(session) == set()
+    assert adjuster.version != version
+
+    await session.delete(late)
+    await session.commit()
+    assert await adjuster.sync_from_db(session) == {"PEP"}
+    assert adjuster.factors("PEP") is NO_ADJUSTMENT
+    assert adjuster.version == version
+    assert CorporateActionAdjuster().version == "0"
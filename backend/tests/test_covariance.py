@@ -0,0 +1,137 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.models.corporate_actions import SPLIT, CorporateAction
+from app.services.corporate_actions import CorporateActionAdjuster
+from app.services.covariance import (
+    CovarianceCache,
+    ledoit_wolf_covariance,
+    periods_per_year,
+)
+
+
+def dense_ledoit_wolf(x):
+    x = x - x.mean(axis=0)
+    t, n = x.shape
+    sample = x.T @ x / t
+    mu = np.trace(sample) / n
+    d2 = np.sum((sample - mu * np.eye(n)) ** 2)
+    b2 = sum(np.sum((np.outer(row, row) - sample) ** 2) for row in x) / t**2
+    delta = min(b2, d2) / d2
+    return delta * mu * np.eye(n) + (1 - delta) * sample, delta
+
+
+@pytest.mark.parametrize("chunk_size", [2, 3, 512])
+def test_blocked_estimator_matches_the_dense_formula(chunk_size):
+    x = np.random.default_rng(0).normal(size=(12, 7))
+    expected, expected_delta = dense_ledoit_wolf(x)
+    out, delta = ledoit_wolf_covariance(x, chunk_size=chunk_size)
+    np.testing.assert_allclose(out, expected)
+    assert delta == pytest.approx(expected_delta)
+
+
+def test_annualization_from_period_spacing():
+    assert periods_per_year(["2023-03-31", "2023-06-30", "2023-09-30"]) == 365.25 / 91
+    assert periods_per_year(["2023-12-31"]) == 1.0
+
+
+@pytest.fixture
+def store(store):
+    rng = np.random.default_rng(1)
+    periods = [f"{y}-{m:02d}-28" for y in (2022, 2023) for m in range(1, 13)]
+    store.upsert(
+        [
+            {
+                "ticker": ticker,
+                "period_end": period,
+                "stock_price": 50 * (1 + 0.05 * rng.normal()),
+                "dividend_per_share": 2.0,
+            }
+            for ticker in ("KO", "PEP", "T")
+            for period in periods
+        ]
+    )
+    return store
+
+
+def test_cached_matrix_is_reused_and_sub_matrices_gathered(store, tmp_path):
+    cache = CovarianceCache(tmp_path / "cov", chunk_size=2)
+    adjuster = CorporateActionAdjuster()
+    cov = cache.get(store, adjuster, window=12)
+    assert cache.get(store, adjuster, window=12) is cov
+    # Another process opens the same file instead of recomputing
+    other = CovarianceCache(tmp_path / "cov").get(store, adjuster, window=12)
+    np.testing.assert_array_equal(other.matrix, cov.matrix)
+    sub = cov.sub(["T", "KO"], annualize=False)
+    assert sub[0, 1] == cov.matrix[2, 0] and sub.shape == (2, 2)
+    with pytest.raises(KeyError):
+        cov.sub(["MSFT"])
+    # No temp files are left behind
+    assert sorted(p.suffix for p in (tmp_path / "cov").iterdir()) == [".json", ".npy"]
+
+
+def test_restated_history_or_new_actions_change_the_key(store, tmp_path):
+    cache = CovarianceCache(tmp_path / "cov")
+    adjuster = CorporateActionAdjuster()
+    before = cache.get(store, adjuster, window=12)
+
+    store.upsert([{"ticker": "KO", "period_end": "2023-12-28", "stock_price": 80.0}])
+    restated = cache.get(store, adjuster, window=12)
+    assert restated is not before
+    assert not np.array_equal(restated.matrix, before.matrix)
+
+    adjuster.record(
+        CorporateAction(
+            id=1,
+            ticker="KO",
+            effective_date=date(2023, 12, 1),
+            action_type=SPLIT,
+            ratio=2.0,
+        )
+    )
+    assert cache.get(store, adjuster, window=12) is not restated
+
+
+def test_only_the_most_recently_used_files_are_kept(store, tmp_path):
+    cache = CovarianceCache(tmp_path / "cov", max_open=1, max_files=2)
+    adjuster = CorporateActionAdjuster()
+    first = cache.key(store.tickers, 6, store.periods[-1], store.version)
+    for window in (6, 8):
+        cache.get(store, adjuster, window=window)
+    cache.get(store, adjuster, window=6)  # reused, so window 8 is now the oldest
+    cache.get(store, adjuster, window=10)
+
+    kept = {p.stem for p in (tmp_path / "cov").glob("*.json")}
+    assert len(kept) == 2 and first in kept
+    assert len(list((tmp_path / "cov").glob("*.npy"))) == 2
+    assert "-w8-" not in "".join(kept)
+
+
+def test_concurrent_first_requests_build_once(store, tmp_path, monkeypatch):
+    cache = CovarianceCache(tmp_path / "cov")
+    adjuster = CorporateActionAdjuster()
+    builds = []
+    compute = cache._compute
+
+    def slow_compute(key, *args):
+        builds.append(key)
+        time.sleep(0.05)  # long enough for every request to arrive
+        return compute(key, *args)
+
+    monkeypatch.setattr(cache, "_compute", slow_compute)
+    start = threading.Barrier(8)
+
+    def request(window):
+        start.wait()
+        return cache.get(store, adjuster, window=window)
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(request, [12] * 6 + [6] * 2))
+    assert sorted(builds) == sorted(set(builds)) and len(builds) == 2
+    assert all(r is results[0] for r in results[:6])
+    assert len(cache._open) == 2 and not cache._building
@@ -0,0 +1,151 @@
+import smtplib
+import socket
+from contextlib import asynccontextmanager
+from datetime import date
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.services.alert_dispatcher import (
+    DividendAlertDispatcher,
+    SMTPConnectionPool,
+    build_alert_message,
+)
+from app.services.dividend_calendar import (
+    CalendarEntry,
+    DividendAlert,
+    DividendCalendar,
+    HoldingsIndex,
+    group_alerts_by_recipient,
+)
+
+ENTRIES = [
+    CalendarEntry("KO", date(2024, 3, 14), date(2024, 4, 1), 0.485),
+    CalendarEntry("PEP", date(2024, 3, 1), None, 1.265),
+    CalendarEntry("MSFT", date(2024, 2, 14), date(2024, 3, 14), 0.75),
+    CalendarEntry("T", date(2024, 4, 9), date(2024, 5, 1), 0.2775),
+]
+
+
+def test_calendar_windows_are_inclusive_and_sorted():
+    calendar = DividendCalendar(ENTRIES)
+    ex = calendar.ex_dividends_between(date(2024, 3, 1), date(2024, 3, 14))
+    assert [e.ticker for e in ex] == ["PEP", "KO"]
+    # Entries without a pay date never match a payment window
+    paid = calendar.payments_between(date(2024, 1, 1), date(2024, 12, 31))
+    assert [e.ticker for e in paid] == ["MSFT", "KO", "T"]
+    upcoming = calendar.upcoming_ex_dividends(10, today=date(2024, 3, 31))
+    assert [e.ticker for e in upcoming] == ["T"]
+
+
+def test_alerts_grouped_per_recipient():
+    holdings = HoldingsIndex(
+        [("a@x.com", "KO", 10), ("b@x.com", "KO", 5), ("a@x.com", "PEP", 2)]
+    )
+    alerts = group_alerts_by_recipient(ENTRIES, holdings)
+    assert {r: [a.entry.ticker for a in v] for r, v in alerts.items()} == {
+        "a@x.com": ["KO", "PEP"],
+        "b@x.com": ["KO"],
+    }
+    message = build_alert_message("a@x.com", alerts["a@x.com"], "alerts@x.com")
+    body = message.get_content()
+    # Listed by ex-date, with the expected payment for the position
+    assert body.index("PEP") < body.index("KO")
+    assert "~$4.85 on 10 shares" in body
+
+
+class FakePool:
+    def __init__(self, failures):
+        self.failures = failures  # recipient -> exceptions to raise, in order
+        self.sent = []
+        self.closed = False
+
+    @asynccontextmanager
+    async def connection(self):
+        yield self
+
+    async def send(self, message):
+        errors = self.failures.get(message["To"], [])
+        if errors:
+            raise errors.pop(0)
+        self.sent.append(message["To"])
+
+    async def close(self):
+        self.closed = True
+
+
+async def test_dispatch_retries_dropped_sessions_and_reports_failures():
+    holdings = HoldingsIndex([(f"u{i}@x.com", "KO", 1) for i in range(5)])
+    alerts = group_alerts_by_recipient(ENTRIES, holdings)
+    pool = FakePool(
+        {
+            "u1@x.com": [smtplib.SMTPServerDisconnected("idle")],
+            "u2@x.com": [smtplib.SMTPRecipientsRefused({})],
+        }
+    )
+    dispatcher = DividendAlertDispatcher(pool, "alerts@x.com", concurrency=2)
+
+    report = await dispatcher.dispatch(alerts)
+
+    assert report.sent == 4
+    assert list(report.failed) == ["u2@x.com"]
+    assert sorted(pool.sent) == ["u0@x.com", "u1@x.com", "u3@x.com", "u4@x.com"]
+    assert pool.closed
+
+
+async def test_a_failing_message_does_not_stop_the_workers():
+    holdings = HoldingsIndex([(f"u{i}@x.com", "KO", 1) for i in range(6)])
+    alerts = group_alerts_by_recipient(ENTRIES, holdings)
+    broken = CalendarEntry("X", date(2024, 3, 1), None, None)  # no amount to format
+    for recipient in ("u0@x.com", "u3@x.com"):
+        alerts[recipient] = [DividendAlert(recipient, broken, 1)]
+    pool = FakePool({})
+    dispatcher = DividendAlertDispatcher(
+        pool, "alerts@x.com", concurrency=2, queue_size=1
+    )
+
+    report = await dispatcher.dispatch(alerts)
+    assert report.sent == 4
+    assert sorted(report.failed) == ["u0@x.com", "u3@x.com"]
+    assert report.failed["u0@x.com"].startswith("TypeError")
+
+
+class Sink:
+    def __init__(self):
+        self.messages = []
+        self.peers = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope.rcpt_tos)
+        self.peers.add(session.peer)
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp_sink():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    sink = Sink()
+    controller = Controller(sink, hostname="127.0.0.1", port=port)
+    controller.start()
+    yield sink, port
+    controller.stop()
+
+
+async def test_real_pool_reuses_sessions_against_a_local_sink(smtp_sink):
+    sink, port = smtp_sink
+    pool = SMTPConnectionPool(
+        "127.0.0.1", port, use_tls=False, size=2, max_messages_per_connection=2
+    )
+    holdings = HoldingsIndex([(f"u{i}@x.com", "KO", 1) for i in range(5)])
+    dispatcher = DividendAlertDispatcher(pool, "alerts@x.com", concurrency=2)
+
+    report = await dispatcher.dispatch(group_alerts_by_recipient(ENTRIES, holdings))
+    assert (report.sent, report.failed) == (5, {})
+    assert sorted(r for rcpts in sink.messages for r in rcpts) == [
+        f"u{i}@x.com" for i in range(5)
+    ]
+    # Two messages per session, so five emails take three connections
+    assert len(sink.peers) == 3
+    assert pool._idle == []
@@ -0,0 +1,119 @@
+from datetime import date
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import metrics
+from app.core.columnar_store import get_fundamentals_store
+from app.models.corporate_actions import SPLIT, CorporateAction
+from app.services import dividend_growth
+from app.services.corporate_actions import CorporateActionAdjuster
+from app.services.dividend_growth import (
+    annual_dividend_yield,
+    compute_dividend_growth,
+    dividend_growth_from_store,
+    latest_dividend_yield,
+)
+from formulas.growth_and_projection import (
+    compound_annual_growth_rate,
+    simple_annual_growth_rate,
+    weighted_average_growth_rate,
+)
+from formulas.historical_and_trend_analysis import dividend_growth_velocity
+
+DIVIDENDS = [1.0, 1.1, 1.25, 1.3, 1.5, 1.6, 1.8]
+
+
+def test_windows_match_the_scalar_formulas():
+    growth = compute_dividend_growth([DIVIDENDS], ["KO"], range(2017, 2024), (1, 3))
+    assert growth.cagr[3][0, -1] == pytest.approx(
+        compound_annual_growth_rate(1.8, 1.3, 3)
+    )
+    assert np.isnan(growth.cagr[3][0, 2])  # reaches back before the first year
+    yoy = [simple_annual_growth_rate(b, a) for a, b in zip(DIVIDENDS, DIVIDENDS[1:])]
+    np.testing.assert_allclose(growth.yoy[0, 1:], yoy)
+    assert growth.velocity[0, -1] == pytest.approx(
+        dividend_growth_velocity(yoy[-1], yoy[-2])
+    )
+    assert growth.weighted_yoy[3][0, -1] == pytest.approx(
+        weighted_average_growth_rate(yoy[-3:], [1, 2, 3])
+    )
+
+
+def test_a_cut_to_zero_resets_the_history():
+    dividends = [[1.0, 1.1, 0.0, 0.5, 0.55, 0.6]]
+    growth = compute_dividend_growth(dividends, ["T"], range(6), (1, 3, 10))
+    assert np.isnan(growth.cagr[3][0, 5])  # spans the suspension
+    assert growth.cagr[1][0, 4] == pytest.approx(0.1)
+    assert np.isnan(growth.cagr[10]).all()
+    assert growth.latest("T")["cagr_10y"] is None
+
+
+@pytest.fixture
+def store(store):
+    prices = [40.0, 50.0, 44.0, 52.0, 60.0, 55.0, 72.0]
+    store.upsert(
+        [
+            {
+                "ticker": "KO",
+                "period_end": f"{year}-12-31",
+                "dividend_per_share": dividend,
+                "stock_price": price,
+            }
+            for year, dividend, price in zip(range(2017, 2024), DIVIDENDS, prices)
+        ]
+    )
+    return store
+
+
+def test_chowder_history_uses_each_years_yield(store):
+    growth = dividend_growth_from_store(store, ["KO"])
+    yields = annual_dividend_yield(store, ["KO"])
+    assert yields[0, 0] == pytest.approx(2.5)
+
+    app = FastAPI()
+    app.include_router(metrics.router)
+    app.dependency_overrides[get_fundamentals_store] = lambda: store
+    body = TestClient(app).get(
+        "/metrics/dividend-growth", params={"tickers": "ko", "history": True}
+    )
+    ko = body.json()["tickers"]["KO"]
+    chowder = ko["history"]["chowder_number"]
+    assert chowder[:5] == [None] * 5
+    for year in (5, 6):
+        assert chowder[year] == pytest.approx(
+            DIVIDENDS[year] / [55.0, 72.0][year - 5] * 100
+            + growth.cagr[5][0, year] * 100
+        )
+    # The latest value pairs today's yield with the latest 5-year CAGR
+    assert ko["chowder_number"] == pytest.approx(chowder[-1])
+
+
+def test_latest_yield_is_split_adjusted(store, monkeypatch):
+    adjuster = CorporateActionAdjuster()
+    monkeypatch.setattr(
+        dividend_growth, "get_corporate_action_adjuster", lambda: adjuster
+    )
+    # A 2-for-1 split after the last dividend, then a post-split price
+    adjuster.record(
+        CorporateAction(
+            id=1,
+            ticker="KO",
+            effective_date=date(2024, 6, 1),
+            action_type=SPLIT,
+            ratio=2.0,
+        )
+    )
+    store.upsert([{"ticker": "KO", "period_end": "2024-12-31", "stock_price": 36.0}])
+    assert latest_dividend_yield(store, ["KO"])[0] == pytest.approx(0.9 / 36 * 100)
+
+    app = FastAPI()
+    app.include_router(metrics.router)
+    app.dependency_overrides[get_fundamentals_store] = lambda: store
+    client = TestClient(app)
+    assert (
+        client.get("/metrics/dividend-growth", params={"tickers": "PEP"}).status_code
+        == 404
+    )
@@ -0,0 +1,137 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.models.dividends import DividendEvent
+from app.services.dividend_streaks import (
+    DividendStreakTracker,
+    StreakState,
+    payment_frequency,
+)
+
+
+def quarterly(year, amount):
+    return [(date(year, month, 15), amount, False) for month in (2, 5, 8, 11)]
+
+
+def monthly(year, amount):
+    return [(date(year, month, 15), amount, False) for month in range(1, 13)]
+
+
+# Raises through 2015, flat 2016, a switch to monthly at the same run rate in
+# 2017 (not a cut), a special dividend, a raise in 2018 and no 2020 payments
+EVENTS = [
+    *[e for year in range(2010, 2016) for e in quarterly(year, 0.01 * (year - 1985))],
+    *quarterly(2016, 0.30),
+    (date(2017, 2, 15), 0.30, False),
+    *[(date(2017, month, 15), 0.10, False) for month in range(3, 13)],
+    (date(2017, 12, 20), 5.0, True),
+    *monthly(2018, 0.11),
+    *monthly(2019, 0.11),
+    *monthly(2021, 0.12),
+]
+
+
+def test_frequency_snaps_to_common_schedules():
+    assert [payment_frequency(g) for g in (365, 182, 91, 30, 0)] == [1, 2, 4, 12, 1]
+
+
+@pytest.mark.parametrize("upto", range(1, len(EVENTS) + 1))
+def test_incremental_updates_match_a_rebuild(upto):
+    incremental = DividendStreakTracker()
+    for ex_date, amount, special in EVENTS[:upto]:
+        assert incremental.add_payment("KO", ex_date, amount, special)
+    rebuilt = DividendStreakTracker()
+    rebuilt.rebuild("KO", EVENTS[:upto])
+    assert incremental.states == rebuilt.states
+
+
+def test_streaks_through_raises_a_flat_year_and_a_frequency_switch():
+    tracker = DividendStreakTracker()
+    tracker.rebuild("KO", EVENTS[: EVENTS.index((date(2019, 1, 15), 0.11, False))])
+    row = tracker.snapshot(as_of=date(2018, 12, 31)).row(0)
+    # 2010-2018 paid; increases 2011-2015, then flat 2016 and 2017, raise in 2018
+    assert row["consecutive_payment_years"] == 9
+    assert row["consecutive_increase_years"] == 1
+
+
+def test_snapshot_keeps_streaks_alive_until_a_whole_year_passes():
+    tracker = DividendStreakTracker()
+    tracker.rebuild("KO", [e for y in range(2010, 2024) for e in quarterly(y, y)])
+    tracker.rebuild("PEP", quarterly(2020, 1.0))
+    snapshot = tracker.snapshot(as_of=date(2024, 3, 1), basis="payments")
+    assert snapshot.row(0) == {
+        "ticker": "KO",
+        "consecutive_payment_years": 14,
+        "consecutive_increase_years": 13,
+        "classification": "Contender",
+    }
+    assert snapshot.row(1)["consecutive_payment_years"] == 0  # lapsed
+    assert tracker.snapshot(as_of=date(2025, 1, 1)).row(0)["classification"] == "N/A"
+
+
+def test_state_is_none_without_regular_payments():
+    assert StreakState.from_history([], []) is None
+    tracker = DividendStreakTracker()
+    tracker.rebuild("KO", [(date(2020, 1, 1), 1.0, True)])
+    assert "KO" not in tracker.states
+
+
+async def test_sync_applies_new_events_and_rebuilds_amended_history(session):
+    stamp = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    session.add_all(
+        DividendEvent(ticker="KO", ex_date=ex, amount=amount, updated_at=stamp)
+        for ex, amount, _ in quarterly(2022, 1.0) + quarterly(2023, 1.1)
+    )
+    await session.commit()
+    tracker = DividendStreakTracker()
+    assert await tracker.sync_from_db(session) == {"KO"}
+    assert tracker.states["KO"].increased
+
+    # An older, corrected event is not newer than the state, so KO is rebuilt
+    later = stamp + timedelta(days=1)
+    session.add(
+        DividendEvent(
+            ticker="KO", ex_date=date(2023, 11, 1), amount=1.0, updated_at=later
+        )
+    )
+    await session.commit()
+    assert await tracker.sync_from_db(session) == {"KO"}
+    assert tracker.synced_at.replace(tzinfo=timezone.utc) == later
+    rebuilt = DividendStreakTracker()
+    rebuilt.rebuild(
+        "KO",
+        quarterly(2022, 1.0) + quarterly(2023, 1.1) + [(date(2023, 11, 1), 1.0, False)],
+    )
+    assert tracker.states == rebuilt.states
+    assert await tracker.sync_from_db(session) == set()
+
+
+async def test_sync_catches_late_commits_and_serializes_callers(session):
+    stamp = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    session.add_all(
+        DividendEvent(ticker="KO", ex_date=ex, amount=amount, updated_at=stamp)
+        for ex, amount, _ in quarterly(2022, 1.0)
+    )
+    await session.commit()
+    tracker = DividendStreakTracker()
+    # Concurrent requests on the shared tracker sync once, in turn
+    touched = await asyncio.gather(*(tracker.sync_from_db(session) for _ in range(3)))
+    assert sorted(touched, key=len) == [set(), set(), {"KO"}]
+
+    # Stamped before the watermark but committed after it
+    session.add(
+        DividendEvent(
+            ticker="KO",
+            ex_date=date(2023, 2, 15),
+            amount=1.1,
+            updated_at=stamp - timedelta(seconds=30),
+        )
+    )
+    await session.commit()
+    assert await tracker.sync_from_db(session) == {"KO"}
+    assert tracker.states["KO"].increased
+    state = tracker.states["KO"]
+    assert await tracker.sync_from_db(session) == set()
+    assert tracker.states["KO"] is state
@@ -0,0 +1,168 @@
+from datetime import date, timedelta
+
+import httpx
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from sqlmodel import select
+
+from app.api import fundamentals
+from app.dependencies import get_async_session
+from app.models.fundamentals import FUNDAMENTAL_FIELDS, Fundamental
+from app.services.fundamentals_ingest import load_fundamentals, validate_fundamentals
+
+ROW = {
+    "ticker": "KO",
+    "period_end": "2023-12-31",
+    **dict.fromkeys(FUNDAMENTAL_FIELDS),
+}
+
+
+def messages(batch):
+    return {(e.row, e.field): e.message for e in batch.errors}
+
+
+def test_records_and_columns_validate_alike():
+    records = [
+        {"ticker": " ko ", "period_end": "2024-12-31", "revenue": 10, "cash": None},
+        {"ticker": "PEP", "period_end": "2024-12-31", "revenue": "2.5"},
+    ]
+    columns = {
+        "ticker": [" ko ", "PEP"],
+        "period_end": ["2024-12-31", "2024-12-31"],
+        "revenue": [10, "2.5"],
+        "cash": [None, None],
+    }
+    for batch in (validate_fundamentals(records), validate_fundamentals(columns)):
+        assert batch.tickers == ["KO", "PEP"]
+        assert batch.periods.tolist() == [date(2024, 12, 31)] * 2
+        assert batch.values["revenue"].tolist() == [10.0, 2.5]
+        assert np.isnan(batch.values["cash"]).all()
+        assert batch.errors == []
+
+
+def test_row_errors_skip_only_bad_rows():
+    batch = validate_fundamentals(
+        [
+            {"ticker": None, "period_end": "2024-12-31"},
+            {"ticker": "X" * 17, "period_end": "2024-12-31"},
+            {"ticker": 5, "period_end": "2024-12-31"},
+            {"ticker": "A", "period_end": "2024-02-30"},
+            {"ticker": "A", "period_end": "2024-12-31T00:00"},
+            {"ticker": "A", "period_end": "2024-12-31", "revenue": "n/a"},
+            {"ticker": "A", "period_end": "2024-12-31", "revenue": "inf"},
+            {"ticker": "A", "period_end": "2024-12-31", "revenue": 10**400},
+            {"ticker": "A", "period_end": "2024-12-31", "revenue": [1]},
+            {"ticker": "A", "period_end": "2024-02-29", "revenue": 1},
+        ]
+    )
+    assert batch.rows.tolist() == [9]
+    assert messages(batch) == {
+        (0, "ticker"): "Field required",
+        (1, "ticker"): "Ticker must be 1-16 characters",
+        (2, "ticker"): "Input should be a valid string",
+        (3, "period_end"): "Input should be a valid date (YYYY-MM-DD)",
+        (4, "period_end"): "Input should be a valid date (YYYY-MM-DD)",
+        (5, "revenue"): "Input should be a valid number",
+        (6, "revenue"): "Input should be a finite number",
+        (7, "revenue"): "Input should be a valid number",
+        (8, "revenue"): "Input should be a valid number",
+    }
+
+
+def test_last_duplicate_wins():
+    batch = validate_fundamentals(
+        {
+            "ticker": ["KO", "KO", "ko"],
+            "period_end": ["2024-12-31", "2023-12-31", "2024-12-31"],
+            "revenue": [1.0, 2.0, 3.0],
+        }
+    )
+    assert batch.rows.tolist() == [1, 2]
+    assert messages(batch) == {(0, "period_end"): "Superseded by row 2"}
+
+
+def test_pre_1970_periods_do_not_collide_across_tickers():
+    batch = validate_fundamentals(
+        {"ticker": ["KO", "PEP"], "period_end": ["1965-12-31", "1965-12-31"]}
+    )
+    assert batch.tickers == ["KO", "PEP"]
+    assert batch.errors == []
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [{"ticker": ["A"], "revenue": [1, 2]}, {"bogus": [1]}, "x", [1]],
+)
+def test_malformed_batches_raise(payload):
+    with pytest.raises(ValueError):
+        validate_fundamentals(payload)
+
+
+@pytest.mark.parametrize(
+    "records",
+    [
+        # Every field present (the transposed fast path) or only some
+        [{**ROW, "revnue": 1.0}],
+        [{"ticker": "KO", "period_end": "2023-12-31", "revnue": 1.0}],
+    ],
+)
+async def test_misspelt_record_fields_reject_the_batch(records, session):
+    with pytest.raises(ValueError, match="Unknown fields: revnue"):
+        validate_fundamentals(records)
+
+    app = FastAPI()
+    app.include_router(fundamentals.router)
+    app.dependency_overrides[get_async_session] = lambda: session
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        rejected = await client.post("/fundamentals/batch", json=records)
+        accepted = await client.post(
+            "/fundamentals/batch", params={"dry_run": True}, json=[ROW]
+        )
+    assert rejected.status_code == 422
+    assert rejected.json()["detail"] == "Unknown fields: revnue"
+    assert (accepted.json()["valid"], accepted.json()["inserted"]) == (1, 0)
+
+
+async def test_load_inserts_then_updates(session, store):
+    first = validate_fundamentals(
+        {"ticker": ["KO", "PEP"], "period_end": ["2024-12-31"] * 2, "revenue": [1, 2]}
+    )
+    assert await load_fundamentals(session, first, chunk_size=1) == (2, 0)
+    second = validate_fundamentals(
+        {"ticker": ["KO", "KO"], "period_end": ["2024-12-31", "2023-12-31"]}
+    )
+    assert await load_fundamentals(session, second) == (1, 1)
+
+    rows = (await session.scalars(select(Fundamental))).all()
+    assert {(r.ticker, r.period_end, r.revenue) for r in rows} == {
+        ("KO", date(2024, 12, 31), None),
+        ("KO", date(2023, 12, 31), None),
+        ("PEP", date(2024, 12, 31), 2.0),
+    }
+
+
+async def test_sync_picks_up_rows_stamped_before_the_watermark(session, store):
+    batch = validate_fundamentals(
+        {"ticker": ["KO"], "period_end": ["2024-12-31"], "revenue": [1]}
+    )
+    await load_fundamentals(session, batch)
+    assert await store.sync_from_db(session) == {"KO": {"revenue"}}
+    version = store.version
+
+    # A writer that stamped its rows earlier but committed after the sync
+    late = Fundamental(
+        ticker="PEP",
+        period_end=date(2024, 12, 31),
+        revenue=2.0,
+        updated_at=store.synced_at - timedelta(seconds=5),
+    )
+    session.add(late)
+    await session.commit()
+    assert await store.sync_from_db(session) == {"PEP": {"revenue"}}
+    assert store.version == version + 1
+
+    # Re-reading the overlap changes nothing and keeps the version
+    assert await store.sync_from_db(session) == {}
+    assert store.version == version + 1
@@ -0,0 +1,169 @@
+import asyncio
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+
+from app.core.jobs import (
+    CANCELLED,
+    FAILED,
+    QUEUED,
+    RUNNING,
+    SUCCEEDED,
+    JobManager,
+    JobStore,
+)
+from app.core.profiling import FormulaStatsStore
+from formulas.growth_and_projection import chowder_number
+from formulas.instrumentation import FormulaCounters
+
+
+def double(params, progress):
+    progress(0.5, "halfway")
+    return {"value": params["x"] * 2}
+
+
+def explode(params, progress):
+    raise RuntimeError("boom")
+
+
+def chowder(params, progress):
+    return float(chowder_number(np.ones(params["rows"]), np.ones(params["rows"]))[0])
+
+
+def crash(params, progress):
+    os._exit(1)  # takes the worker process down with it
+
+
+def locked_once(method):
+    calls = []
+
+    def wrapper(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return method(*args, **kwargs)
+
+    return wrapper
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_identical_in_flight_submissions_share_a_job(jobs):
+    first, deduplicated = jobs.create("double", {"x": 1, "y": [1, 2]})
+    assert not deduplicated and first.status == QUEUED
+    again, deduplicated = jobs.create("double", {"y": [1, 2], "x": 1})
+    assert deduplicated and again.id == first.id
+
+    jobs.finish(first.id, SUCCEEDED, ttl=60, result={"value": 2})
+    fresh, deduplicated = jobs.create("double", {"x": 1, "y": [1, 2]})
+    assert not deduplicated and fresh.id != first.id
+    assert jobs.result(first.id) == {"value": 2}
+
+
+def test_claim_cancel_and_requeue(jobs):
+    a, _ = jobs.create("double", {"x": 1})
+    b, _ = jobs.create("double", {"x": 2})
+    assert [job_id for job_id, *_ in jobs.claim_queued(1)] == [a.id]
+    assert jobs.get(a.id).status == RUNNING
+
+    # Queued jobs are cancelled at once, running ones only flagged
+    assert jobs.request_cancel(b.id, ttl=60).status == CANCELLED
+    assert jobs.request_cancel(a.id, ttl=60).status == RUNNING
+    assert jobs.cancel_requested(a.id)
+
+    # A running job owned by this (restarted) pid is an orphan
+    assert jobs.requeue_orphans() == 1
+    assert jobs.get(a.id).status == QUEUED
+
+
+def test_expired_results_are_purged(jobs):
+    job, _ = jobs.create("double", {"x": 1})
+    jobs.finish(job.id, SUCCEEDED, ttl=0, result={"value": 2})
+    with pytest.raises(KeyError):
+        jobs.result(job.id)
+    assert jobs.purge_expired() == 1
+    assert jobs.get(job.id) is None
+
+
+async def wait_for(jobs, job_id, statuses=(SUCCEEDED, FAILED, CANCELLED)):
+    for _ in range(300):
+        record = jobs.get(job_id)
+        if record.status in statuses:
+            return record
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"job {job_id} still {record.status}")
+
+
+@pytest.mark.slow
+async def test_manager_runs_jobs_in_worker_processes(jobs):
+    manager = JobManager(
+        jobs, {"double": double, "explode": explode}, max_workers=1, poll_interval=0.1
+    )
+    await manager.start()
+    try:
+        ok, _ = await manager.submit("double", {"x": 21})
+        bad, _ = await manager.submit("explode", {})
+        assert (await wait_for(jobs, ok.id)).status == SUCCEEDED
+        assert await manager.result(ok.id) == {"value": 42}
+        failed = await wait_for(jobs, bad.id)
+        assert (failed.status, failed.error) == (FAILED, "RuntimeError: boom")
+        with pytest.raises(ValueError):
+            await manager.submit("nope", {})
+    finally:
+        await manager.stop()
+
+
+@pytest.mark.slow
+async def test_manager_survives_store_errors_and_a_broken_pool(jobs, monkeypatch):
+    monkeypatch.setattr(jobs, "purge_expired", locked_once(jobs.purge_expired))
+    monkeypatch.setattr(jobs, "finish", locked_once(jobs.finish))
+    manager = JobManager(
+        jobs, {"double": double, "crash": crash}, max_workers=1, poll_interval=0.1
+    )
+    await manager.start()
+    try:
+        # The first dispatch pass and the first outcome write both fail
+        ok, _ = await manager.submit("double", {"x": 1})
+        assert (await wait_for(jobs, ok.id)).status == SUCCEEDED
+        assert not manager._unrecorded
+
+        dead, _ = await manager.submit("crash", {})
+        failed = await wait_for(jobs, dead.id)
+        assert (failed.status, failed.error.split(":")[0]) == (
+            FAILED,
+            "BrokenProcessPool",
+        )
+        after, _ = await manager.submit("double", {"x": 2})
+        assert (await wait_for(jobs, after.id)).status == SUCCEEDED
+        assert await manager.result(after.id) == {"value": 4}
+    finally:
+        await manager.stop()
+
+
+@pytest.mark.slow
+async def test_job_processes_publish_their_formula_counters(jobs, tmp_path):
+    stats = tmp_path / "formula_stats"
+    manager = JobManager(
+        jobs,
+        {"chowder": chowder},
+        max_workers=1,
+        poll_interval=0.1,
+        formula_stats_path=str(stats),
+    )
+    await manager.start()
+    try:
+        for rows in (10, 30):
+            job, _ = await manager.submit("chowder", {"rows": rows})
+            assert (await wait_for(jobs, job.id)).status == SUCCEEDED
+    finally:
+        await manager.stop()
+
+    # Read as the admin endpoint would, from a process with no calls of its own
+    report = FormulaStatsStore(stats, FormulaCounters()).report()
+    row = next(r for r in report if r["function"].endswith(".chowder_number"))
+    assert (row["calls"], row["rows"], row["max_rows"]) == (2, 40, 30)
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.api import live
+from app.core.cache import MemoryCache
+from app.dependencies import verify_token
+from app.services.live_yields import LiveYieldHub, PriceTickLog, Subscriber
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    monkeypatch.setattr("app.dependencies.TOKEN", "secret")
+    cache = MemoryCache()
+    hub = LiveYieldHub(store, cache)
+    monkeypatch.setattr(live, "get_live_yield_hub", lambda: hub)
+    monkeypatch.setattr(live, "get_fundamentals_store", lambda: store)
+    monkeypatch.setattr(live, "get_cache", lambda: cache)
+    app = FastAPI(dependencies=[Depends(verify_token)])
+    app.include_router(live.router)
+    return TestClient(app)
+
+
+def test_feed_accepts_the_token_as_a_query_parameter(client):
+    with client.websocket_connect("/ws/yields?token=secret") as ws:
+        ws.send_json({"tickers": ["zzz"]})
+        assert ws.receive_json() == {
+            "type": "error",
+            "ticker": "ZZZ",
+            "detail": "No data",
+        }
+
+
+@pytest.mark.parametrize("token", ["", "?token=wrong"])
+def test_feed_rejects_missing_or_wrong_tokens(client, token):
+    with pytest.raises(WebSocketDisconnect) as excinfo:
+        with client.websocket_connect(f"/ws/yields{token}") as ws:
+            ws.receive_json()
+    assert excinfo.value.code == 1008
+
+
+def test_http_routes_still_require_the_header(client):
+    assert client.post("/live/prices", json=[]).status_code == 401
+    response = client.post("/live/prices", json=[], headers={"X-Token": "secret"})
+    assert response.json() == {"accepted": 0}
+
+
+@pytest.mark.parametrize(
+    "message, detail",
+    [
+        ("not json", "Invalid message: expected JSON"),
+        ('["bad"]', "Invalid message: message: Input should be"),
+        ('{"action": "drop", "tickers": []}', "Invalid message: action:"),
+        ('{"tickers": "KO"}', "Invalid message: tickers:"),
+    ],
+)
+def test_malformed_messages_get_an_error_frame(client, message, detail):
+    with client.websocket_connect("/ws/yields?token=secret") as ws:
+        ws.send_text(message)
+        frame = ws.receive_json()
+        assert frame["type"] == "error" and frame["detail"].startswith(detail)
+        # The session survives
+        ws.send_json({"tickers": ["zzz"]})
+        assert ws.receive_json()["ticker"] == "ZZZ"
+
+
+async def test_subscriber_coalesces_updates_per_ticker():
+    subscriber = Subscriber()
+    subscriber.offer("KO", {"price": 1})
+    subscriber.offer("PEP", {"price": 2})
+    subscriber.offer("KO", {"price": 3})
+    assert await asyncio.wait_for(subscriber.drain(), 1) == [
+        {"price": 3},
+        {"price": 2},
+    ]
+    assert subscriber.superseded == 1
+
+
+async def test_ticks_reach_subscribers_on_other_workers(store, tmp_path):
+    store.upsert(
+        [
+            {
+                "ticker": "KO",
+                "period_end": "2023-12-31",
+                "dividend_per_share": 2.0,
+                "stock_price": 50.0,
+            }
+        ]
+    )
+    path = str(tmp_path / "ticks.sqlite3")
+    receiving = LiveYieldHub(store, MemoryCache(), ticks=PriceTickLog(path))
+    other = LiveYieldHub(store, MemoryCache(), ticks=PriceTickLog(path))
+    await receiving.publish_prices([("KO", 10.0)])  # before the hubs started
+    for hub in (receiving, other):
+        await hub.flush()  # sets the cursor past retained history
+    subscriber = Subscriber()
+    other.subscribe(subscriber, ["KO"])
+
+    await receiving.publish_prices([("KO", 40.0), ("KO", 25.0)])
+    assert await receiving.flush() == 1
+    assert await other.flush() == 1
+    [message] = await asyncio.wait_for(subscriber.drain(), 1)
+    assert (message["price"], message["current_dividend_yield"]) == (25.0, 8.0)
+    assert await other.flush() == 0
+
+
+async def test_feed_survives_a_failing_flush(store, monkeypatch):
+    hub = LiveYieldHub(store, MemoryCache(), interval=0)
+    flushes = []
+
+    async def flush():
+        flushes.append(1)
+        if len(flushes) == 1:
+            raise RuntimeError("boom")
+        if len(flushes) == 3:
+            raise asyncio.CancelledError
+
+    monkeypatch.setattr(hub, "flush", flush)
+    with pytest.raises(asyncio.CancelledError):
+        await hub.run()
+    assert len(flushes) == 3
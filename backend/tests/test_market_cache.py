@@ -0,0 +1,97 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.cache import MemoryCache
+from app.core.market_hours import (
+    MARKET_TZ,
+    is_market_open,
+    market_aware_ttl,
+    next_market_open,
+)
+from app.services import cache_warmer
+from app.services.yield_metrics import cached_yield_metrics
+
+
+def at(*args):
+    return datetime(*args, tzinfo=MARKET_TZ)
+
+
+def test_next_open_skips_weekends_and_is_strictly_after():
+    assert next_market_open(at(2024, 3, 15, 9, 30)) == at(2024, 3, 18, 9, 30)  # Fri
+    assert next_market_open(at(2024, 3, 13, 9, 29)) == at(2024, 3, 13, 9, 30)
+    assert next_market_open(at(2024, 3, 16, 12, 0)) == at(2024, 3, 18, 9, 30)
+
+
+def test_market_open_hours():
+    assert is_market_open(at(2024, 3, 13, 9, 30))
+    assert not is_market_open(at(2024, 3, 13, 16, 0))
+    assert not is_market_open(at(2024, 3, 16, 12, 0))
+    with pytest.raises(ValueError):
+        is_market_open(datetime(2024, 3, 13, 12, 0))
+
+
+@pytest.mark.parametrize(
+    "now, expected",
+    [
+        (at(2024, 3, 13, 12, 0), 300),  # in session
+        (at(2024, 3, 13, 16, 10), 300),  # closing-print grace
+        (at(2024, 3, 13, 16, 15), 17 * 3600 + 15 * 60),  # overnight
+        (at(2024, 3, 15, 16, 15), 65 * 3600 + 15 * 60),  # across the weekend
+    ],
+)
+def test_ttl_stretches_outside_the_session(now, expected):
+    assert market_aware_ttl(300, now, close_grace_minutes=15) == expected
+
+
+def test_cache_expiry_lru_and_popularity(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("app.core.cache.time.monotonic", lambda: clock[0])
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", 1, ttl=10)
+    cache.set("b", 2, ttl=100)
+    cache.get("a")
+    cache.set("c", 3, ttl=100)  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    clock[0] += 10
+    assert cache.get("a") is None  # expired
+    assert cache.get("c") == 3
+
+    for name in ["KO", "KO", "KO", "PEP", "PEP", "T"]:
+        cache.record_request(name)
+    assert cache.most_requested(2) == ["KO", "PEP"]
+    cache.decay_requests()
+    assert cache.most_requested(3) == ["KO", "PEP"]
+
+
+def test_cached_yields_follow_store_syncs(store):
+    row = {"ticker": "KO", "period_end": "2023-12-31", "dividend_per_share": 2.0}
+    store.upsert([{**row, "stock_price": 50.0}])
+    cache = MemoryCache()
+    assert cached_yield_metrics(store, "KO", cache)["current_dividend_yield"] == 4.0
+    # A filing lands after hours: the entry cached until the open is not reused
+    store.upsert([{**row, "stock_price": 25.0}])
+    assert cached_yield_metrics(store, "KO", cache)["current_dividend_yield"] == 8.0
+
+
+async def test_warmup_loop_survives_a_failed_run(store, monkeypatch):
+    runs = []
+
+    async def warm(cache, store, tickers, open_at):
+        runs.append(open_at)
+        if len(runs) == 1:
+            raise RuntimeError("store unavailable")
+        raise asyncio.CancelledError  # stop the loop after the second open
+
+    async def no_sleep(seconds):
+        pass
+
+    monkeypatch.setattr(cache_warmer, "warm_yield_metrics", warm)
+    monkeypatch.setattr(cache_warmer, "get_fundamentals_store", lambda: store)
+    monkeypatch.setattr(cache_warmer, "get_cache", MemoryCache)
+    monkeypatch.setattr(cache_warmer, "asyncio", SimpleNamespace(sleep=no_sleep))
+    with pytest.raises(asyncio.CancelledError):
+        await cache_warmer.run_premarket_warmup()
+    assert len(runs) == 2
@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+from app.services.metric_graph import MetricBatch, MetricGraph, get_metric_graph
+
+CALLS: list[str] = []
+
+
+def margin(revenue: float, cost: float) -> float:
+    CALLS.append("margin")
+    return (revenue - cost) / revenue
+
+
+def margin_pct(margin: float, scale: float = 100.0) -> float:
+    CALLS.append("margin_pct")
+    return margin * scale
+
+
+def rating(pct: float) -> float:
+    # Branches on its input, so arrays fall back to one call per row
+    if pct < 0:
+        raise ValueError("negative margin")
+    return 1.0 if pct > 50 else 0.0
+
+
+@pytest.fixture
+def graph():
+    CALLS.clear()
+    graph = MetricGraph(aliases={"pct": "margin_pct"})
+    for func in (margin, margin_pct, rating):
+        graph.register(func)
+    return graph
+
+
+def test_plan_wires_aliases_and_defaults(graph):
+    plan = graph.plan(["rating"], {"revenue", "cost"})
+    assert [s.node.name for s in plan.steps] == ["margin", "margin_pct", "rating"]
+    assert plan.steps[1].bindings == {"margin": "margin", "scale": None}
+    assert plan.steps[2].bindings == {"pct": "margin_pct"}
+    assert plan.inputs == {"revenue", "cost"}
+
+    # A supplied value wins over recomputing it
+    plan = graph.plan(["rating"], {"margin"})
+    assert [s.node.name for s in plan.steps] == ["margin_pct", "rating"]
+
+
+def test_plan_errors(graph):
+    with pytest.raises(ValueError, match="Unknown metric: nope"):
+        graph.plan(["nope"], set())
+    with pytest.raises(ValueError, match="missing inputs cost"):
+        graph.plan(["margin"], {"revenue"})
+    with pytest.raises(ValueError, match="already registered"):
+        graph.register(margin)
+
+
+def test_batch_memoizes_intermediates(graph):
+    batch = MetricBatch(graph, {"revenue": 10.0, "cost": 4.0})
+    assert batch.compute(["margin_pct"]) == {"margin_pct": pytest.approx(60.0)}
+    assert batch.compute(["rating", "margin"])["rating"] == 1.0
+    assert CALLS == ["margin", "margin_pct"]
+
+
+def test_arrays_vectorize_or_fall_back_per_row(graph):
+    batch = MetricBatch(
+        graph,
+        {"revenue": np.array([10.0, 10.0, 10.0]), "cost": [4.0, 8.0, 12.0]},
+        size=3,
+    )
+    values = batch.compute(["rating"])["rating"]
+    np.testing.assert_array_equal(values, [1.0, 0.0, np.nan])
+    modes = {t["metric"]: (t["mode"], t["errors"]) for t in batch.report()}
+    assert modes == {
+        "margin": ("vectorized", 0),
+        "margin_pct": ("vectorized", 0),
+        "rating": ("rowwise", 1),
+    }
+
+
+def test_update_inputs_invalidates_only_dependents(graph):
+    graph.register(lambda revenue: revenue * 2, name="double_revenue")
+    batch = MetricBatch(graph, {"revenue": 10.0, "cost": 4.0})
+    batch.compute(["rating", "double_revenue"])
+    assert batch.update_inputs({"cost": 5.0}) == {"margin", "margin_pct", "rating"}
+    assert set(batch.values) == {"double_revenue"}
+    assert batch.compute(["margin_pct"])["margin_pct"] == pytest.approx(50.0)
+
+
+def test_formula_graph_computes_real_metrics():
+    batch = MetricBatch(
+        get_metric_graph(),
+        {"dividend_per_share": 2.0, "earnings_per_share": 4.0, "stock_price": 50.0},
+    )
+    values = batch.compute(["earnings_payout_ratio", "current_dividend_yield"])
+    assert values == {
+        "earnings_payout_ratio": pytest.approx(50.0),
+        "current_dividend_yield": pytest.approx(4.0),
+    }
+
+
+def test_formula_bugs_become_nan_and_are_logged(caplog):
+    def broken(revenue: float) -> float:
+        return undefined_name * revenue  # noqa: F821
+
+    graph = MetricGraph(aliases={})
+    graph.register(broken)
+    assert np.isnan(MetricBatch(graph, {"revenue": 1.0}).compute(["broken"])["broken"])
+    rows = MetricBatch(graph, {"revenue": np.ones(3)}, size=3)
+    assert np.isnan(rows.compute(["broken"])["broken"]).all()
+    assert rows.report()[0]["errors"] == 3
+    assert [r.getMessage() for r in caplog.records][-1] == (
+        "broken raised NameError on 3 row(s); returned NaN"
+    )
+
+    # sortino_ratio shadows one of its helpers and always raises
+    real = MetricBatch(
+        get_metric_graph(), {"returns": [0.1, -0.2], "risk_free_rate": 0.02}
+    )
+    assert np.isnan(real.compute(["sortino_ratio"])["sortino_ratio"])
+
+
+def test_vectorized_and_rowwise_agree_on_zero_denominators():
+    inputs = {"free_cash_flow": np.array([1.0, 2.0]), "revenue": np.array([0.0, 4.0])}
+    batch = MetricBatch(get_metric_graph(), inputs, size=2)
+    vectorized = batch.compute(["free_cash_flow_margin"])["free_cash_flow_margin"]
+    scalar = MetricBatch(get_metric_graph(), {"free_cash_flow": 1.0, "revenue": 0.0})
+    assert np.isnan(scalar.compute(["free_cash_flow_margin"])["free_cash_flow_margin"])
+    np.testing.assert_array_equal(vectorized, [np.nan, 0.5])
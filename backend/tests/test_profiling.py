@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import admin
+from app.core.profiling import (
+    FormulaStatsStore,
+    ProfileStore,
+    get_formula_counters,
+)
+from app.middleware import RequestProfilingMiddleware
+from app.services.dividend_streaks import classify_streaks
+from app.services.metric_graph import MetricBatch, get_metric_graph
+from formulas.growth_and_projection import chowder_number
+from formulas.instrumentation import FormulaCounters
+
+
+def calls(name):
+    for row in get_formula_counters().report():
+        if row["function"] == name:
+            return row
+    return {"calls": 0}
+
+
+@pytest.fixture
+def counters():
+    get_formula_counters().reset()
+    yield
+    get_formula_counters().reset()
+
+
+def test_direct_calls_are_counted(counters):
+    assert chowder_number(3.0, 7.0) == 10.0
+    chowder_number(np.ones(250), np.ones(250))
+    row = calls("formulas.growth_and_projection.chowder_number")
+    assert (row["calls"], row["rows"], row["max_rows"]) == (2, 251, 250)
+
+    # Services that call formulas themselves are counted too
+    classify_streaks(np.array([3, 12, 12, 30]))
+    classify = "formulas.historical_and_trend_analysis.classify_dividend_stocks"
+    assert calls(classify)["calls"] == 3  # once per distinct value
+
+
+def test_graph_calls_are_counted_once(counters):
+    MetricBatch(
+        get_metric_graph(), {"dividend_per_share": 2.0, "earnings_per_share": 4.0}
+    ).compute(["earnings_payout_ratio"])
+    name = "formulas.core_dividend_safety_and_coverage.earnings_payout_ratio"
+    assert calls(name)["calls"] == 1
+    get_formula_counters().reset()
+    assert calls(name)["calls"] == 0
+
+
+def worker(path):
+    """A store over ``path`` with counters of its own, like another process"""
+    counters = FormulaCounters()
+    return FormulaStatsStore(path, counters), counters.instrument(
+        chowder_number.__wrapped__
+    )
+
+
+def test_formula_stats_are_summed_across_processes(tmp_path, monkeypatch):
+    (one, one_chowder), (other, other_chowder) = worker(tmp_path), worker(tmp_path)
+    one_chowder(np.ones(5), np.ones(5))
+    other_chowder(3.0, 7.0)
+    other_chowder(np.ones(8), np.ones(8))
+    other.flush()
+    (row,) = one.report("calls")
+    assert (row["calls"], row["rows"], row["max_rows"]) == (3, 14, 8)
+
+    # A reset anywhere clears every process; calls since the last flush stay
+    one.reset()
+    other_chowder(1.0, 1.0)
+    assert one.report() == []
+    other.flush()
+    assert [r["calls"] for r in one.report()] == [1]
+
+    monkeypatch.setattr(admin, "get_formula_stats_store", lambda: one)
+    app = FastAPI()
+    app.include_router(admin.router)
+    client = TestClient(app)
+    assert client.get("/admin/formula-stats").json()[0]["calls"] == 1
+    assert client.post("/admin/formula-stats/reset").status_code == 204
+    assert client.get("/admin/formula-stats").json() == []
+
+
+def test_profiles_are_shared_between_stores_and_pruned(tmp_path):
+    one = ProfileStore(tmp_path, max_entries=2)
+    other = ProfileStore(tmp_path, max_entries=2)
+    for i in range(3):
+        one.add(
+            f"p{i}",
+            {
+                "method": "GET",
+                "path": f"/{i}",
+                "status": 200,
+                "duration_ms": 1.0,
+                "captured_at": "2024-01-01T00:00:00+00:00",
+            },
+        )
+    assert [p["id"] for p in other.list()] == ["p2", "p1"]
+    assert other.get("p2")["path"] == "/2"
+    assert other.get("p0") is None
+    assert other.get("../p1") is None
+
+
+def test_profiled_request_is_readable_from_another_worker(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.dependencies.TOKEN", "secret")
+    store = ProfileStore(tmp_path)
+    monkeypatch.setattr("app.middleware.get_profile_store", lambda: store)
+    app = FastAPI()
+    app.add_middleware(RequestProfilingMiddleware)
+
+    @app.get("/work")
+    def work():
+        return {"total": sum(range(100_000))}
+
+    client = TestClient(app)
+    assert "x-profile-id" not in client.get("/work").headers
+    response = client.get("/work", headers={"X-Profile": "1", "X-Token": "secret"})
+    profile_id = response.headers["x-profile-id"]
+
+    # A different process: its own store instance over the same directory
+    monkeypatch.setattr(admin, "get_profile_store", lambda: ProfileStore(tmp_path))
+    reader = FastAPI()
+    reader.include_router(admin.router)
+    profile = TestClient(reader).get(f"/admin/profiles/{profile_id}").json()
+    assert (profile["path"], profile["status"]) == ("/work", 200)
+    assert TestClient(reader).get("/admin/profiles/missing").status_code == 404
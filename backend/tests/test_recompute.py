@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from app.services.metric_graph import MetricGraph
+from app.services.recompute import IncrementalRecomputer
+
+
+def net_margin(net_income: float, revenue: float) -> float:
+    return net_income / revenue
+
+
+def cash_per_revenue(cash: float, revenue: float) -> float:
+    return cash / revenue
+
+
+def net_margin_pct(net_margin: float) -> float:
+    return net_margin * 100
+
+
+@pytest.fixture
+def recomputer(store):
+    graph = MetricGraph(aliases={})
+    for func in (net_margin, cash_per_revenue, net_margin_pct):
+        graph.register(func)
+    store.upsert(
+        [
+            {
+                "ticker": "KO",
+                "period_end": "2023-12-31",
+                "revenue": 100.0,
+                "net_income": 10.0,
+                "cash": 5.0,
+            }
+        ]
+    )
+    return IncrementalRecomputer(store, graph)
+
+
+async def test_only_affected_values_are_recomputed(recomputer, store):
+    targets = ["net_margin_pct", "cash_per_revenue"]
+    assert await recomputer.metrics("KO", targets) == {
+        "net_margin_pct": pytest.approx(10.0),
+        "cash_per_revenue": pytest.approx(0.05),
+    }
+
+    changes = store.upsert(
+        [
+            {
+                "ticker": "KO",
+                "period_end": "2023-12-31",
+                "revenue": 100.0,
+                "net_income": 20.0,
+                "cash": 5.0,
+            }
+        ]
+    )
+    assert changes == {"KO": {"net_income"}}
+    assert await recomputer.notify_changes(changes) == 2
+    assert set(recomputer.batches["KO"].values) == {"cash_per_revenue"}
+
+    worker = asyncio.create_task(recomputer.run())
+    try:
+        for _ in range(100):
+            if recomputer.recomputed == 2:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        worker.cancel()
+    assert recomputer.recomputed == 2
+    assert recomputer.batches["KO"].values["net_margin_pct"] == pytest.approx(20.0)
+
+
+async def test_changes_for_unrequested_tickers_cost_nothing(recomputer):
+    assert await recomputer.notify_changes({"PEP": {"revenue"}}) == 0
+    assert not recomputer.batches
+
+
+async def test_a_failed_ticker_does_not_stop_the_worker(recomputer, monkeypatch):
+    recompute = recomputer._recompute
+
+    async def flaky(ticker, metrics):
+        if ticker == "BAD":
+            raise RuntimeError("boom")
+        await recompute(ticker, metrics)
+
+    monkeypatch.setattr(recomputer, "_recompute", flaky)
+    await recomputer.metrics("KO", ["net_margin_pct"])
+    recomputer.batches["KO"].invalidate(["net_margin"])
+    recomputer._pending.update({"BAD": {"net_margin"}, "KO": {"net_margin_pct"}})
+    recomputer._wakeup.set()
+
+    worker = asyncio.create_task(recomputer.run())
+    try:
+        for _ in range(100):
+            if recomputer.recomputed:
+                break
+            await asyncio.sleep(0.01)
+        assert not worker.done()
+    finally:
+        worker.cancel()
+    assert recomputer.recomputed == 1
+    assert not recomputer._pending
@@ -0,0 +1,144 @@
+import pytest
+
+from app.core.pagination import (
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+    query_fingerprint,
+)
+from app.models.metrics import MetricValue
+from app.services.screener import (
+    MetricFilter,
+    available_metrics,
+    materialize_metric_values,
+    screen,
+)
+
+
+@pytest.mark.parametrize("key", [[4.25, "KO"], [-1e-300, "BRK.B"], [0, ""]])
+def test_cursor_round_trip(key):
+    fingerprint = query_fingerprint("yield", True, [("roe", 0.1, None)])
+    cursor = encode_cursor(key, fingerprint)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, fingerprint) == key
+
+
+def test_cursors_are_bound_to_their_query():
+    cursor = encode_cursor([1.0, "KO"], query_fingerprint("yield", True, []))
+    with pytest.raises(InvalidCursor, match="another|different|belong"):
+        decode_cursor(cursor, query_fingerprint("yield", False, []))
+    for bad in ("", "not base64!", encode_cursor([1.0], "x")[:-2]):
+        with pytest.raises(InvalidCursor, match="Malformed"):
+            decode_cursor(bad, "x")
+
+
+def test_filter_specs():
+    assert MetricFilter.parse("roe:0.15:") == MetricFilter("roe", 0.15, None)
+    assert MetricFilter.parse("roe::2") == MetricFilter("roe", None, 2.0)
+    with pytest.raises(ValueError, match="Invalid filter: roe:low"):
+        MetricFilter.parse("roe:low")
+
+
+async def add_values(session, metric, values):
+    session.add_all(
+        MetricValue(metric=metric, ticker=t, value=v) for t, v in values.items()
+    )
+    await session.commit()
+
+
+async def pages(session, **kwargs):
+    cursor, tickers = None, []
+    while True:
+        page = await screen(session, cursor=cursor, **kwargs)
+        tickers.append([item["ticker"] for item in page.items])
+        if page.next_cursor is None:
+            return tickers
+        cursor = page.next_cursor
+
+
+async def test_pages_cover_ties_in_both_directions(session):
+    await add_values(
+        session, "yield", {"A": 3.0, "B": 2.0, "C": 2.0, "D": 2.0, "E": 1.0}
+    )
+    assert await pages(session, sort="yield", limit=2) == [
+        ["A", "D"],
+        ["C", "B"],
+        ["E"],
+    ]
+    assert await pages(session, sort="yield", descending=False, limit=3) == [
+        ["E", "B", "C"],
+        ["D", "A"],
+    ]
+
+
+async def test_inserts_between_pages_neither_skip_nor_repeat(session):
+    await add_values(session, "yield", {"A": 4.0, "B": 3.0, "C": 2.0, "D": 1.0})
+    first = await screen(session, "yield", limit=2)
+    await add_values(session, "yield", {"Z": 5.0, "X": 2.5})
+    second = await screen(session, "yield", limit=5, cursor=first.next_cursor)
+    assert [i["ticker"] for i in first.items + second.items] == [
+        "A",
+        "B",
+        "X",
+        "C",
+        "D",
+    ]
+    with pytest.raises(InvalidCursor):
+        await screen(session, "roe", limit=2, cursor=first.next_cursor)
+
+
+async def test_filters_join_other_metrics(session):
+    await add_values(session, "yield", {"A": 4.0, "B": 3.0, "C": 2.0})
+    await add_values(session, "roe", {"A": 0.05, "B": 0.2, "C": 0.3})
+    page = await screen(
+        session,
+        "yield",
+        filters=[MetricFilter("roe", 0.1, None), MetricFilter("yield", None, 3.5)],
+    )
+    assert page.items == [
+        {"ticker": "B", "yield": 3.0, "roe": 0.2},
+        {"ticker": "C", "yield": 2.0, "roe": 0.3},
+    ]
+
+
+async def test_materialize_writes_only_changes(session, store):
+    store.upsert(
+        [
+            {
+                "ticker": "KO",
+                "period_end": "2023-12-31",
+                "dividend_per_share": 2.0,
+                "stock_price": 50.0,
+            },
+            {
+                "ticker": "PEP",
+                "period_end": "2023-12-31",
+                "dividend_per_share": 5.0,
+                "stock_price": 100.0,
+            },
+        ]
+    )
+    metrics = ("current_dividend_yield", "price_to_dividend_ratio")
+    assert await materialize_metric_values(session, store, metrics=metrics) == 4
+    assert await materialize_metric_values(session, store, metrics=metrics) == 0
+    assert await available_metrics(session) == {
+        "current_dividend_yield": 2,
+        "price_to_dividend_ratio": 2,
+    }
+
+    store.upsert(
+        [
+            {
+                "ticker": "KO",
+                "period_end": "2023-12-31",
+                "dividend_per_share": 2.0,
+                "stock_price": 25.0,
+            }
+        ]
+    )
+    assert await materialize_metric_values(session, store, ["KO"], metrics=metrics) == 2
+    page = await screen(session, "current_dividend_yield")
+    assert page.items == [
+        {"ticker": "KO", "current_dividend_yield": pytest.approx(8.0)},
+        {"ticker": "PEP", "current_dividend_yield": pytest.approx(5.0)},
+    ]
@@ -0,0 +1,123 @@
+import secrets
+
+import numpy as np
+import pytest
+
+from app.core.columnar_store import FundamentalsStore
+from app.core.shared_snapshot import (
+    SnapshotPublisher,
+    SnapshotReader,
+    _read_manifest,
+    _unlink,
+)
+from app.services import universe_snapshot
+from app.services.corporate_actions import CorporateActionAdjuster
+from app.services.recompute import IncrementalRecomputer
+from app.services.universe_snapshot import publish_universe, universe_batch
+
+
+def row(ticker, dividend, price):
+    return {
+        "ticker": ticker,
+        "period_end": "2023-12-31",
+        "dividend_per_share": dividend,
+        "stock_price": price,
+    }
+
+
+@pytest.fixture
+def publisher(tmp_path):
+    publisher = SnapshotPublisher(
+        tmp_path / "snapshot", prefix=f"test{secrets.token_hex(4)}"
+    )
+    yield publisher
+    manifest = _read_manifest(publisher.path)
+    publisher.close()
+    if manifest is not None:
+        _unlink(manifest["segment"])
+
+
+def test_followers_reload_the_index_only_after_a_write(tmp_path):
+    writer = FundamentalsStore.open(tmp_path / "store")
+    follower = FundamentalsStore.open(tmp_path / "store")
+    assert writer.acquire_writer() and not follower.acquire_writer()
+    assert not follower.refresh()
+
+    writer.upsert([row("KO", 2.0, 50.0)])
+    assert follower.refresh() and follower.version == writer.version
+    assert not follower.refresh()
+    assert follower.latest_row("KO")["stock_price"] == 50.0
+    with pytest.raises(RuntimeError, match="Another process"):
+        follower.upsert([row("KO", 2.0, 60.0)])
+    writer.close()
+
+
+def test_only_one_publisher_and_readers_follow_the_manifest(publisher, tmp_path):
+    rival = SnapshotPublisher(publisher.path)
+    reader = SnapshotReader(publisher.path)
+    assert reader.current() is None
+
+    assert publisher.publish({"a": np.arange(3.0)}, {"tickers": ["X"]}) == 1
+    assert not rival.acquire()
+    with pytest.raises(RuntimeError):
+        rival.publish({"a": np.zeros(1)})
+    first = reader.current()
+    assert reader.current() is first and first.index("tickers") == {"X": 0}
+
+    publisher.publish({"a": np.arange(4.0), "b": np.ones((2, 2), np.int32)})
+    second = reader.current()
+    assert second.version == 2 and second["b"].dtype == np.int32
+    np.testing.assert_array_equal(second["a"], np.arange(4.0))
+    with pytest.raises(ValueError):
+        second["a"][0] = 1.0  # read-only
+    # Views into the replaced snapshot stay valid while referenced
+    np.testing.assert_array_equal(first["a"], np.arange(3.0))
+
+
+def test_a_lagging_follower_catches_up_with_the_snapshot(
+    publisher, tmp_path, monkeypatch
+):
+    writer = FundamentalsStore.open(tmp_path / "store")
+    follower = FundamentalsStore.open(tmp_path / "store")
+    writer.upsert([row("KO", 2.0, 50.0), row("PEP", 5.0, 100.0)])
+    publish_universe(publisher, writer, CorporateActionAdjuster())
+    reader = SnapshotReader(publisher.path)
+    monkeypatch.setattr(universe_snapshot, "get_snapshot_reader", lambda: reader)
+
+    # The follower has not synced yet, but reads the published snapshot
+    assert follower.version != writer.version
+    batch = universe_batch(follower, ["PEP"])
+    assert follower.version == writer.version
+    assert batch.inputs["current_dividend_yield"][0] == pytest.approx(5.0)
+
+    # A write not yet published falls back to the store
+    writer.upsert([row("PEP", 6.0, 100.0)])
+    follower.refresh()
+    batch = universe_batch(follower, ["PEP"])
+    assert "current_dividend_yield" not in batch.inputs
+    assert batch.compute(["current_dividend_yield"])["current_dividend_yield"][
+        0
+    ] == pytest.approx(6.0)
+
+
+async def test_follower_batches_drop_only_values_whose_inputs_moved(tmp_path):
+    writer = FundamentalsStore.open(tmp_path / "store")
+    follower = FundamentalsStore.open(tmp_path / "store")
+    writer.upsert([row("KO", 2.0, 50.0)])
+    follower.refresh()
+    recomputer = IncrementalRecomputer(follower)
+    targets = ["current_dividend_yield", "earnings_payout_ratio"]
+    await recomputer.metrics("KO", ["current_dividend_yield"])
+
+    # Another ticker changed; the follower re-feeds every field of KO
+    writer.upsert([row("PEP", 5.0, 100.0)])
+    follower.refresh()
+    everything = {"KO": follower.fields}
+    assert await recomputer.notify_changes(everything) == 0
+
+    writer.upsert([row("KO", 2.0, 40.0)])
+    follower.refresh()
+    assert await recomputer.notify_changes(everything) == 1
+    assert "current_dividend_yield" not in recomputer.batches["KO"].values
+    with pytest.raises(ValueError):
+        await recomputer.metrics("KO", targets)  # no earnings reported
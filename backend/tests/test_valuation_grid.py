@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import valuation
+from app.core.columnar_store import get_fundamentals_store
+from app.services.valuation_grid import (
+    GridCache,
+    round_grid_inputs,
+    valuation_grid,
+)
+from formulas.growth_and_projection import (
+    gordon_growth_model,
+    three_stage_dividend_discount_model,
+    two_stage_dividend_discount_model,
+)
+
+R = np.linspace(0.02, 0.12, 6)
+G = np.linspace(0.0, 0.06, 4)
+
+
+def scalar_grid(model, dividend, growth_axis="stable", g1=0.08, gs=0.03, n1=5, n2=5):
+    expected = np.full((len(R), len(G)), np.nan)
+    for i, r in enumerate(R):
+        for j, g in enumerate(G):
+            a, b = (g, gs) if growth_axis == "initial" else (g1, g)
+            try:
+                if model == "gordon":
+                    expected[i, j] = gordon_growth_model(dividend * (1 + g), r, g)
+                elif model == "two_stage":
+                    expected[i, j] = two_stage_dividend_discount_model(
+                        dividend, a, b, r, n1
+                    )
+                else:
+                    expected[i, j] = three_stage_dividend_discount_model(
+                        dividend, a, b, r, n1, n2
+                    )
+            except ValueError:
+                pass  # r <= g
+    return expected
+
+
+@pytest.mark.parametrize(
+    "model, growth_axis",
+    [
+        ("gordon", "stable"),
+        ("two_stage", "stable"),
+        ("two_stage", "initial"),
+        ("three_stage", "stable"),
+        ("three_stage", "initial"),
+    ],
+)
+def test_grid_matches_the_scalar_models(model, growth_axis):
+    grid = valuation_grid(
+        model,
+        2.0,
+        0.02,
+        0.12,
+        len(R),
+        0.0,
+        0.06,
+        len(G),
+        growth_axis=growth_axis,
+        initial_growth_rate=0.08,
+        stable_growth_rate=0.03,
+    )
+    expected = scalar_grid(model, 2.0, growth_axis)
+    assert grid.dtype == np.float32 and grid.shape == (len(R), len(G))
+    np.testing.assert_allclose(grid, expected, rtol=1e-5)
+    # r <= g has no value rather than an error
+    assert np.isnan(grid[0, -1]) and not grid.flags.writeable
+
+
+def test_unknown_model_and_rounded_inputs():
+    with pytest.raises(ValueError, match="Unknown valuation model"):
+        valuation_grid("capm", 1.0, 0.05, 0.1, 2, 0.0, 0.01, 2)
+    assert round_grid_inputs(r_min=0.0400000001, steps=7) == {"r_min": 0.04, "steps": 7}
+
+
+@pytest.fixture
+def client(store):
+    store.upsert(
+        [
+            {"ticker": "KO", "period_end": "2023-12-31", "dividend_per_share": 1.84},
+            {"ticker": "XYZ", "period_end": "2023-12-31", "revenue": 10.0},
+        ]
+    )
+    app = FastAPI()
+    app.include_router(valuation.router)
+    app.dependency_overrides[get_fundamentals_store] = lambda: store
+    return TestClient(app)
+
+
+def test_grid_endpoint_binary_and_json(client):
+    params = {"r_min": 0.02, "r_max": 0.12, "r_steps": 6, "g_max": 0.06, "g_steps": 4}
+    response = client.get("/valuation/ko/grid", params=params)
+    assert response.headers["x-grid-shape"] == "6,4"
+    grid = np.frombuffer(response.content, dtype="<f4").reshape(6, 4)
+    np.testing.assert_allclose(grid, scalar_grid("gordon", 1.84), rtol=1e-5)
+
+    body = client.get("/valuation/ko/grid", params={**params, "format": "json"}).json()
+    assert body["dividend"] == 1.84 and len(body["growth_rates"]) == 4
+    assert body["values"][0][-1] is None
+    assert body["values"][-1][0] == pytest.approx(1.84 / 0.12, abs=1e-4)
+
+
+@pytest.mark.parametrize(
+    "path, params, status",
+    [
+        ("/valuation/nope/grid", {}, 404),
+        ("/valuation/xyz/grid", {}, 422),  # no dividend on record
+        ("/valuation/ko/grid", {"r_min": 0.2}, 422),
+        ("/valuation/ko/grid", {"g_steps": 100_000}, 422),
+    ],
+)
+def test_grid_endpoint_rejects_bad_requests(client, path, params, status):
+    assert client.get(path, params=params).status_code == status
+
+
+def test_grid_cache_is_bounded_by_bytes():
+    cache = GridCache(max_bytes=2 * 100 * 4)
+    grids = {k: np.zeros((10, 10), np.float32) for k in "abc"}
+    for key, grid in grids.items():
+        assert cache.put(key, grid) is grid
+    assert cache.get("a") is None and cache.get("c") is grids["c"]
+    cache.get("b")  # most recently used survives the next insert
+    cache.put("d", np.zeros((10, 10), np.float32))
+    assert cache.get("c") is None and cache.get("b") is grids["b"]
+
+
+def test_grids_are_cached_by_their_inputs():
+    args = ("three_stage", 1.0, 0.05, 0.12, 50, 0.0, 0.04, 40)
+    first = valuation_grid(*args, transition_periods=7)
+    assert valuation_grid(*args, transition_periods=7) is first
+    assert valuation_grid(*args, transition_periods=8) is not first
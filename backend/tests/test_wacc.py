@@ -0,0 +1,136 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.core.market_assumptions import (
+    DEFAULT_ASSUMPTIONS,
+    MarketAssumptions,
+    MarketAssumptionsStore,
+)
+from app.services.wacc import WaccEngine
+from formulas.risk_adjusted_return_metrics import (
+    expected_market_return,
+    risk_free_rate,
+    weighted_average_cost_of_capital,
+)
+
+ROWS = {
+    "KO": dict(
+        interest_expense=50.0,
+        total_debt=1000.0,
+        shares_outstanding=100.0,
+        stock_price=60.0,
+        income_tax_expense=20.0,
+        pre_tax_income=100.0,
+    ),
+    # Loss-making: the snapshot's default tax rate applies
+    "T": dict(
+        interest_expense=80.0,
+        total_debt=2000.0,
+        shares_outstanding=50.0,
+        stock_price=20.0,
+        income_tax_expense=0.0,
+        pre_tax_income=-10.0,
+    ),
+    # No debt: WACC is the cost of equity
+    "MSFT": dict(
+        interest_expense=0.0,
+        total_debt=0.0,
+        shares_outstanding=10.0,
+        stock_price=300.0,
+        income_tax_expense=30.0,
+        pre_tax_income=150.0,
+    ),
+}
+
+
+@pytest.fixture
+def assumptions(tmp_path):
+    return MarketAssumptionsStore(tmp_path / "assumptions")
+
+
+@pytest.fixture
+def engine(store, assumptions):
+    store.upsert(
+        [{"ticker": t, "period_end": "2023-12-31", **row} for t, row in ROWS.items()]
+    )
+    return WaccEngine(store, assumptions)
+
+
+def test_curve_interpolation_and_validation():
+    snapshot = MarketAssumptions(1, None, (1.0, 10.0, 30.0), (0.05, 0.04, 0.045), 0.05)
+    assert snapshot.risk_free_rate() == 0.04
+    assert snapshot.risk_free_rate(5.5) == pytest.approx(0.045)
+    assert snapshot.risk_free_rate(0.25) == 0.05  # flat outside the curve
+    assert MarketAssumptions.from_dict(snapshot.to_dict()) == snapshot
+    with pytest.raises(ValueError, match="one yield per tenor"):
+        MarketAssumptions(1, None, (1.0,), (0.05, 0.04), 0.05)
+    with pytest.raises(ValueError, match="ascending"):
+        MarketAssumptions(1, None, (10.0, 1.0), (0.05, 0.04), 0.05)
+
+
+def test_publish_is_visible_to_other_processes_after_refresh(assumptions, tmp_path):
+    assert assumptions.current() is DEFAULT_ASSUMPTIONS
+    assert DEFAULT_ASSUMPTIONS.expected_market_return == expected_market_return
+
+    other = MarketAssumptionsStore(tmp_path / "assumptions")
+    published = assumptions.publish([2.0, 10.0], [0.04, 0.045], 0.055)
+    assert published.version == 1 and published.default_tax_rate == 0.21
+    assert other.current().version == 0
+    assert other.refresh() and other.current() == published
+    assert not other.refresh()
+
+    # Versions only ever increase, even when published from a stale reader
+    again = other.publish([10.0], [0.05], 0.05, default_tax_rate=0.25)
+    assert again.version == 2 and assumptions.get(1) == published
+    with pytest.raises(KeyError):
+        assumptions.get(3)
+
+
+def test_concurrent_publishers_claim_distinct_versions(tmp_path):
+    # One store per publisher, as if each were its own process
+    def publish(i):
+        store = MarketAssumptionsStore(tmp_path / "assumptions")
+        return store.publish([10.0], [0.04 + i / 1000], 0.05).version
+
+    with ThreadPoolExecutor(8) as pool:
+        versions = list(pool.map(publish, range(16)))
+    assert sorted(versions) == list(range(1, 17))
+    reader = MarketAssumptionsStore(tmp_path / "assumptions")
+    assert reader.current().version == 16
+    assert reader.get(5) is reader.get(5)
+
+
+def test_default_snapshot_matches_the_scalar_formula(engine, store):
+    result = engine.universe()
+    for i, ticker in enumerate(store.tickers):
+        expected = weighted_average_cost_of_capital(
+            risk_free_rate, 1.0, expected_market_return, **ROWS[ticker]
+        )
+        assert result["wacc"][i] == pytest.approx(expected)
+    assert result["tax_rate"][store.ticker_index("T")] == 0.21
+
+
+def test_results_are_cached_per_store_and_snapshot_version(engine, assumptions, store):
+    first = engine.universe()
+    assert engine.universe() is first
+
+    snapshot = assumptions.publish([10.0], [0.05], 0.06)
+    moved = engine.universe()
+    msft = store.ticker_index("MSFT")
+    assert moved["wacc"][msft] == pytest.approx(0.11)
+    assert engine.universe(version=0) is first
+
+    store.upsert([{"ticker": "MSFT", "period_end": "2024-12-31", "total_debt": 1.0}])
+    assert engine.universe(version=snapshot.version) is not moved
+
+
+def test_explicit_betas_are_not_cached(engine, store):
+    betas = np.linspace(0.5, 1.5, len(store.tickers))
+    result = engine.universe(betas=betas)
+    assert result is not engine.universe(betas=betas)
+    np.testing.assert_allclose(
+        result["cost_of_equity"],
+        risk_free_rate + betas * (expected_market_return - risk_free_rate),
+    )
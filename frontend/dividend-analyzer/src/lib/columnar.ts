@@ -0,0 +1,93 @@
+// Decoder for the API's binary columnar responses
+// (Accept: application/vnd.dividend.columnar). Layout and schema are
+// described in backend/app/core/columnar_format.py; numeric columns are
+// mapped as typed arrays over the response buffer, without copying.
+
+export const COLUMNAR_MEDIA_TYPE = 'application/vnd.dividend.columnar'
+
+const MAGIC = 'DCOL'
+const FORMAT_VERSION = 1
+const PREAMBLE_SIZE = 12
+
+type ColumnSchema = {
+  name: string
+  validity: number | null
+} & (
+  | { type: 'float64' | 'int32'; offset: number }
+  | { type: 'utf8'; offsets: number; data: number }
+)
+
+export type Column = Float64Array | Int32Array | (string | null)[]
+
+export interface ColumnarTable {
+  rows: number
+  meta: Record<string, unknown>
+  columns: Record<string, Column>
+  // Null float64 cells are also NaN; use this for int32 and generic code
+  isValid: (column: string, row: number) => boolean
+}
+
+export function decodeColumnar(buffer: ArrayBuffer): ColumnarTable {
+  const view = new DataView(buffer)
+  const text = new TextDecoder()
+  const magic = text.decode(new Uint8Array(buffer, 0, 4))
+  if (magic !== MAGIC || view.getUint8(4) !== FORMAT_VERSION) {
+    throw new Error('Not a columnar payload')
+  }
+  const headerSize = view.getUint32(8, true)
+  const schema = JSON.parse(
+    text.decode(new Uint8Array(buffer, PREAMBLE_SIZE, headerSize)),
+  ) as { rows: number; meta: Record<string, unknown>; columns: ColumnSchema[] }
+  const start = PREAMBLE_SIZE + headerSize
+  const rows = schema.rows
+
+  const columns: Record<string, Column> = {}
+  const validity: Record<string, Uint8Array> = {}
+  for (const column of schema.columns) {
+    if (column.validity != null) {
+      validity[column.name] = new Uint8Array(
+        buffer,
+        start + column.validity,
+        Math.ceil(rows / 8),
+      )
+    }
+    // Typed arrays use platform byte order; every browser we target is little-endian
+    if (column.type === 'float64') {
+      columns[column.name] = new Float64Array(buffer, start + column.offset, rows)
+    } else if (column.type === 'int32') {
+      columns[column.name] = new Int32Array(buffer, start + column.offset, rows)
+    } else {
+      const offsets = new Int32Array(buffer, start + column.offsets, rows + 1)
+      const data = new Uint8Array(buffer, start + column.data, offsets[rows])
+      const bits = validity[column.name]
+      columns[column.name] = Array.from({ length: rows }, (_, i) =>
+        bits && !(bits[i >> 3] & (1 << (i & 7)))
+          ? null
+          : text.decode(data.subarray(offsets[i], offsets[i + 1])),
+      )
+    }
+  }
+
+  return {
+    rows,
+    meta: schema.meta,
+    columns,
+    isValid: (column, row) => {
+      const bits = validity[column]
+      return !bits || (bits[row >> 3] & (1 << (row & 7))) !== 0
+    },
+  }
+}
+
+export async function fetchColumnar(
+  input: RequestInfo | URL,
+  init: RequestInit = {},
+): Promise<ColumnarTable> {
+  const headers = new Headers(init.headers)
+  headers.set('Accept', COLUMNAR_MEDIA_TYPE)
+  const response = await fetch(input, { ...init, headers })
+  if (!response.ok) {
+    throw new Error(`${response.status} ${response.statusText}`)
+  }
+  return decodeColumnar(await response.arrayBuffer())
+}